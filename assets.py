@@ -0,0 +1,246 @@
+import heapq
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pygame
+
+# -------------- Asset manager --------------
+# Loads sounds, fonts and images listed in a JSON manifest on a background
+# thread, so the title screen is interactive while they decode:
+# {
+#   "sounds": {"hit": {"path": "hit.wav", "states": ["PLAYING"], "category": "combat"}},
+#   "fonts":  {"title": {"path": "title.ttf", "size": 48}},
+#   "images": {"stage": {"path": "stage.png", "alpha": false}}
+# }
+# Paths are relative to the manifest. "states" lists the GameState names
+# that need the asset; prefer() moves those to the front of the queue.
+# Anything not decoded yet (or missing) is served as a placeholder.
+# Sound playback fields (category, priority, variants) are read by audio.py.
+#
+# Browser builds have no threads: start() then leaves decoding to step(),
+# which the game calls between frames. Their optional assets come in a
+# second archive (see web_build.py) that mount_pack() fetches after the
+# first frame; assets that failed before it arrived are queued again.
+
+MANIFEST_PATH = os.path.join("assets", "manifest.json")
+MEMORY_CAP = 64 * 1024 * 1024
+KINDS = ("sounds", "fonts", "images")
+
+class SilentSound:
+    def play(self, *args, **kwargs):
+        return None
+
+    def stop(self):
+        pass
+
+    def set_volume(self, value):
+        pass
+
+    def get_length(self):
+        return 0.0
+
+SILENT = SilentSound()
+
+class AssetManager:
+    def __init__(self, entries, base_dir=".", memory_cap=MEMORY_CAP):
+        # entries: name -> (kind, spec)
+        self.entries = entries
+        self.base_dir = base_dir
+        self.memory_cap = memory_cap
+        self.cache = OrderedDict()   # name -> (asset, size), least recent first
+        self.memory = 0
+        self.failed = set()
+        self.converted = set()
+        self._queue = []
+        self._wanted = set()   # names pushed at top priority by get()
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._placeholders = {}
+        self._search = [base_dir]
+        self._pack = None
+        self._pack_dir = None
+        for name in entries:
+            self._push(name, 1)
+
+    @classmethod
+    def from_manifest(cls, path=MANIFEST_PATH, memory_cap=MEMORY_CAP):
+        entries = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                manifest = json.load(f)
+            for kind in KINDS:
+                for name, spec in manifest.get(kind, {}).items():
+                    entries[name] = (kind, spec)
+        return cls(entries, os.path.dirname(path), memory_cap)
+
+    # ---- queue ----
+    def _push(self, name, priority):
+        self._seq += 1
+        heapq.heappush(self._queue, (priority, self._seq, name))
+
+    def start(self):
+        thread = threading.Thread(target=self._worker, name="asset-loader", daemon=True)
+        try:
+            thread.start()
+            self._thread = thread
+        except RuntimeError:
+            pass   # no threads (WebAssembly): decode in step() instead
+        return self
+
+    def prefer(self, *states):
+        # Queue the assets these states need ahead of everything else
+        wanted = {getattr(s, "name", s) for s in states}
+        with self._cond:
+            for name, (kind, spec) in self.entries.items():
+                if wanted.intersection(spec.get("states", ())) and name not in self.cache:
+                    self._push(name, 0)
+            self._cond.notify()
+
+    def _next(self):
+        # Next name that still needs decoding, or None; caller holds the lock
+        while self._queue:
+            _, _, name = heapq.heappop(self._queue)
+            self._wanted.discard(name)
+            if name not in self.cache and name not in self.failed:
+                return name
+        return None
+
+    def _load(self, name):
+        kind, spec = self.entries[name]
+        try:
+            asset, size = self._decode(kind, spec)
+        except (pygame.error, OSError):
+            with self._cond:
+                self.failed.add(name)
+            return
+        with self._cond:
+            self._store(name, asset, size)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                name = self._next()
+                while name is None:
+                    self._cond.wait()
+                    name = self._next()
+            self._load(name)
+
+    def step(self, budget_ms):
+        # Decode on the calling thread for up to budget_ms (no-op with a loader thread)
+        if self._thread is not None:
+            return
+        if self._pack is not None and self._pack.ready:
+            self._search.append(self._pack_dir)
+            self._pack = None
+            with self._cond:
+                for name in self.failed:
+                    self._push(name, 1)
+                self.failed.clear()
+        end = time.perf_counter() + budget_ms / 1000
+        while time.perf_counter() < end:
+            with self._cond:
+                name = self._next()
+            if name is None:
+                return
+            self._load(name)
+
+    def mount_pack(self, url):
+        # Browser only: mount a zip of optional assets next to the app the
+        # same way the page mounts the main archive (see index.html)
+        import platform
+        point = os.path.join(os.path.dirname(os.getcwd()), "extras")
+        cfg = {"io": "url", "type": "mount", "mount": {"point": point, "path": "/"}, "path": f"/ => {point}"}
+        self._pack_dir = os.path.join(point, "assets", self.base_dir)
+        self._pack = platform.window.MM.prepare(url, json.dumps(cfg))
+
+    # ---- decoding ----
+    def _path(self, spec):
+        for base in self._search[1:]:
+            path = os.path.join(base, spec["path"])
+            if os.path.exists(path):
+                return path
+        return os.path.join(self.base_dir, spec["path"])
+
+    def _decode(self, kind, spec):
+        path = self._path(spec)
+        if kind == "sounds":
+            # The mixer starts with the first sound rather than at import
+            from main import init_mixer
+            init_mixer()
+            sound = pygame.mixer.Sound(path)
+            if "volume" in spec:
+                sound.set_volume(spec["volume"])
+            freq, fmt, channels = pygame.mixer.get_init()
+            size = int(sound.get_length() * freq * channels * abs(fmt) // 8)
+            if spec.get("variants"):
+                # Pitch/volume variants are rendered once here (see audio.py)
+                from audio import make_variants
+                variants = make_variants(sound, spec["variants"])
+                return variants, size * len(variants)
+            return sound, size
+        if kind == "fonts":
+            font = pygame.font.Font(path, spec.get("size", 22))
+            font.set_bold(spec.get("bold", False))
+            return font, os.path.getsize(path)
+        # Images are decoded here; conversion to display format needs the
+        # main thread and happens on first get()
+        image = pygame.image.load(path)
+        return image, image.get_width() * image.get_height() * image.get_bytesize()
+
+    def _store(self, name, asset, size):
+        self.cache[name] = (asset, size)
+        self.converted.discard(name)
+        self.memory += size
+        # Evict least recently used assets over the cap; they reload on demand
+        while self.memory > self.memory_cap and len(self.cache) > 1:
+            old, (_, old_size) = self.cache.popitem(last=False)
+            self.converted.discard(old)
+            self.memory -= old_size
+
+    # ---- access ----
+    def ready(self, name):
+        return name in self.cache
+
+    def pending(self):
+        with self._cond:
+            return sum(1 for n in self.entries if n not in self.cache and n not in self.failed)
+
+    def get(self, name):
+        with self._cond:
+            item = self.cache.get(name)
+            if item is not None:
+                self.cache.move_to_end(name)
+            elif name in self.entries and name not in self.failed and name not in self._wanted:
+                # Evicted or not reached yet: fetch it next
+                self._wanted.add(name)
+                self._push(name, 0)
+                self._cond.notify()
+        if item is None:
+            return self.placeholder(name)
+        asset, size = item
+        kind, spec = self.entries[name]
+        if kind == "images" and name not in self.converted and pygame.display.get_surface():
+            asset = asset.convert_alpha() if spec.get("alpha", True) else asset.convert()
+            with self._cond:
+                if name in self.cache:
+                    self.cache[name] = (asset, size)
+                    self.converted.add(name)
+        return asset
+
+    def placeholder(self, name):
+        kind = self.entries[name][0] if name in self.entries else "sounds"
+        if kind == "sounds":
+            return SILENT
+        ph = self._placeholders.get(name)
+        if ph is None:
+            spec = self.entries[name][1]
+            if kind == "fonts":
+                ph = pygame.font.Font(None, spec.get("size", 22))
+            else:
+                ph = pygame.Surface(spec.get("size", (1, 1)), pygame.SRCALPHA)
+            self._placeholders[name] = ph
+        return ph
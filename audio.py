@@ -0,0 +1,95 @@
+from array import array
+
+import pygame
+
+# -------------- Voice manager --------------
+# Every sound belongs to a category with a fixed set of reserved mixer
+# channels, so rapid exchanges can never take every channel. When a
+# category is full the lowest-priority, oldest voice is stolen; if all of
+# them outrank the new sound it is dropped. A sound triggered twice in the
+# same frame (e.g. once per fighter on a trade) only plays once.
+#
+# Manifest fields used here (see assets.py):
+#   "category": "combat" | "ko" | "ui"    (default "combat")
+#   "priority": int, higher wins           (default 1)
+#   "variants": [[pitch, volume], ...]     decoded once, played round-robin
+
+CATEGORIES = {"combat": 4, "ko": 1, "ui": 2}
+
+def make_variants(sound, variants):
+    return tuple(pitch_shift(sound, pitch, volume) for pitch, volume in variants)
+
+def pitch_shift(sound, ratio, volume=1.0):
+    # Nearest-sample resampling of the raw mixer buffer; done once at load
+    _, fmt, channels = pygame.mixer.get_init()
+    raw = sound.get_raw()
+    if fmt != -16 or ratio == 1.0:
+        out = pygame.mixer.Sound(buffer=raw)
+    else:
+        src = array("h")
+        src.frombytes(raw)
+        n = len(src) // channels
+        frames = int(n / ratio)
+        dst = array("h", bytes(2 * channels * frames))
+        for i in range(frames):
+            j = int(i * ratio) * channels
+            k = i * channels
+            dst[k:k + channels] = src[j:j + channels]
+        out = pygame.mixer.Sound(buffer=dst.tobytes())
+    out.set_volume(sound.get_volume() * volume)
+    return out
+
+class VoiceManager:
+    def __init__(self, assets, categories=CATEGORIES):
+        self.assets = assets
+        self.categories = categories
+        self.channels = None      # category -> [Channel], created once the mixer is up
+        self.voices = {}          # Channel -> (priority, start frame)
+        self.frame = 0
+        self._triggered = set()
+        self._next_variant = {}
+
+    def _setup(self):
+        total = sum(self.categories.values())
+        pygame.mixer.set_num_channels(max(total, pygame.mixer.get_num_channels()))
+        # Reserve them so nothing else can grab a category's channels
+        pygame.mixer.set_reserved(total)
+        self.channels = {}
+        i = 0
+        for cat, count in self.categories.items():
+            self.channels[cat] = [pygame.mixer.Channel(i + n) for n in range(count)]
+            i += count
+
+    def begin_frame(self):
+        self.frame += 1
+        self._triggered.clear()
+
+    def play(self, name):
+        if name in self._triggered or not pygame.mixer.get_init():
+            return
+        self._triggered.add(name)
+        sound = self.assets.get(name)
+        if isinstance(sound, tuple):
+            i = self._next_variant.get(name, 0)
+            self._next_variant[name] = (i + 1) % len(sound)
+            sound = sound[i]
+        elif not isinstance(sound, pygame.mixer.Sound):
+            return   # still loading or missing
+        if self.channels is None:
+            self._setup()
+
+        spec = self.assets.entries.get(name, (None, {}))[1]
+        priority = spec.get("priority", 1)
+        channels = self.channels.get(spec.get("category", "combat"))
+        if not channels:
+            return
+
+        channel = next((c for c in channels if not c.get_busy()), None)
+        if channel is None:
+            # Steal the weakest, oldest voice unless they all outrank us
+            channel = min(channels, key=lambda c: self.voices.get(c, (0, 0)))
+            if self.voices.get(channel, (0, 0))[0] > priority:
+                return
+            channel.stop()
+        channel.play(sound)
+        self.voices[channel] = (priority, self.frame)
@@ -0,0 +1,191 @@
+import json
+import os
+import random
+import struct
+from bisect import bisect
+
+from main import (BTN_BLOCK, BTN_DASH, BTN_DOWN, BTN_HEAVY, BTN_LEFT, BTN_LIGHT, BTN_RIGHT, BTN_UP, DASH_COST,
+                  MOVE_HITBOX, MOVE_PHASES, State)
+
+# -------------- Scripted bots --------------
+# A bot turns the match state into one button mask per frame for its
+# fighter. Bots only re-decide every `reaction` frames and hold the last
+# mask in between, which is what separates versions of the same style.
+# BOTS maps a versioned name to a factory taking a seed.
+
+REACH = 64 + MOVE_HITBOX["light"][0]   # centre distance at which light connects
+
+class Bot:
+    def __init__(self, seed=0, reaction=6, noise=0.05):
+        self.rng = random.Random(seed)
+        self.reaction = reaction
+        self.noise = noise
+        self.tick = 0
+        self.mask = 0
+
+    def act(self, me, opp):
+        if self.tick % self.reaction == 0:
+            self.mask = self.rng.randrange(256) & 0x7F if self.rng.random() < self.noise else self.decide(me, opp)
+        self.tick += 1
+        return self.mask
+
+    def decide(self, me, opp):
+        return 0
+
+def toward(me, opp):
+    return BTN_RIGHT if opp.rect.centerx > me.rect.centerx else BTN_LEFT
+
+def away(me, opp):
+    return BTN_LEFT if opp.rect.centerx > me.rect.centerx else BTN_RIGHT
+
+class RandomBot(Bot):
+    def decide(self, me, opp):
+        return self.rng.randrange(256) & 0x7F
+
+class Rushdown(Bot):
+    # Closes distance (dashing when far) and mashes attacks in range
+    def __init__(self, seed=0, reaction=6, noise=0.05, heavy=0.3):
+        super().__init__(seed, reaction, noise)
+        self.heavy = heavy
+
+    def decide(self, me, opp):
+        dist = abs(opp.rect.centerx - me.rect.centerx)
+        if dist > 3 * REACH and me.stamina >= DASH_COST:
+            return toward(me, opp) | BTN_DASH
+        if dist > REACH:
+            return toward(me, opp)
+        if opp.rect.bottom < me.rect.top + 20:
+            return BTN_UP | BTN_LIGHT
+        return BTN_HEAVY if self.rng.random() < self.heavy else BTN_LIGHT
+
+class Turtle(Bot):
+    # Blocks anything close, answers with a crouching light, walks in slowly
+    def decide(self, me, opp):
+        dist = abs(opp.rect.centerx - me.rect.centerx)
+        if opp.state == State.ATTACK and dist < 2 * REACH:
+            return BTN_BLOCK
+        if dist <= REACH:
+            return BTN_DOWN | BTN_LIGHT
+        if dist > 4 * REACH:
+            return toward(me, opp)
+        return 0
+
+class Jumper(Bot):
+    # Jumps in from mid range with air lights; backs off when too close
+    def decide(self, me, opp):
+        dist = abs(opp.rect.centerx - me.rect.centerx)
+        if not me.on_ground:
+            return toward(me, opp) | (BTN_LIGHT if dist < 1.5 * REACH else 0)
+        if dist < REACH:
+            return BTN_LIGHT if self.rng.random() < 0.5 else away(me, opp)
+        if dist < 3 * REACH:
+            return BTN_UP | toward(me, opp)
+        return toward(me, opp)
+
+# -------------- Lookup-table policy --------------
+# TableBot plays from a table built offline by policy.py. The match state
+# is reduced to one cell: centre distance bucket, both fighters' states,
+# the opponent's attack phase (none, startup, active, recovery), both
+# health buckets and whether a dash is affordable. The table holds one
+# byte per cell, the index of the action to take there, so a decision is
+# an index computation and one bytes lookup (no numpy needed to play).
+# Actions are relative to the opponent: direction 1 is toward, -1 away.
+#
+# File: MAGIC, version, JSON header (layout, for checking), table bytes.
+POLICY_PATH = os.path.join("assets", "cpu_policy.bin")
+POLICY_MAGIC = b"FGPL"
+POLICY_VERSION = 1
+DIST_EDGES = (48, 80, 112, 160, 224, 320, 448)
+HEALTH_EDGES = (34, 67)      # percent of max health
+PHASES = 4
+ACTIONS = (
+    ("idle", 0, 0),
+    ("toward", 1, 0),
+    ("away", -1, 0),
+    ("jump", 0, BTN_UP),
+    ("jump_toward", 1, BTN_UP),
+    ("crouch", 0, BTN_DOWN),
+    ("block", 0, BTN_BLOCK),
+    ("light", 0, BTN_LIGHT),
+    ("heavy", 0, BTN_HEAVY),
+    ("crouch_light", 0, BTN_DOWN | BTN_LIGHT),
+    ("dash_toward", 1, BTN_DASH),
+    ("dash_away", -1, BTN_DASH),
+)
+DIMS = (len(DIST_EDGES) + 1, len(State), len(State), PHASES, len(HEALTH_EDGES) + 1, len(HEALTH_EDGES) + 1, 2)
+CELLS = 1
+for _n in DIMS:
+    CELLS *= _n
+
+def policy_cell(me, opp):
+    phase = 0
+    if opp.state == State.ATTACK and opp.attack_name:
+        phases = MOVE_PHASES[opp.attack_name]
+        phase = 1 + phases[min(opp.frame_counter, len(phases) - 1)]
+    cell = bisect(DIST_EDGES, abs(opp.rect.centerx - me.rect.centerx))
+    cell = cell * DIMS[1] + me.state
+    cell = cell * DIMS[2] + opp.state
+    cell = cell * PHASES + phase
+    cell = cell * DIMS[4] + bisect(HEALTH_EDGES, 100 * me.health // me.max_health)
+    cell = cell * DIMS[5] + bisect(HEALTH_EDGES, 100 * opp.health // opp.max_health)
+    return cell * 2 + (me.stamina >= DASH_COST)
+
+def action_mask(action, me, opp):
+    _, direction, buttons = ACTIONS[action]
+    if direction > 0:
+        buttons |= toward(me, opp)
+    elif direction < 0:
+        buttons |= away(me, opp)
+    return buttons
+
+def policy_header():
+    return {"dims": list(DIMS), "actions": [a[0] for a in ACTIONS], "dist_edges": list(DIST_EDGES),
+            "health_edges": list(HEALTH_EDGES), "states": [s.name for s in State]}
+
+_policies = {}
+
+def load_policy(path=POLICY_PATH):
+    # The table as bytes, read once per path
+    table = _policies.get(path)
+    if table is None:
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:4] != POLICY_MAGIC:
+            raise ValueError(f"{path}: not a policy table")
+        version, hlen = struct.unpack_from("<HI", data, 4)
+        header = json.loads(data[10:10 + hlen])
+        expected = policy_header()
+        if version != POLICY_VERSION or any(header.get(k) != v for k, v in expected.items()):
+            raise ValueError(f"{path}: built for another state layout; rebuild it with policy.py")
+        table = data[10 + hlen:]
+        if len(table) != CELLS:
+            raise ValueError(f"{path}: truncated policy table")
+        _policies[path] = table
+    return table
+
+class TableBot(Bot):
+    # Difficulty comes from reaction (frames between decisions) and noise
+    def __init__(self, seed=0, reaction=4, noise=0.02, path=POLICY_PATH):
+        super().__init__(seed, reaction, noise)
+        self.table = load_policy(path)
+
+    def decide(self, me, opp):
+        return action_mask(self.table[policy_cell(me, opp)], me, opp)
+
+BOTS = {
+    "idle": lambda seed: Bot(seed, noise=0),
+    "random-v1": lambda seed: RandomBot(seed, reaction=10),
+    "rush-v1": lambda seed: Rushdown(seed, reaction=12),
+    "rush-v2": lambda seed: Rushdown(seed, reaction=6),
+    "rush-v3": lambda seed: Rushdown(seed, reaction=3, heavy=0.15),
+    "turtle-v1": lambda seed: Turtle(seed, reaction=10),
+    "turtle-v2": lambda seed: Turtle(seed, reaction=4),
+    "jumper-v1": lambda seed: Jumper(seed, reaction=8),
+}
+# Once policy.py has built the table
+if os.path.exists(POLICY_PATH):
+    BOTS["table-v1"] = lambda seed: TableBot(seed)
+    BOTS["table-v1-easy"] = lambda seed: TableBot(seed, reaction=10, noise=0.3)
+
+def make_bot(name, seed=0):
+    return BOTS[name](seed)
@@ -0,0 +1,120 @@
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import main
+from bots import make_bot
+from main import (FPS, ROUND_TIME_SECONDS, WHITE, Match, State, body_surface, draw_match, draw_timer_and_score,
+                  render_text)
+from render import PygameBackend
+from sprites import load_fighter_sprites
+
+# -------------- Per-frame allocation guard --------------
+# Runs PLAYING frames headless, the way main() does (step_masks, then
+# draw_match into a command list that the pygame backend draws onto the
+# canvas, fighters with sprites when there is an atlas and cached bodies
+# otherwise) with recorded bot inputs, and watches them with tracemalloc
+# after a warm-up that fills the caches. Fails if memory is still held
+# after the measured frames (net allocations) unless --report-only; also
+# reports the transient peak per frame (memory allocated and freed within
+# it) and how many garbage collections the frames triggered.
+
+WARMUP_FRAMES = 300
+FRAMES = 1000
+NET_LIMIT = 256      # bytes; fighters hold a few float values that vary between snapshots
+
+def bot_inputs(frames, seed):
+    # Masks from two bots, recorded up front so the bots' own work isn't measured
+    match = Match()
+    match.start()
+    bots = (make_bot("rush-v2", seed), make_bot("turtle-v2", seed + 1))
+    p1, p2 = match.p1, match.p2
+    masks = []
+    for _ in range(frames):
+        m1, m2 = bots[0].act(p1, p2), bots[1].act(p2, p1)
+        masks.append((m1, m2))
+        next_frame(match, m1, m2)
+    return masks
+
+def next_frame(match, m1, m2):
+    rw = match.step_masks(m1, m2)
+    if rw != 0:
+        if match.match_over():
+            match.start()
+        else:
+            match.next_round()
+
+def measure(frames=FRAMES, warmup=WARMUP_FRAMES, seed=0):
+    main.init_display()
+    masks = bot_inputs(warmup + 10 + frames, seed)
+    match = Match()
+    for f in (match.p1, match.p2):
+        f.sprites = load_fighter_sprites()
+    match.start()
+    peaks = [0] * frames
+    canvas = main.canvas
+    renderer = PygameBackend()
+
+    def run(first, last, traced=False):
+        for i in range(first, last):
+            m1, m2 = masks[i]
+            next_frame(match, m1, m2)
+            draw_match(renderer.begin(), match)
+            renderer.run(canvas)
+            if traced:
+                current, peak = tracemalloc.get_traced_memory()
+                peaks[i - first] = peak - current
+                tracemalloc.reset_peak()
+
+    run(0, warmup)
+    # Steady state means every cached text and body was drawn once: all
+    # timer values, state labels and bodies, not only those the warm-up
+    # happened to reach
+    for secs in range(ROUND_TIME_SECONDS + 1):
+        draw_timer_and_score(canvas, secs * FPS, match.p1, match.p2, main.ROUNDS_TO_WIN)
+    for state in State:
+        render_text(state.name, main.font_small, WHITE)
+    for f in (match.p1, match.p2):
+        saved = f.state, f.facing
+        for state in State:
+            for facing in (1, -1):
+                f.state, f.facing = state, facing
+                body_surface(f, True)
+        f.state, f.facing = saved
+    gc.collect()
+    tracemalloc.start()
+    # A few traced frames first, so free lists hold traced blocks in both snapshots
+    run(warmup, warmup + 10)
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    collections = sum(s["collections"] for s in gc.get_stats())
+    run(warmup + 10, warmup + 10 + frames, traced=True)
+    collections = sum(s["collections"] for s in gc.get_stats()) - collections
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+    return {
+        "net_bytes": sum(d.size_diff for d in diff),
+        "grown": [d for d in diff if d.size_diff > 0],
+        "peak_mean": sum(peaks) / frames,
+        "peak_max": max(peaks),
+        "collections": collections,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that PLAYING frames don't keep allocating")
+    parser.add_argument("--frames", type=int, default=FRAMES)
+    parser.add_argument("--report-only", action="store_true", help="exit zero even with net allocations")
+    args = parser.parse_args()
+    r = measure(args.frames)
+    print(f"{args.frames} frames: net {r['net_bytes']} bytes, transient peak per frame "
+          f"mean {r['peak_mean']:.0f} max {r['peak_max']} bytes, {r['collections']} gc collections")
+    for d in r["grown"][:10]:
+        print(" -", d)
+    sys.exit(1 if not args.report_only and r["net_bytes"] > NET_LIMIT else 0)
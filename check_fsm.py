@@ -0,0 +1,86 @@
+import argparse
+import sys
+
+from main import (BUTTONS, CTX_CAN_DASH, CTX_GROUND, FALLS_IN_AIR, INPUT_TABLE, LAND_STATE,
+                  NUM_CTX, State, fsm_index)
+
+# -------------- Fighter state machine lint --------------
+# Walks INPUT_TABLE plus the transitions made outside input (physics,
+# update_attack, take_hit, guard lock) from (IDLE, on ground) and reports
+# table rows that can never be used and entries whose effects disagree.
+
+def mask_name(mask):
+    return "+".join(b for i, b in enumerate(BUTTONS) if mask >> i & 1) or "none"
+
+def other_transitions(state, ground):
+    # Transitions that don't come from the input table
+    yield State.HITSTUN, ground        # take_hit
+    yield State.KODOWN, ground
+    if ground:
+        yield State.BLOCK, ground      # guard lock
+    if state in (State.HITSTUN, State.ATTACK, State.DASH):
+        yield (State.IDLE, True) if ground else (State.FALL, False)
+    if not ground:
+        yield LAND_STATE[state], True
+        if FALLS_IN_AIR[state]:
+            yield State.FALL, False
+
+def reachable():
+    seen = {(State.IDLE, True)}
+    todo = [(State.IDLE, True)]
+    while todo:
+        state, ground = todo.pop()
+        nxt = list(other_transitions(state, ground))
+        base = CTX_GROUND if ground else 0
+        for ctx in (base, base | CTX_CAN_DASH):
+            for mask in range(1 << len(BUTTONS)):
+                t = INPUT_TABLE[fsm_index(state, ctx, mask)]
+                if t is not None:
+                    nxt.append((t[0], ground and not t[4]))
+        for node in nxt:
+            if node not in seen:
+                seen.add(node)
+                todo.append(node)
+    return seen
+
+CONFLICTS = (
+    ("blocking outside BLOCK", lambda t: t[1] and t[0] != State.BLOCK),
+    ("dash spent but not dashing", lambda t: t[5] and t[0] != State.DASH and not t[6]),
+    ("dash cancelled into an attack", lambda t: t[5] and t[6]),
+    ("jump and attack on the same frame", lambda t: t[4] and t[6]),
+)
+
+def lint():
+    nodes = reachable()
+    issues = []
+    for state in State:
+        if not any(s == state for s, _ in nodes):
+            issues.append(f"unreachable state: {state.name}")
+    for state in State:
+        for ground in (True, False):
+            if (state, ground) not in nodes:
+                issues.append(f"unreachable rows: {state.name} {'grounded' if ground else 'airborne'}")
+
+    for label, test in CONFLICTS:
+        hits = []
+        for state, ground in sorted(nodes):
+            base = CTX_GROUND if ground else 0
+            for ctx in (base, base | CTX_CAN_DASH):
+                for mask in range(1 << len(BUTTONS)):
+                    t = INPUT_TABLE[fsm_index(state, ctx, mask)]
+                    if t is not None and test(t):
+                        hits.append((state, ctx, mask))
+        if hits:
+            state, ctx, mask = hits[0]
+            issues.append(f"{label}: {len(hits)} entries, e.g. {state.name} ctx={ctx} [{mask_name(mask)}]")
+    return issues
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the Fighter transition table")
+    parser.add_argument("--strict", action="store_true", help="exit non-zero if anything is reported")
+    args = parser.parse_args()
+    issues = lint()
+    print(f"{len(INPUT_TABLE)} entries, {len(State)} states x {NUM_CTX} contexts x {1 << len(BUTTONS)} masks")
+    for issue in issues:
+        print(" -", issue)
+    sys.exit(1 if args.strict and issues else 0)
@@ -0,0 +1,50 @@
+import argparse
+import sys
+
+from bots import BOTS
+from ladder import Ladder, play_match
+
+# -------------- Ladder side check --------------
+# Schedules a few rating periods over every bot (results are all draws,
+# nothing is played) and checks that each pair alternates sides from one
+# of its games to the next. Then plays rush-v2 against idle from both
+# sides and checks the score is reported for the right bot either way.
+
+PERIODS = 8
+PERIOD = 64
+
+def side_issues(periods=PERIODS, period=PERIOD, seed=0):
+    ladder = Ladder(list(BOTS), seed)
+    sides = {}
+    for _ in range(periods):
+        games = ladder.pairings(period)
+        for a, b, _, swap in games:
+            # Which bot, by name order, plays Player 1
+            first = b if swap else a
+            sides.setdefault(tuple(sorted((a, b))), []).append(first)
+        ladder.update([(a, b, s, 0.5, 0) for a, b, s, _ in games])
+    issues = []
+    for pair, firsts in sorted(sides.items()):
+        if any(x == y for x, y in zip(firsts, firsts[1:])):
+            issues.append(f"{pair[0]} vs {pair[1]}: Player 1 in order {', '.join(firsts)}")
+    return issues, len(sides)
+
+def score_issues():
+    issues = []
+    for swap in (False, True):
+        score, _ = play_match("rush-v2", "idle", 0, swap)
+        if score != 1:
+            issues.append(f"rush-v2 vs idle with swap={swap}: score {score}, expected 1")
+    return issues
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that ladder pairs alternate sides")
+    parser.add_argument("--periods", type=int, default=PERIODS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    issues, pairs = side_issues(args.periods, seed=args.seed)
+    issues += score_issues()
+    print(f"{args.periods} periods of {PERIOD} games over {pairs} pairs")
+    for issue in issues:
+        print(" -", issue)
+    sys.exit(1 if issues else 0)
@@ -0,0 +1,90 @@
+import argparse
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+import main
+from bots import make_bot
+from main import CMD_WORDS, Match, draw_debug_overlay, draw_how_to_play, draw_match, draw_pause, draw_title
+from render import PygameBackend
+
+# -------------- Partial redraw check --------------
+# Plays bot matches headless (a few pairings, for a mix of hits, blocks
+# and jumps) and builds every frame's command list once, with the overlays
+# main() adds now and then (pause, title, how to play, F3 debug), then runs
+# the same list through the diff backend and a full redraw onto two
+# canvases. Fails if they differ on any frame, at each render scale.
+
+FRAMES = 3000
+SCALES = (1.0, 0.5)
+PAIRS = (("rush-v2", "jumper-v1"), ("turtle-v2", "rush-v3"), ("random-v1", "turtle-v1"))
+
+def copy_commands(src, dst):
+    ops = src.ops
+    for i in range(src.count):
+        o = i * CMD_WORDS
+        dst.add(ops[o], src.refs[i], *ops[o + 1:o + CMD_WORDS])
+
+def draw_frame(cmds, match, frame, renderer):
+    # Mostly PLAYING frames, with short runs of every other screen
+    phase = frame % 400
+    if phase >= 390:
+        draw_title(cmds, frame // 400 % len(main.MENU_OPTIONS))
+    elif phase >= 380:
+        draw_how_to_play(cmds)
+    else:
+        draw_match(cmds, match, debug=phase >= 300)
+        if 200 <= phase < 220:
+            draw_pause(cmds)
+    if phase >= 250:
+        draw_debug_overlay(cmds, 60, 16.7, renderer)
+
+def compare(pair, frames=FRAMES, scale=1.0, seed=1):
+    # Returns the frames whose pixels differ and the share of commands drawn
+    main.set_render_scale(scale)
+    size = main.canvas.get_size()
+    partial, full = pygame.Surface(size).convert(), pygame.Surface(size).convert()
+    diff, redraw = PygameBackend(), PygameBackend(diff=False)
+    match = Match()
+    match.start()
+    bots = (make_bot(pair[0], seed), make_bot(pair[1], seed + 1))
+    p1, p2 = match.p1, match.p2
+    bad = []
+    drawn = emitted = 0
+    for frame in range(frames):
+        rw = match.step_masks(bots[0].act(p1, p2), bots[1].act(p2, p1))
+        if rw != 0:
+            if match.match_over():
+                match.start()
+            else:
+                match.next_round()
+        cmds = diff.begin()
+        draw_frame(cmds, match, frame, diff)
+        copy_commands(cmds, redraw.begin())
+        diff.run(partial)
+        redraw.run(full)
+        drawn += diff.drawn
+        emitted += diff.emitted
+        if pygame.image.tobytes(partial, "RGB") != pygame.image.tobytes(full, "RGB"):
+            bad.append(frame)
+    return bad, drawn / max(emitted, 1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that partial redraws match full redraws")
+    parser.add_argument("--frames", type=int, default=FRAMES)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    main.init_display()
+    failed = False
+    for scale in SCALES:
+        for pair in PAIRS:
+            bad, share = compare(pair, args.frames, scale, args.seed)
+            print(f"scale {scale} {pair[0]} vs {pair[1]}: {args.frames} frames, {len(bad)} differ, "
+                  f"{share:.0%} of commands drawn")
+            if bad:
+                print(" - first frames:", ", ".join(map(str, bad[:10])))
+                failed = True
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,166 @@
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource         # peak RSS report; not on Windows
+except ImportError:
+    resource = None
+
+import numpy as np
+
+from main import MOVES
+from replay import Replay, Simulator
+
+# -------------- Training data export --------------
+# Turns recorded matches into (state, action) rows for training: every
+# replay frame becomes one fixed-width float32 row of COLUMNS, the match
+# state before the frame followed by both players' input masks for it.
+#
+# Replays are re-simulated through a chain of generators (frames -> rows)
+# into a ChunkWriter that fills one preallocated buffer of chunk_rows rows
+# and writes it out as a .npy file when full, so memory stays the same
+# however many matches go through. Files are split into shards, one per
+# task on a process pool; shard k writes part{k}-{c}.npy. index.json lists
+# the chunks in order and, for every replay, where its rows start.
+# Read back with open_dataset(), which memory-maps the chunks.
+
+FIGHTER_COLUMNS = ("x", "y", "vel_y", "facing", "on_ground", "state", "move", "frame_counter", "hitstop",
+                   "hitstun", "guard_stun", "blocking", "health", "stamina", "dash_timer", "round_won")
+COLUMNS = (("frame", "round", "round_timer")
+           + tuple("p1_" + c for c in FIGHTER_COLUMNS) + tuple("p2_" + c for c in FIGHTER_COLUMNS)
+           + ("p1_mask", "p2_mask"))
+DTYPE = np.float32          # every value is an integer below 2**24 or the stamina float
+CHUNK_ROWS = 1 << 16
+SHARDS_PER_WORKER = 4       # smaller tasks keep the pool busy when replay lengths differ
+INDEX_NAME = "index.json"
+MOVE_IDS = {name: i for i, name in enumerate(MOVES)}
+
+# -------------- Pipeline --------------
+def frames(path):
+    # Yields (frame, round, match, m1, m2): the match as it is before frame
+    # is simulated with masks m1, m2. The same Match object is reused.
+    replay = Replay.load(path)
+    sim = Simulator()
+    resets = set(replay.resets)
+    rnd = 0
+    for i in range(len(replay)):
+        if i in resets or sim.round_ended:
+            sim.reset_round()
+            rnd += 1
+        m1, m2 = replay.masks(i)
+        yield i, rnd, sim.match, m1, m2
+        sim.step(m1, m2)
+        if sim.over:
+            return
+
+def fighter_row(f):
+    return (f.rect.x, f.rect.y, f.vel_y, f.facing, f.on_ground, f.state, MOVE_IDS.get(f.attack_name, -1),
+            f.frame_counter, f.hitstop, f.hitstun, f.guard_stun, f.blocking, f.health, f.stamina, f.dash_timer,
+            f.round_won)
+
+def rows(path):
+    for i, rnd, match, m1, m2 in frames(path):
+        yield (i, rnd, match.round_timer) + fighter_row(match.p1) + fighter_row(match.p2) + (m1, m2)
+
+class ChunkWriter:
+    def __init__(self, out_dir, prefix, chunk_rows=CHUNK_ROWS):
+        self.out_dir = out_dir
+        self.prefix = prefix
+        self.buffer = np.empty((chunk_rows, len(COLUMNS)), DTYPE)
+        self.count = 0
+        self.chunks = []        # (file name, rows)
+
+    @property
+    def position(self):
+        # (chunk number, row in it) the next row goes to
+        return len(self.chunks), self.count
+
+    def write(self, row):
+        self.buffer[self.count] = row
+        self.count += 1
+        if self.count == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        if self.count == 0:
+            return
+        name = f"{self.prefix}-{len(self.chunks):04d}.npy"
+        out = np.lib.format.open_memmap(os.path.join(self.out_dir, name), "w+", DTYPE, (self.count, len(COLUMNS)))
+        out[:] = self.buffer[:self.count]
+        out.flush()
+        del out
+        self.chunks.append((name, self.count))
+        self.count = 0
+
+def export_shard(shard, paths, out_dir, chunk_rows=CHUNK_ROWS):
+    # Runs in a worker; returns the shard's chunks and each replay's
+    # (path, chunk, row, rows) relative to them
+    writer = ChunkWriter(out_dir, f"part{shard:03d}", chunk_rows)
+    replays = []
+    for path in paths:
+        chunk, row = writer.position
+        n = 0
+        for r in rows(path):
+            writer.write(r)
+            n += 1
+        replays.append((path, chunk, row, n))
+    writer.flush()
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+    return writer.chunks, replays, peak_kb
+
+# -------------- Export --------------
+def export(paths, out_dir, workers=None, chunk_rows=CHUNK_ROWS):
+    os.makedirs(out_dir, exist_ok=True)
+    for old in glob.glob(os.path.join(out_dir, "part*.npy")):
+        os.remove(old)
+    workers = workers or os.cpu_count()
+    n_shards = max(1, min(len(paths), workers * SHARDS_PER_WORKER))
+    shards = [paths[k::n_shards] for k in range(n_shards)]
+    chunks, replays, peaks = [], [], []
+    with ProcessPoolExecutor(workers) as pool:
+        jobs = [pool.submit(export_shard, k, s, out_dir, chunk_rows) for k, s in enumerate(shards)]
+        for job in jobs:
+            shard_chunks, shard_replays, peak_kb = job.result()
+            # All of a shard's chunks but the last are full
+            base, first = sum(c["rows"] for c in chunks), len(chunks)
+            chunks += [{"file": name, "rows": n} for name, n in shard_chunks]
+            for path, chunk, row, n in shard_replays:
+                replays.append({"path": path, "chunk": first + chunk, "row": row,
+                                "start": base + chunk * chunk_rows + row, "rows": n})
+            if peak_kb is not None:
+                peaks.append(peak_kb)
+    index = {"columns": list(COLUMNS), "dtype": np.dtype(DTYPE).str, "moves": list(MOVES),
+             "rows": sum(c["rows"] for c in chunks), "chunks": chunks, "replays": replays}
+    tmp = os.path.join(out_dir, INDEX_NAME + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp, os.path.join(out_dir, INDEX_NAME))
+    return index, max(peaks, default=None)
+
+def open_dataset(out_dir):
+    # Returns the index and the chunks as read-only memory maps, in order
+    with open(os.path.join(out_dir, INDEX_NAME)) as f:
+        index = json.load(f)
+    return index, [np.load(os.path.join(out_dir, c["file"]), mmap_mode="r") for c in index["chunks"]]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export replays as per-frame (state, action) training arrays")
+    parser.add_argument("paths", nargs="+", help="replay files or directories of .rep files")
+    parser.add_argument("--out", default="dataset")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    paths = []
+    for p in args.paths:
+        paths += sorted(glob.glob(os.path.join(p, "*.rep"))) if os.path.isdir(p) else [p]
+    t0 = time.perf_counter()
+    index, peak_kb = export(paths, args.out, args.workers, args.chunk_rows)
+    secs = time.perf_counter() - t0
+    rss = f", worker peak RSS {peak_kb // 1024} MB" if peak_kb is not None else ""
+    print(f"{len(paths)} replays -> {index['rows']} rows x {len(COLUMNS)} columns in {len(index['chunks'])} chunks, "
+          f"{secs:.1f}s ({index['rows'] / max(secs, 1e-9):.0f} rows/s){rss}")
@@ -0,0 +1,234 @@
+import argparse
+import hashlib
+import json
+import os
+
+import main
+from main import (BTN_BLOCK, BUTTONS, CTX_GROUND, GROUND_Y, INPUT_TABLE, MOVE_HITBOX, MOVES, STAGE_WIDTH, Match,
+                  State, fsm_index)
+from training import AdvantageTracker, actionable
+
+# -------------- Frame data and punish tables --------------
+# For every move and outcome (hit, block, whiff, air hit) the headless match
+# is run from a fixed setup: P1 attacks P2 at point blank, on the ground (or
+# as a low jump-in for air moves). We record the stun the defender got, how
+# long each side needs to act again after contact, and the attacker's frame
+# advantage, then try every move as a punish: P2 presses it on its first
+# actionable frame while P1 holds block as soon as it can. For whiffs P2
+# stands out of reach and is moved into range when the attacker's active
+# frames end, so the punish column assumes the spacing was right. The
+# advantage is measured after the swing's last contact.
+#
+# Results are cached by a hash of the move data they depend on (plus the
+# global combat constants), so editing one move only reruns its row and
+# its punish column.
+
+OUTCOMES = ("hit", "block", "whiff", "air")
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "fight_game", "frame_data.json")
+CACHE_VERSION = 1
+# Constants every result depends on
+SIM_CONSTANTS = ("GRAVITY", "MOVE_SPEED", "AIR_SPEED", "DASH_SPEED", "DASH_COST", "DASH_DURATION", "JUMP_VEL",
+                 "BLOCK_REDUCTION", "CHIP_REDUCTION", "BLOCKSTUN", "HITSTUN_LIGHT", "HITSTUN_HEAVY",
+                 "AIR_JUGGLE_STUN", "HITSTOP_MAX", "GROUND_Y", "STAGE_WIDTH", "MAX_SEPARATION")
+STUN_NAMES = ("BLOCKSTUN", "HITSTUN_LIGHT", "HITSTUN_HEAVY", "AIR_JUGGLE_STUN")
+
+ATTACKER_X = STAGE_WIDTH // 2 - 100
+WHIFF_GAP = 200           # out of reach of every move
+JUMP_IN_HEIGHT = 40       # air moves start this far off the ground, falling
+AIR_TARGET_HEIGHT = 20    # air-hit defenders are this far off the ground at contact
+MAX_FRAMES = 180
+
+def move_inputs():
+    # name -> (grounded, mask): the simplest button mask that starts each
+    # move, read back out of the transition table
+    found = {}
+    for grounded, state in ((True, State.IDLE), (False, State.FALL)):
+        ctx = CTX_GROUND if grounded else 0
+        for mask in sorted(range(1 << len(BUTTONS)), key=lambda m: (bin(m).count("1"), m)):
+            t = INPUT_TABLE[fsm_index(state, ctx, mask)]
+            if t and t[6] and t[6] not in found and not t[4]:
+                found[t[6]] = (grounded, mask)
+    return found
+
+MOVE_INPUTS = move_inputs()
+
+def digest(*parts):
+    return hashlib.sha1(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+def base_key(name, outcome):
+    constants = {k: getattr(main, k) for k in SIM_CONSTANTS}
+    return digest(CACHE_VERSION, constants, name, MOVES[name], MOVE_HITBOX[name], MOVE_INPUTS[name], outcome)
+
+def punish_key(base, punisher):
+    return digest(base, punisher, MOVES[punisher], MOVE_HITBOX[punisher], MOVE_INPUTS[punisher])
+
+# -------------- Scenarios --------------
+def setup(name, outcome):
+    match = Match()
+    match.start()
+    atk, dfn = match.p1, match.p2
+    grounded, _ = MOVE_INPUTS[name]
+    atk.rect.x = ATTACKER_X
+    dfn.rect.left = atk.rect.right + (WHIFF_GAP if outcome == "whiff" else 0)
+    if not grounded:
+        atk.on_ground = False
+        atk.state = State.FALL
+        atk.rect.bottom = GROUND_Y - JUMP_IN_HEIGHT
+    return match
+
+def run_exchange(name, outcome):
+    # Returns (result dict, snapshot to punish from)
+    match = setup(name, outcome)
+    atk, dfn = match.p1, match.p2
+    _, mask = MOVE_INPUTS[name]
+    hold = BTN_BLOCK if outcome == "block" else 0
+    tracker = AdvantageTracker()
+    startup = MOVES[name]["startup"]
+    result = {"move": name, "outcome": outcome, "startup": startup, "contact": None}
+
+    for i in range(MAX_FRAMES):
+        if outcome == "air" and i == startup:
+            # Put the defender in the air just before the first active frame
+            dfn.on_ground = False
+            dfn.state = State.JUMP
+            dfn.vel_y = 0.0
+            dfn.rect.bottom = GROUND_Y - AIR_TARGET_HEIGHT
+        prev_hitstop = (atk.hitstop, dfn.hitstop)
+        match.step_masks(mask if i == 0 else 0, hold)
+        tracker.update(match, prev_hitstop)
+
+        if outcome == "whiff":
+            if atk.state != State.ATTACK or atk.frame_counter > startup + MOVES[name]["active"]:
+                # Active frames are over: bring the defender into reach
+                result["contact"] = match.frame
+                result["attacker_recovery"] = frames_until(match, atk, hold) - match.frame
+                dfn.rect.left = atk.rect.right
+                return result, match.snapshot()
+            continue
+
+        if tracker.exchange and tracker.exchange[3] == match.frame:
+            # Active frames rebuild the hitbox, so one swing can connect again
+            result["hits"] = result.get("hits", 0) + 1
+        if tracker.exchange and result["contact"] is None:
+            result["contact"] = match.frame
+            snap = match.snapshot()
+            if dfn.guard_stun:
+                result["stun"] = ("BLOCKSTUN", dfn.guard_stun)
+            else:
+                result["stun"] = (stun_name(dfn.hitstun, airborne=outcome == "air"), dfn.hitstun)
+        if tracker.last:
+            contact = result["contact"]
+            result["attacker_recovery"] = tracker.ready[atk] - contact
+            result["defender_recovery"] = tracker.ready[dfn] - contact
+            result["advantage"] = tracker.last[1]
+            return result, snap
+    return result, None
+
+def stun_name(frames, airborne):
+    if airborne:
+        return "AIR_JUGGLE_STUN"
+    names = [n for n in STUN_NAMES[1:3] if getattr(main, n) == frames]
+    return names[0] if names else "?"
+
+def frames_until(match, fighter, hold):
+    # Frame at which fighter becomes actionable, run on a copy of the match
+    snap = match.snapshot()
+    while not actionable(fighter) and match.frame - snap[0] < MAX_FRAMES:
+        match.step_masks(0, hold)
+    frame = match.frame
+    match.restore(snap)
+    return frame
+
+def try_punish(name, outcome, snap, punisher):
+    # True when P2's punisher lands clean on P1 holding block
+    match = setup(name, outcome)
+    match.restore(snap)
+    atk, dfn = match.p1, match.p2
+    grounded, mask = MOVE_INPUTS[punisher]
+    pressed = False
+    for _ in range(MAX_FRAMES):
+        press = not pressed and actionable(dfn) and dfn.on_ground == grounded
+        pressed = pressed or press
+        match.step_masks(BTN_BLOCK, mask if press else 0)
+        if atk.hitstun or atk.state == State.KODOWN:
+            return True
+        if pressed and dfn.state != State.ATTACK and actionable(dfn):
+            return False
+    return False
+
+# -------------- Table --------------
+def load_cache(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def build(cache):
+    # Returns (rows, new cache, computed count)
+    rows, fresh, computed = [], {}, 0
+    for name in MOVES:
+        for outcome in OUTCOMES:
+            key = base_key(name, outcome)
+            entry = cache.get(key)
+            snap = None
+            if entry is None:
+                entry, snap = run_exchange(name, outcome)
+                computed += 1
+            entry["punishers"] = {}
+            fresh[key] = entry
+            for punisher in MOVES:
+                pkey = punish_key(key, punisher)
+                if pkey in cache:
+                    hit = cache[pkey]
+                else:
+                    if entry["contact"] is None:
+                        hit = False
+                    else:
+                        if snap is None:
+                            _, snap = run_exchange(name, outcome)
+                        hit = try_punish(name, outcome, snap, punisher)
+                    computed += 1
+                fresh[pkey] = hit
+                entry["punishers"][punisher] = hit
+            rows.append(entry)
+    return rows, fresh, computed
+
+def fastest(entry):
+    ok = [p for p, hit in entry["punishers"].items() if hit]
+    return sorted(ok, key=lambda p: MOVES[p]["startup"])
+
+def format_table(rows):
+    lines = [f"{'move':9} {'outcome':7} {'start':>5} {'hits':>4} {'first stun':>20} {'atk rec':>7} {'def rec':>7} "
+             f"{'adv':>4}  punished by"]
+    for r in rows:
+        if r["contact"] is None:
+            lines.append(f"{r['move']:9} {r['outcome']:7} {r['startup']:5}   (no contact)")
+            continue
+        stun = f"{r['stun'][0]} {r['stun'][1]}" if "stun" in r else "-"
+        adv = f"{r['advantage']:+d}" if "advantage" in r else "-"
+        dfn = r.get("defender_recovery", "-")
+        punishers = ", ".join(f"{p} ({MOVES[p]['startup']}f)" for p in fastest(r)) or "-"
+        lines.append(f"{r['move']:9} {r['outcome']:7} {r['startup']:5} {r.get('hits', '-'):>4} {stun:>20} "
+                     f"{r['attacker_recovery']:7} "
+                     f"{dfn:>7} {adv:>4}  {punishers}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Frame advantage and punish table for MOVES")
+    parser.add_argument("--cache", default=CACHE_PATH, help="result cache (default %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="recompute everything")
+    parser.add_argument("--json", metavar="PATH", help="also write the rows as JSON")
+    args = parser.parse_args()
+
+    cache = {} if args.no_cache else load_cache(args.cache)
+    rows, fresh, computed = build(cache)
+    print(format_table(rows))
+    print(f"\n{computed} of {len(fresh)} results computed, the rest cached")
+    if not args.no_cache:
+        os.makedirs(os.path.dirname(args.cache), exist_ok=True)
+        with open(args.cache, "w") as f:
+            json.dump(fresh, f)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
@@ -0,0 +1,214 @@
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bots import BOTS, make_bot
+from main import FPS, ROUND_TIME_SECONDS, ROUNDS_TO_WIN, Match
+
+# -------------- Bot ladder --------------
+# Plays bot-vs-bot matches headlessly across a process pool and keeps
+# Glicko ratings (rating plus deviation, RD). Each rating period schedules
+# the pairings that are expected to shrink total rating variance the most,
+# plays them, applies one Glicko update for the period and checkpoints.
+# Match seeds come from a counter kept in the checkpoint, so an interrupted
+# run resumes by replaying the unfinished period with the same seeds.
+# Only the active bots (those asked for this run) are paired and updated;
+# any others in the checkpoint keep their ratings untouched. Each pair
+# alternates sides from one game to its next (counted in the checkpoint),
+# since Player 1 wins hit trades (resolve_hits resolves it first).
+
+START_RATING = 1500.0
+START_RD = 350.0
+MIN_RD = 30.0
+RD_GROWTH = 10.0          # per period, so ratings can follow changing bots
+Q = math.log(10) / 400
+MAX_MATCH_FRAMES = (2 * ROUNDS_TO_WIN - 1) * ROUND_TIME_SECONDS * FPS + 600
+
+# -------------- Matches (worker side) --------------
+def play_match(a, b, seed, swap=False):
+    # Returns a's score (1, 0.5 or 0) and the frames played. a plays
+    # Player 1, or Player 2 with swap.
+    match = Match()
+    match.start()
+    bot_a, bot_b = make_bot(a, seed), make_bot(b, seed + 1)
+    left, right = (bot_b, bot_a) if swap else (bot_a, bot_b)
+    p1, p2 = match.p1, match.p2
+    frames = 0
+    while frames < MAX_MATCH_FRAMES:
+        rw = match.step_masks(left.act(p1, p2), right.act(p2, p1))
+        frames += 1
+        if rw != 0:
+            if match.match_over():
+                break
+            match.next_round()
+    won_left = (p1.round_won > p2.round_won) - (p1.round_won < p2.round_won)
+    score = 0.5 + 0.5 * (-won_left if swap else won_left)
+    return score, frames
+
+def play_batch(games):
+    return [(a, b, seed) + play_match(a, b, seed, swap) for a, b, seed, swap in games]
+
+# -------------- Glicko --------------
+def g(rd):
+    return 1 / math.sqrt(1 + 3 * Q * Q * rd * rd / (math.pi * math.pi))
+
+def expected(r, rj, rdj):
+    return 1 / (1 + 10 ** (-g(rdj) * (r - rj) / 400))
+
+def variance_drop(rd, r, rj, rdj):
+    # How much one game against j would shrink this player's RD^2
+    e = expected(r, rj, rdj)
+    return rd * rd - 1 / (1 / (rd * rd) + Q * Q * g(rdj) ** 2 * e * (1 - e))
+
+class Ladder:
+    def __init__(self, bots, seed=0):
+        self.players = {name: {"rating": START_RATING, "rd": START_RD, "games": 0, "wins": 0, "draws": 0}
+                        for name in bots}
+        self.active = list(bots)
+        self.pair_games = {}      # "a b" (sorted names) -> games scheduled, for sides
+        self.next_seed = seed
+        self.matches = 0
+        self.periods = 0
+        self.frames = 0
+        self.play_seconds = 0.0
+
+    def pairings(self, count):
+        # Greedy: take the pair with the largest combined variance drop,
+        # then pretend it was played (shrink both RDs) before the next pick
+        names = self.active
+        if len(names) < 2:
+            raise ValueError(f"need at least two active bots, got {names}")
+        rd = {n: self.players[n]["rd"] for n in names}
+        r = {n: self.players[n]["rating"] for n in names}
+        games = []
+        for _ in range(count):
+            best, best_gain = None, -1.0
+            for i, a in enumerate(names):
+                for b in names[i + 1:]:
+                    gain = variance_drop(rd[a], r[a], r[b], rd[b]) + variance_drop(rd[b], r[b], r[a], rd[a])
+                    if gain > best_gain:
+                        best, best_gain = (a, b), gain
+            a, b = best
+            for x, y in ((a, b), (b, a)):
+                rd[x] = math.sqrt(rd[x] ** 2 - variance_drop(rd[x], r[x], r[y], rd[y]))
+            key = " ".join(sorted((a, b)))
+            n = self.pair_games.get(key, 0)
+            self.pair_games[key] = n + 1
+            games.append((a, b, self.next_seed, bool(n & 1)))
+            self.next_seed += 2
+        return games
+
+    def update(self, results):
+        # One Glicko rating period over all results, applied simultaneously
+        games = {name: [] for name in self.active}
+        for a, b, _, score, frames in results:
+            games[a].append((b, score))
+            games[b].append((a, 1 - score))
+            self.frames += frames
+        new = {}
+        for name in self.active:
+            p = self.players[name]
+            rd = min(START_RD, math.sqrt(p["rd"] ** 2 + RD_GROWTH ** 2))
+            if not games[name]:
+                new[name] = (p["rating"], rd)
+                continue
+            d_inv = 0.0
+            delta = 0.0
+            for opp, score in games[name]:
+                o = self.players[opp]
+                e = expected(p["rating"], o["rating"], o["rd"])
+                d_inv += Q * Q * g(o["rd"]) ** 2 * e * (1 - e)
+                delta += g(o["rd"]) * (score - e)
+                p["games"] += 1
+                p["wins"] += score == 1
+                p["draws"] += score == 0.5
+            denom = 1 / (rd * rd) + d_inv
+            new[name] = (p["rating"] + Q / denom * delta, max(MIN_RD, math.sqrt(1 / denom)))
+        for name, (rating, rd) in new.items():
+            self.players[name]["rating"], self.players[name]["rd"] = rating, rd
+        self.matches += len(results)
+        self.periods += 1
+
+    # ---- checkpoint ----
+    def save(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({k: v for k, v in self.__dict__.items() if k != "active"}, f, indent=1)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, bots):
+        ladder = cls([])
+        with open(path) as f:
+            ladder.__dict__.update(json.load(f))
+        # New bot versions join with fresh ratings
+        for name in bots:
+            ladder.players.setdefault(name, {"rating": START_RATING, "rd": START_RD, "games": 0, "wins": 0,
+                                             "draws": 0})
+        ladder.active = list(bots)
+        return ladder
+
+    def table(self):
+        rows = sorted(self.players.items(), key=lambda kv: -kv[1]["rating"])
+        lines = [f"{'#':>3} {'bot':12} {'rating':>7} {'+/-':>5} {'games':>6} {'W-D-L':>14}"]
+        for i, (name, p) in enumerate(rows, 1):
+            losses = p["games"] - p["wins"] - p["draws"]
+            lines.append(f"{i:3} {name:12} {p['rating']:7.0f} {2 * p['rd']:5.0f} {p['games']:6} "
+                         f"{p['wins']:>4}-{p['draws']}-{losses}")
+        return "\n".join(lines)
+
+def run(ladder, matches, period, workers, state_path=None, results_path=None, chunk=4):
+    target = ladder.matches + matches
+    with ProcessPoolExecutor(workers) as pool:
+        while ladder.matches < target:
+            games = ladder.pairings(min(period, target - ladder.matches))
+            t0 = time.perf_counter()
+            chunks = [games[i:i + chunk] for i in range(0, len(games), chunk)]
+            results = [r for batch in pool.map(play_batch, chunks) for r in batch]
+            secs = time.perf_counter() - t0
+            ladder.play_seconds += secs
+            ladder.update(results)
+            if results_path:
+                with open(results_path, "a") as f:
+                    for a, b, seed, score, frames in results:
+                        f.write(json.dumps({"a": a, "b": b, "seed": seed, "score": score, "frames": frames}) + "\n")
+            if state_path:
+                ladder.save(state_path)
+            print(f"period {ladder.periods}: {ladder.matches} matches, {len(results) / secs:.1f} matches/s, "
+                  f"{sum(r[4] for r in results) / secs:.0f} frames/s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank bots with headless bot-vs-bot matches")
+    parser.add_argument("--bots", default=",".join(BOTS), help="comma-separated names from bots.BOTS")
+    parser.add_argument("--matches", type=int, default=1000, help="matches to play in this run")
+    parser.add_argument("--period", type=int, default=64, help="matches per rating period")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--state", default="ladder.json", help="checkpoint to resume from and write to")
+    parser.add_argument("--results", default="ladder_results.jsonl", help="append every result here")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    bots = list(dict.fromkeys(args.bots.split(",")))
+    unknown = [name for name in bots if name not in BOTS]
+    if unknown:
+        parser.error(f"unknown bots: {', '.join(unknown)} (bots.BOTS has {', '.join(BOTS)})")
+    if len(bots) < 2:
+        parser.error("--bots needs at least two bots")
+    if os.path.exists(args.state):
+        ladder = Ladder.load(args.state, bots)
+        print(f"resuming from {args.state}: {ladder.matches} matches, {ladder.periods} periods")
+    else:
+        ladder = Ladder(bots, args.seed)
+    t0 = time.perf_counter()
+    start = ladder.matches
+    try:
+        run(ladder, args.matches, args.period, args.workers, args.state, args.results)
+    except KeyboardInterrupt:
+        print(f"interrupted; {args.state} holds the last finished period")
+    secs = time.perf_counter() - t0
+    print(f"\n{ladder.matches - start} matches in {secs:.1f}s ({(ladder.matches - start) / secs:.1f} matches/s, "
+          f"{ladder.matches / max(ladder.play_seconds, 1e-9):.1f} overall)")
+    print(ladder.table())
@@ -1,6 +1,15 @@
+import time
+_IMPORT_T0 = time.perf_counter()
+
+import asyncio
+import json
+import math
+import operator
+import os
 import pygame
 import sys
-from enum import Enum, auto
+from array import array
+from enum import Enum, IntEnum, auto
 
 # -------------- Config --------------
 WIDTH, HEIGHT = 960, 540
@@ -50,81 +59,503 @@ GREY = (120, 120, 120)
 PURPLE = (180, 120, 255)
 ORANGE = (255, 160, 60)
 
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Python Fighting Game - Extended")
-clock = pygame.time.Clock()
-font_big = pygame.font.SysFont("arial", 48, bold=True)
-font_mid = pygame.font.SysFont("arial", 32, bold=True)
-font_small = pygame.font.SysFont("arial", 22, bold=True)
-
-# Optional: load sounds (replace file paths or comment out if not available)
-def try_sound(path):
+# Quality tiers, best first; the governor in quality.py steps through them
+# when frame time runs over budget. "scale" caps the internal resolution.
+QUALITY_TIERS = [
+    {"name": "high",   "gradient": True,  "outlines": True,  "rounded": True,  "scale": 1.0},
+    {"name": "medium", "gradient": False, "outlines": True,  "rounded": True,  "scale": 1.0},
+    {"name": "low",    "gradient": False, "outlines": False, "rounded": False, "scale": 1.0},
+    {"name": "lowest", "gradient": False, "outlines": False, "rounded": False, "scale": 0.5},
+]
+quality = QUALITY_TIERS[0]
+
+# Display and fonts are created on first use (init_display / init_fonts), so
+# importing this module opens no window and scans no system fonts
+screen = None
+clock = None
+font_big = font_mid = font_small = None
+
+# Internal resolution: everything is drawn in WIDTH x HEIGHT coordinates
+# scaled by render_scale onto canvas. The display is a SCALED WIDTH x HEIGHT
+# mode, so the GPU handles window/fullscreen scaling and drawing cost only
+# depends on the internal size.
+RENDER_SIZES = {"960x540": 1.0, "480x270": 0.5}
+render_scale = 1.0
+canvas = None
+
+def px(v):
+    return int(v * render_scale)
+
+# Fonts: a bundled file wins; otherwise the system font path found by the
+# first launch is cached so later launches skip the fontconfig scan
+FONT_NAME = "arial"
+BUNDLED_FONT = os.path.join("assets", "fonts", "game.ttf")
+FONT_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "fight_game", "fonts.json")
+
+# Startup phases in ms since import, filled in by main()
+startup_times = {}
+
+def resolve_font_path():
+    if os.path.exists(BUNDLED_FONT):
+        return BUNDLED_FONT
     try:
-        return pygame.mixer.Sound(path)
-    except:
-        return None
-
-SND_HIT = None     # try_sound("assets/hit.wav")
-SND_BLOCK = None   # try_sound("assets/block.wav")
-SND_KO = None      # try_sound("assets/ko.wav")
-SND_START = None   # try_sound("assets/start.wav")
-SND_SELECT = None  # try_sound("assets/select.wav")
+        with open(FONT_CACHE) as f:
+            cached = json.load(f)
+        if cached.get("name") == FONT_NAME and (cached["path"] is None or os.path.exists(cached["path"])):
+            return cached["path"]
+    except (OSError, ValueError, KeyError):
+        pass
+    # None means no system match; pygame's default font is used instead
+    path = pygame.font.match_font(FONT_NAME, bold=True)
+    try:
+        os.makedirs(os.path.dirname(FONT_CACHE), exist_ok=True)
+        with open(FONT_CACHE, "w") as f:
+            json.dump({"name": FONT_NAME, "path": path}, f)
+    except OSError:
+        pass
+    return path
+
+def load_font(path, size):
+    font = pygame.font.Font(path, size)
+    if path != BUNDLED_FONT:
+        font.set_bold(True)
+    return font
+
+def init_fonts():
+    global font_big, font_mid, font_small
+    if font_small is not None:
+        return
+    pygame.font.init()
+    path = resolve_font_path()
+    font_big = load_font(path, px(48))
+    font_mid = load_font(path, px(32))
+    font_small = load_font(path, px(22))
+
+def init_display(fullscreen=False, scale=1.0):
+    global screen, clock
+    if screen is not None:
+        return
+    pygame.display.init()
+    flags = pygame.SCALED | (pygame.FULLSCREEN if fullscreen else 0)
+    screen = pygame.display.set_mode((WIDTH, HEIGHT), flags)
+    pygame.display.set_caption("Python Fighting Game - Extended")
+    clock = pygame.time.Clock()
+    startup_times["display"] = (time.perf_counter() - _IMPORT_T0) * 1000
+    # Creates the canvas and the fonts for it
+    set_render_scale(scale)
+    startup_times["fonts"] = (time.perf_counter() - _IMPORT_T0) * 1000
+
+def set_render_scale(scale):
+    global render_scale, canvas, font_big, font_mid, font_small
+    render_scale = scale
+    if scale == 1.0:
+        canvas = screen
+    else:
+        canvas = pygame.Surface((px(WIDTH), px(HEIGHT))).convert()
+    # Fonts are sized for the internal resolution
+    font_big = font_mid = font_small = None
+    text_cache.clear()
+    body_cache.clear()
+    init_fonts()
+
+def set_quality(tier, base_scale=1.0):
+    global quality
+    quality = QUALITY_TIERS[tier]
+    scale = min(base_scale, quality["scale"])
+    if scale != render_scale:
+        set_render_scale(scale)
+
+def draw_debug_overlay(surf, fps, frame_ms, renderer=None):
+    init_fonts()
+    text = f"{fps:4.0f} fps  {frame_ms:4.1f} ms  quality: {quality['name']}  {canvas.get_width()}x{canvas.get_height()}"
+    if renderer:
+        # Draw calls made / recorded in the previous frame
+        text += f"  draws {renderer.drawn}/{renderer.emitted}"
+    lookups = body_cache_stats["hits"] + body_cache_stats["misses"]
+    if lookups:
+        text += f"  bodies {len(body_cache)} ({body_cache_stats['hits'] / lookups:.0%} hits)"
+    draw_image(surf, font_small.render(text, True, GREEN), px(8), px(HEIGHT - 30))
+
+def present():
+    if canvas is not screen:
+        pygame.transform.scale(canvas, (WIDTH, HEIGHT), screen)
+    pygame.display.flip()
+
+# Mixer buffer in samples; smaller means lower latency but risks crackle
+MIXER_FREQUENCY = 44100
+MIXER_BUFFER = 512
+
+def init_mixer():
+    if not pygame.mixer.get_init():
+        pygame.mixer.init(frequency=MIXER_FREQUENCY, size=-16, channels=2, buffer=MIXER_BUFFER)
+
+# Sounds, fonts and images from assets/manifest.json load in the background
+# once main() starts (see assets.py); sounds play through the voice manager
+# (see audio.py). Until then nothing plays.
+assets = None
+voices = None
+# Match statistics, set by main() when --telemetry is given (see telemetry.py)
+telemetry = None
+
+def play_sound(name):
+    if voices:
+        voices.play(name)
+
+# -------------- Input encoding --------------
+# Per-player buttons packed into an 8-bit mask; Fighter decisions, replays
+# and headless runs all work on masks
+BUTTONS = ("left", "right", "down", "up", "light", "heavy", "block", "dash")
+BTN_LEFT, BTN_RIGHT, BTN_DOWN, BTN_UP, BTN_LIGHT, BTN_HEAVY, BTN_BLOCK, BTN_DASH = (1 << i for i in range(len(BUTTONS)))
+# Controls for headless fighters, reading a flat sequence of 16 bools:
+# P1 in bits 0-7, P2 in bits 8-15
+P1_BITS = {name: i for i, name in enumerate(BUTTONS)}
+P2_BITS = {name: i + len(BUTTONS) for i, name in enumerate(BUTTONS)}
+
+def encode_input(keys, controls):
+    mask = 0
+    for i, name in enumerate(BUTTONS):
+        if keys[controls[name]]:
+            mask |= 1 << i
+    return mask
 
 class GameState(Enum):
     TITLE = auto()
     HOW_TO_PLAY = auto()
     PLAYING = auto()
+    TRAINING = auto()
     PAUSED = auto()
     ROUND_END = auto()
     MATCH_END = auto()
 
+# -------------- Render commands --------------
+# Drawing functions take a target. A pygame Surface is drawn on at once (as
+# observation.py and render_replay.py do); a RenderList records the calls
+# instead. The game fills one RenderList per frame and hands it to a
+# backend from render.py, which can redraw only what changed since the
+# previous frame, count draw calls, or draw nothing.
+# Command i is CMD_WORDS ints in ops (op, x, y, w, h, width, radius) plus
+# refs[i]: the color, or the surface for blits. Storage is reused.
+OP_RECT, OP_BLIT = range(2)
+CMD_WORDS = 7
+
+class RenderList:
+    __slots__ = ("ops", "refs", "count")
+
+    def __init__(self, capacity=128):
+        self.ops = array("i", bytes(4 * CMD_WORDS * capacity))
+        self.refs = [None] * capacity
+        self.count = 0
+
+    def clear(self):
+        self.count = 0
+
+    def add(self, op, ref, x, y, w, h, width=0, radius=0):
+        i = self.count
+        if i == len(self.refs):
+            self.ops.extend(array("i", bytes(4 * len(self.ops))))
+            self.refs.extend([None] * i)
+        ops = self.ops
+        o = i * CMD_WORDS
+        ops[o] = op
+        ops[o + 1] = x
+        ops[o + 2] = y
+        ops[o + 3] = w
+        ops[o + 4] = h
+        ops[o + 5] = width
+        ops[o + 6] = radius
+        self.refs[i] = ref
+        self.count = i + 1
+
+def draw_rect(surf, color, rect, width=0, radius=0):
+    if type(surf) is RenderList:
+        surf.add(OP_RECT, color, rect.x, rect.y, rect.w, rect.h, width, radius)
+    else:
+        pygame.draw.rect(surf, color, rect, width, radius)
+
+def draw_image(surf, image, x, y):
+    if type(surf) is RenderList:
+        surf.add(OP_BLIT, image, x, y, image.get_width(), image.get_height())
+    else:
+        surf.blit(image, (x, y))
+
 # -------------- Helpers --------------
+def corner(r):
+    return px(r) if quality["rounded"] else 0
+
+def scaled_rect(x, y, w, h, out=None):
+    # With out, that Rect is updated and returned instead of a new one
+    if out is None:
+        return pygame.Rect(px(x), px(y), px(w), px(h))
+    out.update(px(x), px(y), px(w), px(h))
+    return out
+
+# Scratch Rects for per-frame drawing, so a PLAYING frame allocates none
+BG_RECT = pygame.Rect(0, 0, 0, 0)
+FG_RECT = pygame.Rect(0, 0, 0, 0)
+
 def draw_health_bar(surf, x, y, w, h, value, max_value, color):
     pct = max(0, min(1, value / max_value))
-    bg_rect = pygame.Rect(x, y, w, h)
-    fg_rect = pygame.Rect(x, y, int(w * pct), h)
-    pygame.draw.rect(surf, GREY, bg_rect, border_radius=6)
-    pygame.draw.rect(surf, color, fg_rect, border_radius=6)
-    pygame.draw.rect(surf, WHITE, bg_rect, 2, border_radius=6)
+    bg_rect = scaled_rect(x, y, w, h, BG_RECT)
+    fg_rect = scaled_rect(x, y, int(w * pct), h, FG_RECT)
+    draw_rect(surf, GREY, bg_rect, radius=corner(6))
+    draw_rect(surf, color, fg_rect, radius=corner(6))
+    draw_rect(surf, WHITE, bg_rect, max(1, px(2)), corner(6))
+
+# Rendered text by (text, font, color). Fonts are replaced when the render
+# scale changes, which clears this; the cap only matters for text that
+# keeps changing, which should call font.render directly instead.
+text_cache = {}
+TEXT_CACHE_MAX = 256
+
+def render_text(text, font, color):
+    key = (text, font, color)
+    surf = text_cache.get(key)
+    if surf is None:
+        if len(text_cache) >= TEXT_CACHE_MAX:
+            text_cache.clear()
+        surf = text_cache[key] = font.render(text, True, color)
+    return surf
 
 def center_text(surface, text, font, color, y, outline=True):
-    surf = font.render(text, True, color)
-    rect = surf.get_rect(center=(WIDTH//2, y))
-    if outline:
-        for ox, oy in [(-2,0),(2,0),(0,-2),(0,2)]:
-            o = font.render(text, True, (0,0,0))
-            orect = o.get_rect(center=(WIDTH//2+ox, y+oy))
-            surface.blit(o, orect)
-    surface.blit(surf, rect)
+    surf = render_text(text, font, color)
+    cx, cy = px(WIDTH//2), px(y)
+    x, y = cx - surf.get_width() // 2, cy - surf.get_height() // 2
+    if outline and quality["outlines"]:
+        d = max(1, px(2))
+        o = render_text(text, font, (0, 0, 0))
+        draw_image(surface, o, x - d, y)
+        draw_image(surface, o, x + d, y)
+        draw_image(surface, o, x, y - d)
+        draw_image(surface, o, x, y + d)
+    draw_image(surface, surf, x, y)
+
+# -------------- Stage --------------
+# The stage is STAGE_WIDTH wide and the camera shows WIDTH of it, centred on
+# the fighters' midpoint (a pure function of their positions, so any frame
+# renders the same on its own). Scenery is drawn as parallax layers: each
+# layer is one tile pre-rendered per render scale and quality, scrolled at
+# a fraction of the camera speed, and only tiles overlapping the view are
+# blitted, so draw cost doesn't grow with the stage.
+STAGE_WIDTH = WIDTH * 2
+MAX_SEPARATION = WIDTH - 40     # fighters' outer edges never get further apart
+P1_SPAWN_X = STAGE_WIDTH // 2 - 280
+P2_SPAWN_X = STAGE_WIDTH // 2 + 220
+camera_x = 0
+
+def camera_for(p1, p2):
+    mid = (p1.rect.centerx + p2.rect.centerx) // 2
+    return max(0, min(STAGE_WIDTH - WIDTH, mid - WIDTH // 2))
+
+def wx(x):
+    # World x to canvas x
+    return px(x - camera_x)
+
+def world_rect(x, y, w, h, out=None):
+    if out is None:
+        return pygame.Rect(wx(x), px(y), px(w), px(h))
+    out.update(wx(x), px(y), px(w), px(h))
+    return out
+
+def _sky(tile, top):
+    tile.fill((26, 30, 46))
+    if quality["gradient"]:
+        for i in range(0, GROUND_Y, 6):
+            c = 26 + int(20 * (i / HEIGHT))
+            pygame.draw.line(tile, (c, c+6, c+16), (0, px(i)), (px(WIDTH), px(i)))
+
+def _skyline(tile, top):
+    for x, w, h in ((0, 70, 120), (80, 40, 190), (130, 90, 140), (240, 50, 230), (300, 110, 160), (420, 60, 110)):
+        pygame.draw.rect(tile, (34, 39, 58), scaled_rect(x, GROUND_Y - h - top, w, h))
+
+def _buildings(tile, top):
+    for x, w, h in ((20, 90, 150), (150, 60, 210), (230, 80, 120)):
+        pygame.draw.rect(tile, (46, 52, 74), scaled_rect(x, GROUND_Y - h - top, w, h))
+        for wy in range(GROUND_Y - h + 16, GROUND_Y - 20, 28):
+            pygame.draw.rect(tile, (70, 76, 96), scaled_rect(x + 12, wy - top, w - 24, 8))
+
+def _props(tile, top):
+    pygame.draw.rect(tile, (60, 66, 90), scaled_rect(60, GROUND_Y-90 - top, 56, 90))
+    pygame.draw.rect(tile, (74, 82, 110), scaled_rect(100, GROUND_Y-40 - top, 38, 40))
+
+# (draw function, scroll factor, tile width, top y, opaque). Tiles span
+# from top down to the ground line; the ground strip is drawn between the
+# background layers and the props.
+PARALLAX_LAYERS = [
+    (_sky, 0.0, WIDTH, 0, True),
+    (_skyline, 0.25, 480, GROUND_Y - 230, False),
+    (_buildings, 0.5, 320, GROUND_Y - 210, False),
+]
+PROP_LAYER = (_props, 1.0, 140, GROUND_Y - 90, False)
+TILE_KEY = (255, 0, 255)
+layer_tiles = {}   # (layer, render scale, gradient) -> Surface
+
+def layer_tile(layer):
+    draw, _, tile_w, top, opaque = layer
+    key = (draw, render_scale, quality["gradient"])
+    tile = layer_tiles.get(key)
+    if tile is None:
+        tile = pygame.Surface((px(tile_w) + 1, px(GROUND_Y) - px(top)))
+        if not opaque:
+            tile.fill(TILE_KEY)
+            tile.set_colorkey(TILE_KEY)
+        draw(tile, top)
+        if pygame.display.get_surface():
+            tile = tile.convert()
+        layer_tiles[key] = tile
+    return tile
+
+def draw_layer(surf, layer, stop=None):
+    # Blit only the tiles that overlap the view (and, with stop, the stage)
+    _, factor, tile_w, top, _ = layer
+    tile = layer_tile(layer)
+    offset = camera_x * factor
+    first = int(offset // tile_w)
+    last = int((offset + WIDTH - 1) // tile_w)
+    if stop is not None:
+        last = min(last, (stop - 1) // tile_w)
+    for i in range(first, last + 1):
+        draw_image(surf, tile, math.floor((i * tile_w - offset) * render_scale), px(top))
 
 def draw_arena(surf):
-    # Background gradient
-    surf.fill((26, 30, 46))
-    for i in range(0, HEIGHT, 6):
-        c = 26 + int(20 * (i / HEIGHT))
-        pygame.draw.line(surf, (c, c+6, c+16), (0, i), (WIDTH, i))
+    for layer in PARALLAX_LAYERS:
+        draw_layer(surf, layer)
     # Ground
-    pygame.draw.rect(surf, (42, 48, 64), (0, GROUND_Y, WIDTH, HEIGHT - GROUND_Y))
-    # Props
-    for x in range(0, WIDTH, 140):
-        pygame.draw.rect(surf, (60, 66, 90), (x+60, GROUND_Y-90, 56, 90))
-        pygame.draw.rect(surf, (74, 82, 110), (x+100, GROUND_Y-40, 38, 40))
+    draw_rect(surf, (42, 48, 64), scaled_rect(0, GROUND_Y, WIDTH, HEIGHT - GROUND_Y, BG_RECT))
+    # Props, only where the stage has them
+    draw_layer(surf, PROP_LAYER, stop=STAGE_WIDTH)
 
 # -------------- Fighter --------------
-class State(Enum):
-    IDLE = auto()
-    WALK = auto()
-    JUMP = auto()
-    FALL = auto()
-    CROUCH = auto()
-    ATTACK = auto()
-    BLOCK = auto()
-    HITSTUN = auto()
-    KODOWN = auto()
-    DASH = auto()
+class State(IntEnum):
+    IDLE = 0
+    WALK = 1
+    JUMP = 2
+    FALL = 3
+    CROUCH = 4
+    ATTACK = 5
+    BLOCK = 6
+    HITSTUN = 7
+    KODOWN = 8
+    DASH = 9
+
+# -------------- Fighter state machine --------------
+# Fighter.input is a single lookup into INPUT_TABLE, compiled once from
+# input_rule over every (state, context, button mask). Context bits say
+# whether the fighter is on the ground and whether a dash is available.
+# Entries are (state, blocking, dx, facing, jump, dash, attack), with facing
+# 0 meaning unchanged, or None where input is ignored. physics and
+# update_attack use per-state and per-move tables the same way. All tables
+# are flat and indexed by small ints, so they convert directly to arrays
+# for batched simulation; check_fsm.py lints them.
+CTX_GROUND = 1
+CTX_CAN_DASH = 2
+NUM_CTX = 4
+
+def fsm_index(state, ctx, mask):
+    return ((state * NUM_CTX + ctx) << len(BUTTONS)) | mask
+
+def input_rule(state, ctx, mask):
+    if state in (State.HITSTUN, State.KODOWN, State.ATTACK):
+        return None
+    on_ground = bool(ctx & CTX_GROUND)
+    left, right = mask & BTN_LEFT, mask & BTN_RIGHT
+    down, up = mask & BTN_DOWN, mask & BTN_UP
+    light, heavy = mask & BTN_LIGHT, mask & BTN_HEAVY
+    dx, facing, jump, dash, attack = 0, 0, False, False, None
+
+    # Block
+    blocking = bool(mask & BTN_BLOCK and on_ground and not down)
+    if blocking:
+        state = State.BLOCK
+    elif state == State.BLOCK:
+        state = State.IDLE
+
+    # Crouch
+    if down and on_ground and not blocking:
+        state = State.CROUCH
+    elif on_ground and state == State.CROUCH:
+        state = State.IDLE
+
+    # Dash
+    if mask & BTN_DASH and on_ground and ctx & CTX_CAN_DASH:
+        state = State.DASH
+        dash = True
+
+    # Movement
+    speed = MOVE_SPEED if on_ground else AIR_SPEED
+    if state != State.DASH and not blocking and state != State.CROUCH:
+        if left:
+            dx -= speed
+            facing = -1
+            if on_ground and state == State.IDLE:
+                state = State.WALK
+        if right:
+            dx += speed
+            facing = 1
+            if on_ground and state == State.IDLE:
+                state = State.WALK
+        if not left and not right and on_ground and state == State.WALK:
+            state = State.IDLE
+
+    # Jump (no double jump)
+    if up and on_ground and not blocking:
+        jump = True
+        on_ground = False
+        state = State.JUMP
+
+    # Attacks
+    if state != State.DASH and not blocking:
+        if on_ground:
+            if down and light:
+                attack = "c_light"
+            elif light:
+                attack = "light"
+            elif heavy:
+                attack = "heavy"
+        elif light or heavy:
+            attack = "j_light"
+    if attack:
+        state = State.ATTACK
+
+    return (state, blocking, dx, facing, jump, dash, attack)
+
+INPUT_TABLE = [None] * (len(State) * NUM_CTX << len(BUTTONS))
+for _state in State:
+    for _ctx in range(NUM_CTX):
+        for _mask in range(1 << len(BUTTONS)):
+            INPUT_TABLE[fsm_index(_state, _ctx, _mask)] = input_rule(_state, _ctx, _mask)
+
+# Physics transitions by state: on landing, and when airborne and falling
+LAND_STATE = [State.IDLE if s in (State.JUMP, State.FALL) else s for s in State]
+FALLS_IN_AIR = [s not in (State.ATTACK, State.DASH, State.HITSTUN) for s in State]
+
+# Attack phases by frame of each move, and hitbox (w, h, low)
+PHASE_STARTUP, PHASE_ACTIVE, PHASE_RECOVERY = 0, 1, 2
+PHASE_NAMES = ("startup", "active", "recovery")
+MOVE_PHASES = {
+    name: (PHASE_STARTUP,) * m["startup"] + (PHASE_ACTIVE,) * m["active"] + (PHASE_RECOVERY,) * m["recovery"]
+    for name, m in MOVES.items()
+}
+MOVE_HITBOX = {name: (36, 18, True) if name == "c_light" else (36, 24, False) for name in MOVES}
+
+# Body color by state (others use the fighter's own color)
+STATE_COLORS = {
+    State.ATTACK: ORANGE,
+    State.BLOCK: PURPLE,
+    State.HITSTUN: (200, 80, 80),
+    State.DASH: (80, 200, 200),
+}
 
 class Fighter:
+    __slots__ = ("name", "base_w", "base_h", "rect", "color", "vel_y", "on_ground", "facing", "health",
+                 "max_health", "state", "controls", "attack_name", "frame_counter", "hitbox", "hitbox_rect",
+                 "can_air_action", "blocking", "guard_stun", "hitstun", "hitstop", "stamina", "max_stamina",
+                 "dash_timer", "round_won", "sprites", "anim_tick")
+    # Simulation state saved by snapshot(); rect and hitbox are stored separately
+    SNAPSHOT_FIELDS = ("vel_y", "on_ground", "facing", "health", "state", "attack_name", "frame_counter",
+                       "can_air_action", "blocking", "guard_stun", "hitstun", "hitstop", "stamina",
+                       "dash_timer", "round_won", "anim_tick")
+    _snapshot_get = operator.attrgetter(*SNAPSHOT_FIELDS)
+
     def __init__(self, x, y, color, controls, name="Player"):
         self.name = name
         self.base_w, self.base_h = 64, 96
@@ -142,6 +573,8 @@ class Fighter:
         self.attack_name = None
         self.frame_counter = 0  # counts frames inside move
         self.hitbox = None
+        # hitbox is None or this Rect, updated in place on active frames
+        self.hitbox_rect = pygame.Rect(0, 0, 0, 0)
         self.can_air_action = True
         self.blocking = False
         self.guard_stun = 0
@@ -156,85 +589,56 @@ class Fighter:
         # Round/match helpers
         self.round_won = 0
 
+        # Drawing: optional SpriteSet (see sprites.py), animation clock
+        self.sprites = None
+        self.anim_tick = 0
+
+    def snapshot(self):
+        return (tuple(self.rect), tuple(self.hitbox) if self.hitbox else None, self._snapshot_get(self))
+
+    def restore(self, snap):
+        rect, hitbox, values = snap
+        self.rect.update(rect)
+        if hitbox:
+            self.hitbox_rect.update(hitbox)
+            self.hitbox = self.hitbox_rect
+        else:
+            self.hitbox = None
+        for name, value in zip(self.SNAPSHOT_FIELDS, values):
+            setattr(self, name, value)
+        # Snapshots that went through JSON carry the state as a plain int
+        self.state = State(self.state)
+
     def input(self, keys):
-        if self.hitstop > 0:
-            return 0
+        return self.input_mask(encode_input(keys, self.controls))
 
-        if self.state in (State.HITSTUN, State.KODOWN, State.ATTACK):
+    def input_mask(self, mask):
+        if self.hitstop > 0:
             return 0
 
-        dx = 0
-        left = keys[self.controls['left']]
-        right = keys[self.controls['right']]
-        down = keys[self.controls['down']]
-        up = keys[self.controls['up']]
-        light = keys[self.controls['light']]
-        heavy = keys[self.controls['heavy']]
-        block = keys[self.controls['block']]
-        dash = keys[self.controls['dash']]
-
         # Facing update handled externally by game each frame
+        ctx = CTX_GROUND if self.on_ground else 0
+        if self.stamina >= DASH_COST and self.dash_timer == 0:
+            ctx |= CTX_CAN_DASH
+        t = INPUT_TABLE[fsm_index(self.state, ctx, mask)]
+        if t is None:
+            return 0
 
-        # Block
-        if block and self.on_ground and not down:
-            self.state = State.BLOCK
-            self.blocking = True
-        else:
-            if self.state == State.BLOCK:
-                self.state = State.IDLE
-            self.blocking = False
-
-        # Crouch
-        if down and self.on_ground and not self.blocking:
-            self.state = State.CROUCH
-        elif self.on_ground and self.state == State.CROUCH:
-            self.state = State.IDLE
-
-        # Dash
-        if dash and self.on_ground and self.stamina >= DASH_COST and self.dash_timer == 0:
-            self.state = State.DASH
+        state, self.blocking, dx, facing, jump, dash, attack = t
+        self.state = state
+        if facing:
+            self.facing = facing
+        if dash:
             self.dash_timer = DASH_DURATION
             self.stamina -= DASH_COST
-
-        # Movement
-        speed = MOVE_SPEED if self.on_ground else AIR_SPEED
-        if self.state != State.DASH and not self.blocking and self.state not in (State.CROUCH,):
-            if left:
-                dx -= speed
-                self.facing = -1
-                if self.on_ground and self.state == State.IDLE:
-                    self.state = State.WALK
-            if right:
-                dx += speed
-                self.facing = 1
-                if self.on_ground and self.state == State.IDLE:
-                    self.state = State.WALK
-            if not left and not right and self.on_ground and self.state in (State.WALK,):
-                self.state = State.IDLE
-
-        # Jump / Short hop
-        if up and self.on_ground and not self.blocking:
+            if telemetry:
+                telemetry.dash(self)
+        if jump:
             self.vel_y = JUMP_VEL
             self.on_ground = False
-            self.state = State.JUMP
             self.can_air_action = True
-        elif up and not self.on_ground and self.state == State.FALL and self.can_air_action:
-            # No double-jump; leave hook for future
-            pass
-
-        # Attacks
-        if self.state not in (State.ATTACK, State.DASH) and not self.blocking:
-            if self.on_ground:
-                if down and light:
-                    self.start_attack("c_light")
-                elif light:
-                    self.start_attack("light")
-                elif heavy:
-                    self.start_attack("heavy")
-            else:
-                if light or heavy:
-                    self.start_attack("j_light")
-
+        if attack:
+            self.start_attack(attack)
         return dx
 
     def start_attack(self, name):
@@ -243,10 +647,13 @@ class Fighter:
         self.frame_counter = 0
         self.state = State.ATTACK
         self.hitbox = None
+        if telemetry:
+            telemetry.move(self, name)
 
     def physics(self, dx):
         if self.hitstop > 0:
             return
+        self.anim_tick += 1
 
         # Dash motion
         if self.state == State.DASH and self.dash_timer > 0:
@@ -257,7 +664,7 @@ class Fighter:
 
         # Horizontal
         self.rect.x += int(dx)
-        self.rect.x = max(0, min(WIDTH - self.rect.width, self.rect.x))
+        self.rect.x = max(0, min(STAGE_WIDTH - self.rect.width, self.rect.x))
 
         # Gravity
         self.vel_y += GRAVITY
@@ -268,10 +675,9 @@ class Fighter:
             self.rect.bottom = GROUND_Y
             self.vel_y = 0
             self.on_ground = True
-            if self.state in (State.JUMP, State.FALL):
-                self.state = State.IDLE
+            self.state = LAND_STATE[self.state]
         else:
-            if self.vel_y > 0 and self.state not in (State.ATTACK, State.DASH, State.HITSTUN):
+            if self.vel_y > 0 and FALLS_IN_AIR[self.state]:
                 self.state = State.FALL
             self.on_ground = False
 
@@ -295,30 +701,18 @@ class Fighter:
         self.hitbox = None
 
         if self.state == State.ATTACK and self.attack_name:
-            data = MOVES[self.attack_name]
-            st = data["startup"]
-            ac = data["active"]
-            rc = data["recovery"]
-
-            # Determine frame phase
-            if self.frame_counter < st:
-                phase = "startup"
-            elif self.frame_counter < st + ac:
-                phase = "active"
-            elif self.frame_counter < st + ac + rc:
-                phase = "recovery"
-            else:
+            phases = MOVE_PHASES[self.attack_name]
+            if self.frame_counter >= len(phases):
                 self.state = State.IDLE if self.on_ground else State.FALL
                 self.attack_name = None
                 self.frame_counter = 0
                 return
 
             # Active frames: build hitbox
-            if phase == "active":
-                hb_w, hb_h = 36, 24
+            if phases[self.frame_counter] == PHASE_ACTIVE:
+                hb_w, hb_h, low = MOVE_HITBOX[self.attack_name]
                 # crouch light lower hitbox
-                if self.attack_name == "c_light":
-                    hb_w, hb_h = 36, 18
+                if low:
                     hb_y = self.rect.bottom - hb_h - 10
                 else:
                     hb_y = self.rect.centery - hb_h // 2
@@ -328,7 +722,8 @@ class Fighter:
                 else:
                     hb_x = self.rect.left - hb_w
 
-                self.hitbox = pygame.Rect(hb_x, hb_y, hb_w, hb_h)
+                self.hitbox_rect.update(hb_x, hb_y, hb_w, hb_h)
+                self.hitbox = self.hitbox_rect
 
             self.frame_counter += 1
 
@@ -340,15 +735,19 @@ class Fighter:
             # Guard stun and chip
             chip = int(dmg * CHIP_REDUCTION)
             self.health = max(0, self.health - chip)
+            if telemetry:
+                telemetry.damage(self, chip, blocked=True, airborne=airborne)
             self.guard_stun = BLOCKSTUN
             # Small pushback
             self.rect.x += int(6 * (-self.facing))
-            if SND_BLOCK: SND_BLOCK.play()
+            play_sound("block")
             return
 
         # Real hit
         self.health = max(0, self.health - dmg)
         self.state = State.HITSTUN if self.health > 0 else State.KODOWN
+        if telemetry:
+            telemetry.damage(self, dmg, blocked=False, airborne=airborne)
         # Knockback
         self.rect.x += int(kb * (-self.facing))
         # Air juggle
@@ -357,43 +756,37 @@ class Fighter:
             self.hitstun = AIR_JUGGLE_STUN
         else:
             self.hitstun = HITSTUN_HEAVY if dmg >= 12 else HITSTUN_LIGHT
-        if SND_HIT and self.health > 0: SND_HIT.play()
-        if self.health == 0 and SND_KO: SND_KO.play()
+        if self.health > 0: play_sound("hit")
+        if self.health == 0: play_sound("ko")
 
-    def draw(self, surf, debug=False):
+    def draw(self, surf, debug=False, label=True):
         # Shadow
-        shadow = pygame.Rect(self.rect.centerx - 18, GROUND_Y + 6, 36, 8)
-        pygame.draw.ellipse(surf, (20, 20, 26), shadow)
-
-        # Body color by state
-        state_color = self.color
-        outline_col = (0,0,0)
-        if self.state == State.ATTACK:
-            state_color = ORANGE
-        elif self.state == State.BLOCK:
-            state_color = PURPLE
-        elif self.state == State.HITSTUN:
-            state_color = (200, 80, 80)
-        elif self.state == State.DASH:
-            state_color = (80, 200, 200)
-
-        # Body
-        pygame.draw.rect(surf, state_color, self.rect, border_radius=6)
-        pygame.draw.rect(surf, outline_col, self.rect, 2, border_radius=6)
-
-        # Face indicator
-        eye_r = 4
-        eye_x = self.rect.centerx + (self.rect.width // 4) * self.facing
-        eye_y = self.rect.y + 24
-        pygame.draw.circle(surf, WHITE, (eye_x, eye_y), eye_r)
+        r = self.rect
+        draw_image(surf, shadow_surface(), wx(r.centerx - 18), px(GROUND_Y + 6))
+
+        if self.sprites:
+            # Body: one blit of the current animation frame
+            frame = self.sprites.frame(self, render_scale)
+            ax, ay = self.sprites.anchor
+            draw_image(surf, frame, wx(self.rect.centerx - ax), px(self.rect.bottom - ay))
+        else:
+            # Body, outline, face and state label, composited once (see body_surface)
+            body, top = body_surface(self, label)
+            draw_image(surf, body, wx(r.x), px(r.y) - top)
+
+        # Hurtbox (debug/training)
+        if debug:
+            draw_rect(surf, GREEN, world_rect(r.x, r.y, r.w, r.h, BG_RECT), max(1, px(2)))
 
         # Attack box
-        if self.hitbox:
-            pygame.draw.rect(surf, YELLOW, self.hitbox, 2)
+        hb = self.hitbox
+        if hb:
+            draw_rect(surf, YELLOW, world_rect(hb.x, hb.y, hb.w, hb.h, BG_RECT), max(1, px(2)))
 
-        # State label
-        label = font_small.render(self.state.name, True, WHITE)
-        surf.blit(label, (self.rect.x, self.rect.y - 20))
+        # State label (part of the cached body without sprites)
+        if label and self.sprites:
+            text = render_text(self.state.name, font_small, WHITE)
+            draw_image(surf, text, wx(self.rect.x), px(self.rect.y - 20))
 
         # Stamina bar
         sw = 60
@@ -401,32 +794,101 @@ class Fighter:
         sx = self.rect.centerx - sw//2
         sy = self.rect.y - 10
         pct = self.stamina / self.max_stamina
-        pygame.draw.rect(surf, (60,60,60), (sx, sy, sw, sh))
-        pygame.draw.rect(surf, (60,200,200), (sx, sy, int(sw*pct), sh))
+        draw_rect(surf, (60,60,60), world_rect(sx, sy, sw, sh, BG_RECT))
+        draw_rect(surf, (60,200,200), world_rect(sx, sy, int(sw*pct), sh, FG_RECT))
+
+# -------------- Fighter body cache --------------
+# Without sprites a fighter's body is a rounded rect, its outline, an eye
+# and the state label above it. They only change with color, state,
+# facing, size and render scale, so each combination is composited once
+# into a transparent surface and the fighter is drawn with one blit.
+# Cleared with the text cache when the render scale changes.
+body_cache = {}
+body_cache_stats = {"hits": 0, "misses": 0}
+BODY_CACHE_MAX = 128
+LABEL_RISE = 20     # label top above the body
+
+def body_surface(f, label):
+    # Returns (surface, top): the body's top edge is top pixels down
+    key = (f.color, f.state, f.facing, f.rect.w, f.rect.h, render_scale, quality["rounded"], label)
+    cached = body_cache.get(key)
+    if cached is not None:
+        body_cache_stats["hits"] += 1
+        return cached
+    body_cache_stats["misses"] += 1
+    if len(body_cache) >= BODY_CACHE_MAX:
+        body_cache.clear()
+    w, h = f.rect.size
+    text = render_text(f.state.name, font_small, WHITE) if label else None
+    top = px(LABEL_RISE) if label else 0
+    surf = pygame.Surface((max(px(w), text.get_width() if text else 0),
+                           max(top + px(h), text.get_height() if text else 0)), pygame.SRCALPHA)
+    body = pygame.Rect(0, top, px(w), px(h))
+    pygame.draw.rect(surf, STATE_COLORS.get(f.state, f.color), body, border_radius=corner(6))
+    pygame.draw.rect(surf, (0, 0, 0), body, max(1, px(2)), border_radius=corner(6))
+    pygame.draw.circle(surf, WHITE, (px(w // 2 + (w // 4) * f.facing), top + px(24)), px(4))
+    if text:
+        surf.blit(text, (0, 0))
+    if pygame.display.get_surface():
+        surf = surf.convert_alpha()
+    cached = body_cache[key] = (surf, top)
+    return cached
+
+def shadow_surface():
+    key = ("shadow", render_scale)
+    surf = body_cache.get(key)
+    if surf is None:
+        surf = pygame.Surface((px(36), px(8)), pygame.SRCALPHA)
+        pygame.draw.ellipse(surf, (20, 20, 26), surf.get_rect())
+        if pygame.display.get_surface():
+            surf = surf.convert_alpha()
+        body_cache[key] = surf
+    return surf
 
 # -------------- Game Systems --------------
 def resolve_hits(p1, p2):
     # Attack-vs-Body, with block check
-    for atk, vic in ((p1, p2), (p2, p1)):
-        if atk.hitbox:
-            # Blocking works if victim is in block state and facing attacker
-            is_blocking = vic.blocking and (vic.facing == -atk.facing) and vic.on_ground and vic.guard_stun == 0
-            move = MOVES[atk.attack_name] if atk.attack_name else None
-            if atk.hitbox.colliderect(vic.rect) and move:
-                dmg = move["damage"]
-                kb = move["knockback"]
-                hitstop = move["hitstop"]
-                vic.take_hit(
-                    dmg=int(dmg * (1 - BLOCK_REDUCTION)) if is_blocking else dmg,
-                    kb=kb//2 if is_blocking else kb,
-                    hitstop_frames=hitstop,
-                    airborne=not vic.on_ground,
-                    blocked=is_blocking
-                )
-                # Attacker also experiences hitstop
-                atk.hitstop = min(HITSTOP_MAX, hitstop)
-                # Prevent multi-hits per swing
-                atk.hitbox = None
+    resolve_hit(p1, p2)
+    resolve_hit(p2, p1)
+
+def resolve_hit(atk, vic):
+    if atk.hitbox:
+        # Blocking works if victim is in block state and facing attacker
+        is_blocking = vic.blocking and (vic.facing == -atk.facing) and vic.on_ground and vic.guard_stun == 0
+        move = MOVES[atk.attack_name] if atk.attack_name else None
+        if atk.hitbox.colliderect(vic.rect) and move:
+            dmg = move["damage"]
+            kb = move["knockback"]
+            hitstop = move["hitstop"]
+            if is_blocking:
+                dmg = int(dmg * (1 - BLOCK_REDUCTION))
+            if telemetry:
+                telemetry.contact(atk, is_blocking, dmg)
+            vic.take_hit(
+                dmg=dmg,
+                kb=kb//2 if is_blocking else kb,
+                hitstop_frames=hitstop,
+                airborne=not vic.on_ground,
+                blocked=is_blocking
+            )
+            # Attacker also experiences hitstop
+            atk.hitstop = min(HITSTOP_MAX, hitstop)
+            # Prevent multi-hits per swing
+            atk.hitbox = None
+
+def limit_separation(p1, p2, x1, x2):
+    # Keep both fighters inside one screen: whoever moved outward this frame
+    # (x1, x2 are the positions before physics) is pulled back
+    excess = max(p1.rect.right, p2.rect.right) - min(p1.rect.left, p2.rect.left) - MAX_SEPARATION
+    if excess <= 0:
+        return
+    if p1.rect.centerx <= p2.rect.centerx:
+        left, right, lx, rx = p1, p2, x1, x2
+    else:
+        left, right, lx, rx = p2, p1, x2, x1
+    back = min(excess, max(0, right.rect.x - rx))
+    right.rect.x -= back
+    left.rect.x += min(excess - back, max(0, lx - left.rect.x))
 
 def update_facing(p1, p2):
     if p1.rect.centerx < p2.rect.centerx:
@@ -453,8 +915,8 @@ def round_over_check(p1, p2, timer_frames):
     return 0
 
 def reset_round(p1, p2):
-    p1.rect.topleft = (200, GROUND_Y - p1.base_h)
-    p2.rect.topleft = (WIDTH - 260, GROUND_Y - p2.base_h)
+    p1.rect.topleft = (P1_SPAWN_X, GROUND_Y - p1.base_h)
+    p2.rect.topleft = (P2_SPAWN_X, GROUND_Y - p2.base_h)
     p1.facing, p2.facing = 1, -1
     p1.vel_y = p2.vel_y = 0
     p1.on_ground = p2.on_ground = True
@@ -468,32 +930,153 @@ def reset_round(p1, p2):
     p1.hitstop = p2.hitstop = 0
     p1.stamina = p2.stamina = 100
 
-def draw_timer_and_score(timer_frames, p1, p2, rounds_to_win):
+# Timer digits, formatted once
+TIMER_TEXT = [f"{s:02d}" for s in range(ROUND_TIME_SECONDS + 1)]
+
+def draw_pips(surf, x, y, won, color, count):
+    for i in range(count):
+        r = scaled_rect(x + i*22, y, 16, 16, BG_RECT)
+        draw_rect(surf, GREY, r, radius=corner(4))
+        if i < won:
+            draw_rect(surf, color, r, radius=corner(4))
+        draw_rect(surf, WHITE, r, max(1, px(2)), corner(4))
+
+def draw_timer_and_score(surf, timer_frames, p1, p2, rounds_to_win):
     secs = max(0, timer_frames // (FPS))
-    center_text(screen, f"{secs:02d}", font_big, WHITE, 60)
+    center_text(surf, TIMER_TEXT[secs], font_big, WHITE, 60)
     # Round pips
-    def pips(x, y, won, color):
-        for i in range(rounds_to_win):
-            r = pygame.Rect(x + i*22, y, 16, 16)
-            pygame.draw.rect(screen, GREY, r, border_radius=4)
-            if i < won:
-                pygame.draw.rect(screen, color, r, border_radius=4)
-            pygame.draw.rect(screen, WHITE, r, 2, border_radius=4)
-    pips(40, 56, p1.round_won, BLUE)
-    pips(WIDTH-40-22*rounds_to_win, 56, p2.round_won, RED)
-
-def draw_title(menu_index):
-    draw_arena(screen)
-    center_text(screen, "Python Fighting Game", font_big, YELLOW, 160)
-    options = ["Start", "How to Play", "Quit"]
+    draw_pips(surf, 40, 56, p1.round_won, BLUE, rounds_to_win)
+    draw_pips(surf, WIDTH-40-22*rounds_to_win, 56, p2.round_won, RED, rounds_to_win)
+
+class Match:
+    # One match of simulation state, shared by the game loop and headless tools
+    def __init__(self, p1=None, p2=None):
+        self.p1 = p1 or Fighter(P1_SPAWN_X, GROUND_Y, BLUE, P1_BITS, name="Player 1")
+        self.p2 = p2 or Fighter(P2_SPAWN_X, GROUND_Y, RED, P2_BITS, name="Player 2")
+        self.p2.facing = -1
+        self.round_timer = ROUND_TIME_SECONDS * FPS
+        self.frame = 0
+
+    def start(self):
+        self.p1.round_won = self.p2.round_won = 0
+        self.next_round()
+
+    def next_round(self):
+        self.p1.health = self.p1.max_health
+        self.p2.health = self.p2.max_health
+        reset_round(self.p1, self.p2)
+        self.round_timer = ROUND_TIME_SECONDS * FPS
+        if telemetry:
+            telemetry.frame = self.frame
+            telemetry.round_start()
+
+    def snapshot(self):
+        return (self.frame, self.round_timer, self.p1.snapshot(), self.p2.snapshot())
+
+    def restore(self, snap):
+        self.frame, self.round_timer, s1, s2 = snap
+        self.p1.restore(s1)
+        self.p2.restore(s2)
+
+    def match_over(self):
+        return self.p1.round_won >= ROUNDS_TO_WIN or self.p2.round_won >= ROUNDS_TO_WIN
+
+    def step(self, keys):
+        return self.step_masks(encode_input(keys, self.p1.controls), encode_input(keys, self.p2.controls))
+
+    def step_masks(self, m1, m2):
+        # Advance one PLAYING frame; returns the round result from round_over_check
+        p1, p2 = self.p1, self.p2
+        self.frame += 1
+        if telemetry:
+            telemetry.frame = self.frame
+
+        # Facing
+        update_facing(p1, p2)
+
+        # Input
+        dx1 = p1.input_mask(m1)
+        dx2 = p2.input_mask(m2)
+
+        # Physics and state advance
+        x1, x2 = p1.rect.x, p2.rect.x
+        p1.physics(dx1)
+        p2.physics(dx2)
+        limit_separation(p1, p2, x1, x2)
+
+        # Attacks
+        p1.update_attack()
+        p2.update_attack()
+
+        # Guard lock
+        if p1.guard_stun > 0:
+            p1.state = State.BLOCK
+        if p2.guard_stun > 0:
+            p2.state = State.BLOCK
+
+        # Resolve collisions
+        resolve_hits(p1, p2)
+
+        # Timer
+        if p1.hitstop == 0 and p2.hitstop == 0:
+            self.round_timer = max(0, self.round_timer - 1)
+
+        # Round over
+        rw = round_over_check(p1, p2, self.round_timer)
+        if rw and telemetry:
+            telemetry.round_end(rw, self.round_timer)
+        if rw == 1:
+            p1.round_won += 1
+        elif rw == 2:
+            p2.round_won += 1
+        return rw
+
+def draw_match(surf, match, hud=True, labels=True, debug=False):
+    global camera_x
+    if hud or labels:
+        init_fonts()
+    camera_x = camera_for(match.p1, match.p2)
+    draw_arena(surf)
+
+    # UI
+    if hud:
+        draw_health_bar(surf, 40, 30, 360, 20, match.p1.health, match.p1.max_health, BLUE)
+        draw_health_bar(surf, WIDTH - 400, 30, 360, 20, match.p2.health, match.p2.max_health, RED)
+        draw_timer_and_score(surf, match.round_timer, match.p1, match.p2, ROUNDS_TO_WIN)
+
+    # Draw fighters
+    match.p1.draw(surf, debug, label=labels)
+    match.p2.draw(surf, debug, label=labels)
+
+MENU_OPTIONS = ["Start", "Player 2", "Training", "How to Play", "Quit"]
+MENU_PLAYER2 = MENU_OPTIONS.index("Player 2")
+# CPU opponents offered on the title screen, those registered in bots.BOTS
+MENU_CPUS = ("table-v1", "table-v1-easy", "rush-v3", "turtle-v2", "jumper-v1")
+
+def cpu_choices(picked=None):
+    # Player 2 on the title screen: a human (None), the bot picked with
+    # --cpu if any, then the menu's CPUs
+    from bots import BOTS
+    choices = [None] + [name for name in MENU_CPUS if name in BOTS]
+    if picked not in choices:
+        choices.insert(1, picked)
+    return choices
+
+def draw_title(surf, menu_index, cpu_name=None):
+    draw_arena(surf)
+    center_text(surf, "Python Fighting Game", font_big, YELLOW, 160)
+    options = MENU_OPTIONS
     for i, text in enumerate(options):
         col = WHITE if i != menu_index else YELLOW
-        center_text(screen, text, font_mid, col, 240 + i*46, outline=False)
-    center_text(screen, "Use Up/Down and Enter", font_small, GREY, 240 + len(options)*46 + 20, outline=False)
-
-def draw_how_to_play():
-    draw_arena(screen)
-    center_text(screen, "How to Play", font_big, YELLOW, 80)
+        if i == MENU_PLAYER2:
+            text = f"Player 2: {'CPU ' + cpu_name if cpu_name else 'Human'}"
+        center_text(surf, text, font_mid, col, 240 + i*46, outline=False)
+    center_text(surf, "Use Up/Down and Enter, Left/Right to pick Player 2", font_small, GREY,
+                240 + len(options)*46 + 20, outline=False)
+
+def draw_how_to_play(surf):
+    draw_arena(surf)
+    center_text(surf, "How to Play", font_big, YELLOW, 80)
     lines = [
         "Goal: Deplete opponent's health or win by timer.",
         "P1: A/D move, W jump, S crouch, Shift dash, H block, F light, G heavy.",
@@ -503,19 +1086,73 @@ def draw_how_to_play():
         "Light = fast, Heavy = slower but stronger, Crouch Light = low hit.",
         "Jump Light hits in air; juggles on air hit.",
         "Best of 3 rounds; press Esc to pause.",
+        "Training: F5-F8 save state, 1-4 load, P/N frame step, M slow motion.",
         "Enter to go back."
     ]
     for i, t in enumerate(lines):
-        center_text(screen, t, font_small, WHITE, 130 + i*30, outline=False)
+        center_text(surf, t, font_small, WHITE, 130 + i*30, outline=False)
+
+pause_overlay = None
+
+def draw_pause(surf):
+    global pause_overlay
+    if pause_overlay is None or pause_overlay.get_size() != canvas.get_size():
+        pause_overlay = pygame.Surface(canvas.get_size(), pygame.SRCALPHA)
+        pause_overlay.fill((0,0,0,150))
+    draw_image(surf, pause_overlay, 0, 0)
+    center_text(surf, "Paused", font_big, YELLOW, HEIGHT//2 - 20)
+    center_text(surf, "Esc to resume, R to restart round, Q to quit to title", font_small, WHITE, HEIGHT//2 + 20, outline=False)
+
+# Assets worth loading early, by the state about to be entered
+NEXT_STATES = {
+    GameState.TITLE: (GameState.PLAYING, GameState.HOW_TO_PLAY),
+    GameState.HOW_TO_PLAY: (GameState.PLAYING,),
+    GameState.TRAINING: (GameState.TITLE,),
+    GameState.PLAYING: (GameState.ROUND_END, GameState.PAUSED),
+    GameState.ROUND_END: (GameState.MATCH_END,),
+    GameState.MATCH_END: (GameState.TITLE,),
+}
 
-def draw_pause():
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0,0,0,150))
-    screen.blit(overlay, (0,0))
-    center_text(screen, "Paused", font_big, YELLOW, HEIGHT//2 - 20)
-    center_text(screen, "Esc to resume, R to restart round, Q to quit to title", font_small, WHITE, HEIGHT//2 + 20, outline=False)
+# States that only change on input: drawn once, then main() sleeps in
+# pygame.event.wait until something happens. The debug overlay's fps
+# readout is the only thing animating there, so it sets a wake-up interval.
+IDLE_STATES = {GameState.TITLE, GameState.HOW_TO_PLAY, GameState.PAUSED, GameState.ROUND_END, GameState.MATCH_END}
+IDLE_ANIMATION_MS = 500
+# Events that don't change anything on an idle screen
+IDLE_IGNORED_EVENTS = {pygame.MOUSEMOTION, pygame.MOUSEWHEEL, pygame.ACTIVEEVENT, pygame.NOEVENT}
+
+# States drawn over the match
+MATCH_STATES = {GameState.PLAYING, GameState.PAUSED, GameState.ROUND_END, GameState.MATCH_END}
+
+# Browser build (pygbag): the loop yields to the page every frame instead of
+# sleeping in pygame.event.wait, assets decode between frames (no threads),
+# and optional ones arrive in a second archive after the first frame
+WEB = sys.platform == "emscripten"
+WEB_EXTRAS = "fight_game-extras.apk"
+ASSET_STEP_MS = 4
+
+def report_startup(path=None):
+    parts = ", ".join(f"{k} {v:.1f}" for k, v in startup_times.items() if k != "first_frame")
+    print(f"startup: {startup_times['first_frame']:.1f} ms import -> first title frame ({parts})")
+    if path:
+        with open(path, "a") as f:
+            f.write(json.dumps({"time": time.time(), **startup_times}) + "\n")
+
+async def main(record_path=None, startup_report=False, startup_log=None, audio_buffer=None,
+         fullscreen=False, render_size="960x540", quality_tier="auto", broadcast_addr=None, telemetry_dir=None,
+         sim_process=False, cpu_name=None, renderer_name="pygame"):
+    global assets, voices, telemetry, MIXER_BUFFER
+    if audio_buffer:
+        MIXER_BUFFER = audio_buffer
+    startup_times["main"] = (time.perf_counter() - _IMPORT_T0) * 1000
+    base_scale = RENDER_SIZES[render_size]
+    init_display(fullscreen, base_scale)
+    from assets import AssetManager
+    assets = AssetManager.from_manifest().start()
+    from audio import VoiceManager
+    voices = VoiceManager(assets)
+    startup_times["assets"] = (time.perf_counter() - _IMPORT_T0) * 1000
 
-def main():
     # Controls
     p1_controls = {
         'left': pygame.K_a,
@@ -539,43 +1176,142 @@ def main():
     }
 
     # Fighters
-    p1 = Fighter(200, GROUND_Y, BLUE, p1_controls, name="Player 1")
-    p2 = Fighter(WIDTH - 260, GROUND_Y, RED, p2_controls, name="Player 2")
-    p2.facing = -1
+    match = Match(Fighter(P1_SPAWN_X, GROUND_Y, BLUE, p1_controls, name="Player 1"),
+                  Fighter(P2_SPAWN_X, GROUND_Y, RED, p2_controls, name="Player 2"))
+    p1, p2 = match.p1, match.p2
+    # Without an atlas fighters keep the cached rectangle bodies
+    from sprites import load_fighter_sprites
+    p1.sprites = load_fighter_sprites()
+    p2.sprites = load_fighter_sprites()
+
+    # Quality: fixed tier, or governed by frame time
+    from quality import QualityGovernor
+    tier_names = [t["name"] for t in QUALITY_TIERS]
+    governor = None
+    if quality_tier == "auto":
+        governor = QualityGovernor(len(QUALITY_TIERS), 1000 / FPS)
+    else:
+        set_quality(tier_names.index(quality_tier), base_scale)
+    show_debug = False
+
+    # Input recording (see replay.py) and live broadcast (see spectate.py)
+    replay = None
+    broadcast = None
+    if broadcast_addr:
+        import spectate
+        host, _, port = broadcast_addr.partition(":")
+        broadcast = spectate.BroadcastSource(host, int(port or spectate.DEFAULT_PORT))
+
+    # Match statistics (see telemetry.py)
+    if telemetry_dir:
+        from telemetry import Telemetry
+        telemetry = Telemetry()
+
+    # Player 2 played by a bot (see bots.py; picked on the title screen or
+    # with --cpu, made when a match starts), and the match simulated in a
+    # separate process (see simproc.py); match here is then only drawn from
+    cpu = None
+    cpu_menu = cpu_choices(cpu_name)
+    sim = None
+    if sim_process:
+        from simproc import SimClient
+        sim = SimClient(cpu_name)
+
+    # Training mode (see training.py)
+    from training import TrainingMode
+    training = None
+
+    # Each frame is drawn as a command list, run by a backend (see render.py)
+    from render import make_backend
+    renderer = make_backend(renderer_name)
 
     # Game state
     state = GameState.TITLE
     menu_index = 0
-    round_timer = ROUND_TIME_SECONDS * FPS
     round_winner = 0
     match_winner = 0
 
+    prev_state = None
+    redraw = True
+    was_idle = False
     running = True
     while running:
-        dt = clock.tick(FPS)
-        for event in pygame.event.get():
+        await asyncio.sleep(0)
+        if "first_frame" in startup_times:
+            assets.step(ASSET_STEP_MS)
+        idle = state in IDLE_STATES and not redraw and not WEB
+        if idle:
+            # Nothing on screen changes until an event (or the overlay's next tick)
+            events = [pygame.event.wait(IDLE_ANIMATION_MS if show_debug else 0)] + pygame.event.get()
+            redraw = show_debug or any(e.type not in IDLE_IGNORED_EVENTS for e in events)
+        else:
+            dt = clock.tick(FPS)
+            events = pygame.event.get()
+        voices.begin_frame()
+        if governor and not idle and not was_idle:
+            # Work time of the last frame, without the frame-cap delay
+            tier = governor.update(clock.get_rawtime())
+            if tier is not None:
+                set_quality(tier, base_scale)
+        was_idle = idle
+        if state != prev_state:
+            assets.prefer(state, *NEXT_STATES.get(state, ()))
+            prev_state = state
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F11:
+                pygame.display.toggle_fullscreen()
+                renderer.invalidate()
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                renderer.invalidate()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                show_debug = not show_debug
 
             if state == GameState.TITLE:
                 if event.type == pygame.KEYDOWN:
                     if event.key in (pygame.K_UP, pygame.K_w):
-                        menu_index = (menu_index - 1) % 3
-                        if SND_SELECT: SND_SELECT.play()
+                        menu_index = (menu_index - 1) % len(MENU_OPTIONS)
+                        play_sound("select")
                     elif event.key in (pygame.K_DOWN, pygame.K_s):
-                        menu_index = (menu_index + 1) % 3
-                        if SND_SELECT: SND_SELECT.play()
+                        menu_index = (menu_index + 1) % len(MENU_OPTIONS)
+                        play_sound("select")
+                    elif event.key in (pygame.K_LEFT, pygame.K_a, pygame.K_RIGHT, pygame.K_d):
+                        if menu_index == MENU_PLAYER2:
+                            step = -1 if event.key in (pygame.K_LEFT, pygame.K_a) else 1
+                            cpu_name = cpu_menu[(cpu_menu.index(cpu_name) + step) % len(cpu_menu)]
+                            play_sound("select")
                     elif event.key in (pygame.K_RETURN, pygame.K_SPACE):
                         if menu_index == 0:
                             # Start
-                            p1.health = p1.max_health
-                            p2.health = p2.max_health
-                            p1.round_won = p2.round_won = 0
-                            reset_round(p1, p2)
-                            round_timer = ROUND_TIME_SECONDS * FPS
+                            if sim:
+                                sim.set_cpu(cpu_name)
+                            elif cpu_name:
+                                from bots import make_bot
+                                cpu = make_bot(cpu_name, 1)
+                            else:
+                                cpu = None
+                            if telemetry:
+                                telemetry.begin_match(os.path.join(telemetry_dir, time.strftime("match-%Y%m%d-%H%M%S.fgt")),
+                                                      p1, p2)
+                            match.start()
+                            if sim:
+                                sim.command("start")
+                            if record_path:
+                                from replay import Replay
+                                replay = Replay()
+                            if broadcast:
+                                broadcast.send_marker(spectate.MSG_NEW_MATCH)
                             state = GameState.PLAYING
-                            if SND_START: SND_START.play()
-                        elif menu_index == 1:
+                            play_sound("start")
+                        elif menu_index == MENU_PLAYER2:
+                            cpu_name = cpu_menu[(cpu_menu.index(cpu_name) + 1) % len(cpu_menu)]
+                            play_sound("select")
+                        elif menu_index == 2:
+                            match.start()
+                            training = TrainingMode(match)
+                            state = GameState.TRAINING
+                        elif menu_index == 3:
                             state = GameState.HOW_TO_PLAY
                         else:
                             running = False
@@ -588,30 +1324,40 @@ def main():
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                     state = GameState.PAUSED
 
+            elif state == GameState.TRAINING:
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                    state = GameState.TITLE
+                elif event.type == pygame.KEYDOWN:
+                    training.handle_key(event.key)
+
             elif state == GameState.PAUSED:
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         state = GameState.PLAYING
                     elif event.key == pygame.K_r:
                         # Restart current round
-                        p1.health = p1.max_health
-                        p2.health = p2.max_health
-                        reset_round(p1, p2)
-                        round_timer = ROUND_TIME_SECONDS * FPS
+                        match.next_round()
+                        if sim:
+                            sim.command("next_round")
+                        if replay is not None:
+                            replay.mark_reset()
+                        if broadcast:
+                            broadcast.send_marker(spectate.MSG_RESET)
                         state = GameState.PLAYING
                     elif event.key == pygame.K_q:
+                        if telemetry:
+                            telemetry.end_match()
                         state = GameState.TITLE
 
             elif state == GameState.ROUND_END:
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
                     # Next round or match end handling
-                    if p1.round_won >= ROUNDS_TO_WIN or p2.round_won >= ROUNDS_TO_WIN:
+                    if match.match_over():
                         state = GameState.MATCH_END
                     else:
-                        p1.health = p1.max_health
-                        p2.health = p2.max_health
-                        reset_round(p1, p2)
-                        round_timer = ROUND_TIME_SECONDS * FPS
+                        match.next_round()
+                        if sim:
+                            sim.command("next_round")
                         state = GameState.PLAYING
 
             elif state == GameState.MATCH_END:
@@ -620,87 +1366,115 @@ def main():
                         # Back to title
                         state = GameState.TITLE
 
+        if not redraw and state in IDLE_STATES:
+            continue
+        drawn_state = state
         keys = pygame.key.get_pressed()
+        if sim:
+            sim.set_active(state == GameState.PLAYING)
 
         # Logic and drawing
+        cmds = renderer.begin()
         if state == GameState.TITLE:
-            draw_title(menu_index)
+            draw_title(cmds, menu_index, cpu_name)
 
         elif state == GameState.HOW_TO_PLAY:
-            draw_how_to_play()
-
-        elif state in (GameState.PLAYING, GameState.PAUSED, GameState.ROUND_END, GameState.MATCH_END):
-            draw_arena(screen)
+            draw_how_to_play(cmds)
 
-            # UI
-            draw_health_bar(screen, 40, 30, 360, 20, p1.health, p1.max_health, BLUE)
-            draw_health_bar(screen, WIDTH - 400, 30, 360, 20, p2.health, p2.max_health, RED)
-            draw_timer_and_score(round_timer, p1, p2, ROUNDS_TO_WIN)
+        elif state == GameState.TRAINING:
+            training.update(keys)
+            draw_match(cmds, match, debug=True)
+            training.draw(cmds)
 
+        elif state in MATCH_STATES:
             if state == GameState.PLAYING:
-                # Facing
-                update_facing(p1, p2)
-
-                # Input
-                dx1 = p1.input(keys)
-                dx2 = p2.input(keys)
-
-                # Physics and state advance
-                p1.physics(dx1)
-                p2.physics(dx2)
-
-                # Attacks
-                p1.update_attack()
-                p2.update_attack()
-
-                # Guard lock
-                if p1.guard_stun > 0:
-                    p1.state = State.BLOCK
-                if p2.guard_stun > 0:
-                    p2.state = State.BLOCK
-
-                # Resolve collisions
-                resolve_hits(p1, p2)
-
-                # Timer
-                if p1.hitstop == 0 and p2.hitstop == 0:
-                    round_timer = max(0, round_timer - 1)
-
-                # Round over
-                rw = round_over_check(p1, p2, round_timer)
+                m1, m2 = encode_input(keys, p1_controls), encode_input(keys, p2_controls)
+                if cpu:
+                    m2 = cpu.act(p2, p1)
+                if replay is not None:
+                    replay.record(m1, m2)
+                if broadcast:
+                    broadcast.send_frame(m1, m2)
+                rw = sim.step(m1, m2, match) if sim else match.step_masks(m1, m2)
                 if rw != 0:
                     round_winner = rw
-                    if rw == 1:
-                        p1.round_won += 1
-                    elif rw == 2:
-                        p2.round_won += 1
                     state = GameState.ROUND_END
 
-            # Draw fighters
-            p1.draw(screen)
-            p2.draw(screen)
+            draw_match(cmds, match)
 
             # Overlays
             if state == GameState.PAUSED:
-                draw_pause()
+                draw_pause(cmds)
 
             if state == GameState.ROUND_END:
                 msg = "Draw" if round_winner == -1 else f"{'Player 1' if round_winner == 1 else 'Player 2'} Wins Round"
-                center_text(screen, msg, font_big, YELLOW, HEIGHT//2 - 20)
-                center_text(screen, "Press Enter for next round", font_small, WHITE, HEIGHT//2 + 20, outline=False)
-                if p1.round_won >= ROUNDS_TO_WIN or p2.round_won >= ROUNDS_TO_WIN:
+                center_text(cmds, msg, font_big, YELLOW, HEIGHT//2 - 20)
+                center_text(cmds, "Press Enter for next round", font_small, WHITE, HEIGHT//2 + 20, outline=False)
+                if match.match_over():
                     state = GameState.MATCH_END
                     match_winner = 1 if p1.round_won > p2.round_won else 2
+                    if replay is not None:
+                        replay.save(record_path)
+                        replay = None
+                    if telemetry:
+                        telemetry.end_match()
 
             if state == GameState.MATCH_END:
                 msg = f"Player {match_winner} Wins Match!"
-                center_text(screen, msg, font_big, YELLOW, HEIGHT//2 - 20)
-                center_text(screen, "Press Enter to return to Title", font_small, WHITE, HEIGHT//2 + 20, outline=False)
-
-        pygame.display.flip()
-
+                center_text(cmds, msg, font_big, YELLOW, HEIGHT//2 - 20)
+                center_text(cmds, "Press Enter to return to Title", font_small, WHITE, HEIGHT//2 + 20, outline=False)
+
+        if show_debug:
+            draw_debug_overlay(cmds, clock.get_fps(), governor.mean_ms if governor else clock.get_rawtime(),
+                               renderer)
+        if renderer.run(canvas):
+            present()
+        # Idle screens stay as drawn unless the frame changed state
+        redraw = state != drawn_state
+        if "first_frame" not in startup_times:
+            startup_times["first_frame"] = (time.perf_counter() - _IMPORT_T0) * 1000
+            if startup_report or startup_log or WEB:
+                report_startup(startup_log)
+            if WEB:
+                assets.mount_pack(WEB_EXTRAS)
+
+    if broadcast:
+        broadcast.close()
+    if sim:
+        sim.close()
+    if telemetry:
+        telemetry.close()
     pygame.quit()
     sys.exit()
 
 if __name__ == "__main__":
-    main()
+    # Helper modules import "main"; share this module instead of loading a second copy
+    sys.modules.setdefault("main", sys.modules[__name__])
+
+    import argparse
+    parser = argparse.ArgumentParser(description="Python Fighting Game")
+    parser.add_argument("--record", metavar="PATH", help="save each finished match's inputs as a replay")
+    parser.add_argument("--startup-report", action="store_true", help="print time from import to the first title frame")
+    parser.add_argument("--startup-log", metavar="PATH", help="append startup timings to PATH as JSON lines")
+    parser.add_argument("--audio-buffer", type=int, metavar="SAMPLES", help=f"mixer buffer size (default {MIXER_BUFFER})")
+    parser.add_argument("--fullscreen", action="store_true", help="start fullscreen (F11 toggles)")
+    parser.add_argument("--render-size", choices=sorted(RENDER_SIZES), default="960x540",
+                        help="internal resolution, upscaled to the window")
+    parser.add_argument("--quality", choices=["auto"] + [t["name"] for t in QUALITY_TIERS], default="auto",
+                        help="drawing quality; auto adapts to frame time (F3 shows the debug overlay)")
+    parser.add_argument("--broadcast", metavar="HOST[:PORT]", help="stream matches to a spectate.py server")
+    parser.add_argument("--telemetry", metavar="DIR", help="write per-match statistics files to DIR")
+    from bots import BOTS
+    parser.add_argument("--cpu", choices=sorted(BOTS), metavar="BOT", help="let a bot from bots.py play Player 2")
+    parser.add_argument("--sim-process", action="store_true",
+                        help="simulate matches in a separate process (not with --record, --broadcast, --telemetry)")
+    from render import BACKENDS
+    parser.add_argument("--renderer", choices=sorted(BACKENDS), default="pygame",
+                        help="pygame redraws what changed, full redraws every frame, null draws nothing")
+    args = parser.parse_args()
+    if args.sim_process and (args.record or args.broadcast or args.telemetry):
+        parser.error("--sim-process records nothing: drop --record, --broadcast and --telemetry")
+    asyncio.run(main(record_path=args.record, startup_report=args.startup_report, startup_log=args.startup_log,
+                     audio_buffer=args.audio_buffer, fullscreen=args.fullscreen, render_size=args.render_size,
+                     quality_tier=args.quality, broadcast_addr=args.broadcast, telemetry_dir=args.telemetry,
+                     sim_process=args.sim_process, cpu_name=args.cpu, renderer_name=args.renderer))
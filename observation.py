@@ -0,0 +1,84 @@
+import numpy as np
+import pygame
+
+from main import WIDTH, HEIGHT, Match, draw_match
+
+# Luma weights in 8.8 fixed point (sum to 256)
+GRAY_WEIGHTS = (77, 150, 29)
+
+class PixelObserver:
+    # Renders a match into an offscreen surface and returns frames as arrays.
+    # The surface is read through a surfarray view (no copy) and sampled with
+    # precomputed nearest-neighbour indices into a preallocated array that is
+    # reused every step, so callers must copy it if they keep it.
+    def __init__(self, size=(84, 84), grayscale=True, hud=False, labels=False):
+        self.size = size
+        self.grayscale = grayscale
+        self.hud = hud
+        self.labels = labels
+        self.surface = pygame.Surface((WIDTH, HEIGHT), 0, 32)
+        self.shifts = self.surface.get_shifts()[:3]
+
+        # Flat pixel offsets for each output (row, col); the 2D view is
+        # column-major with one uint32 per pixel
+        w, h = size
+        row_len = self.surface.get_pitch() // 4
+        xs = np.arange(w) * WIDTH // w
+        ys = np.arange(h) * HEIGHT // h
+        self.index = (ys[:, None] * row_len + xs[None, :]).astype(np.intp)
+
+        self._packed = np.empty((h, w), dtype=np.uint32)
+        self._chan = np.empty((h, w), dtype=np.uint32)
+        self._acc = np.empty((h, w), dtype=np.uint32)
+        if grayscale:
+            self.out = np.empty((h, w), dtype=np.uint8)
+        else:
+            self.out = np.empty((h, w, 3), dtype=np.uint8)
+
+    def render(self, match):
+        draw_match(self.surface, match, hud=self.hud, labels=self.labels)
+
+    def _channel(self, c):
+        np.right_shift(self._packed, self.shifts[c], out=self._chan)
+        np.bitwise_and(self._chan, 0xFF, out=self._chan)
+        return self._chan
+
+    def observe(self, match):
+        self.render(match)
+        # The view locks the surface, so it only lives for this call
+        view = pygame.surfarray.pixels2d(self.surface)
+        try:
+            np.take(view.ravel(order="F"), self.index, out=self._packed)
+        finally:
+            del view
+
+        if self.grayscale:
+            acc = self._acc
+            np.multiply(self._channel(0), GRAY_WEIGHTS[0], out=acc)
+            for c in (1, 2):
+                np.multiply(self._channel(c), GRAY_WEIGHTS[c], out=self._chan)
+                np.add(acc, self._chan, out=acc)
+            np.right_shift(acc, 8, out=acc)
+            np.copyto(self.out, acc, casting="unsafe")
+        else:
+            for c in range(3):
+                np.copyto(self.out[:, :, c], self._channel(c), casting="unsafe")
+        return self.out
+
+class PixelEnv:
+    # Minimal stepping wrapper for vision agents driving both fighters with
+    # BUTTONS bitmasks
+    def __init__(self, size=(84, 84), grayscale=True, hud=False):
+        self.match = Match()
+        self.observer = PixelObserver(size, grayscale, hud)
+
+    def reset(self):
+        self.match.start()
+        return self.observer.observe(self.match)
+
+    def step(self, mask1, mask2):
+        rw = self.match.step_masks(mask1, mask2)
+        done = rw != 0
+        if done and not self.match.match_over():
+            self.match.next_round()
+        return self.observer.observe(self.match), rw, done
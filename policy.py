@@ -0,0 +1,172 @@
+import argparse
+import copy
+import json
+import os
+import random
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from bots import (ACTIONS, BOTS, CELLS, DIMS, POLICY_MAGIC, POLICY_PATH, POLICY_VERSION, Bot, TableBot, action_mask,
+                  make_bot, policy_cell, policy_header)
+from main import Match, State
+
+# -------------- Policy table builder --------------
+# Builds the table TableBot plays from (see bots.py). Workers play
+# behaviour matches between scripted bots and a random explorer; every
+# SAMPLE_EVERY frames, for each fighter that can act, the match is
+# snapshotted and every action is tried: held for HOLD frames, then
+# standing still until HORIZON, against a copy of the opponent bot. The
+# action's score is damage dealt minus damage taken. Workers return per
+# cell sums and counts, the parent adds them up and keeps the best mean
+# action per cell. Cells never sampled take the best action of a coarser
+# cell (distance and the opponent's state and phase, then distance alone).
+
+HOLD = 6
+HORIZON = 40
+SAMPLE_EVERY = 10
+MAX_MATCH_FRAMES = 20000
+BEHAVIOUR = ("rush-v1", "rush-v2", "rush-v3", "turtle-v1", "turtle-v2", "jumper-v1", "random-v1", "explore")
+OPPONENTS = ("rush-v2", "rush-v3", "turtle-v2", "jumper-v1", "random-v1")
+BUSY = (State.ATTACK, State.HITSTUN, State.KODOWN)
+TOWARD = [a[0] for a in ACTIONS].index("toward")
+
+class Explorer(Bot):
+    # Uniformly random actions, to reach states the scripted bots avoid
+    def decide(self, me, opp):
+        return action_mask(self.rng.randrange(len(ACTIONS)), me, opp)
+
+def behaviour_bot(name, seed):
+    return Explorer(seed, reaction=6, noise=0) if name == "explore" else make_bot(name, seed)
+
+def score_actions(match, side, opp_bot, out):
+    # Fills out[a] with the score of each action from the current state;
+    # leaves the match as it found it
+    snap = match.snapshot()
+    for a in range(len(ACTIONS)):
+        match.restore(snap)
+        me, opp = (match.p1, match.p2) if side == 0 else (match.p2, match.p1)
+        health_me, health_opp = me.health, opp.health
+        bot = copy.deepcopy(opp_bot)
+        for t in range(HORIZON):
+            mine = action_mask(a, me, opp) if t < HOLD else 0
+            theirs = bot.act(opp, me)
+            if match.step_masks(*((mine, theirs) if side == 0 else (theirs, mine))):
+                break
+        out[a] = (health_opp - opp.health) - (health_me - me.health)
+    match.restore(snap)
+
+def sample(seed, samples):
+    # Runs in a worker; returns (sums, counts) over all cells
+    rng = random.Random(seed)
+    sums = np.zeros((CELLS, len(ACTIONS)))
+    counts = np.zeros(CELLS, np.int64)
+    scores = np.zeros(len(ACTIONS))
+    taken = 0
+    while taken < samples:
+        match = Match()
+        match.start()
+        bots = [behaviour_bot(rng.choice(BEHAVIOUR), rng.randrange(1 << 30)) for _ in range(2)]
+        rollout_opp = [make_bot(rng.choice(OPPONENTS), rng.randrange(1 << 30)) for _ in range(2)]
+        offset = rng.randrange(SAMPLE_EVERY)
+        p1, p2 = match.p1, match.p2
+        for frame in range(MAX_MATCH_FRAMES):
+            if frame % SAMPLE_EVERY == offset:
+                for side, (me, opp) in enumerate(((p1, p2), (p2, p1))):
+                    if me.state in BUSY or taken >= samples:
+                        continue
+                    cell = policy_cell(me, opp)
+                    score_actions(match, side, rollout_opp[1 - side], scores)
+                    sums[cell] += scores
+                    counts[cell] += 1
+                    taken += 1
+            rw = match.step_masks(bots[0].act(p1, p2), bots[1].act(p2, p1))
+            if rw:
+                if match.match_over():
+                    break
+                match.next_round()
+            if taken >= samples:
+                break
+    return sums, counts
+
+def best_actions(sums, counts):
+    # Best action per cell, falling back to coarser cells when unsampled.
+    # Every action of a cell has the same count, so the best sum is the
+    # best mean.
+    sums = sums.reshape(DIMS + (len(ACTIONS),))
+    counts = counts.reshape(DIMS)
+    other = (1, 4, 5, 6)                  # keep distance, opponent state and phase
+    coarse_counts = counts.sum(axis=other)
+    coarse = sums.sum(axis=other).argmax(-1)
+    by_distance = sums.sum(axis=(1, 2, 3, 4, 5, 6))
+    coarsest = np.where(counts.sum(axis=(1, 2, 3, 4, 5, 6)) > 0, by_distance.argmax(-1), TOWARD)
+    fallback = np.where(coarse_counts > 0, coarse, coarsest[:, None, None])
+    table = np.where(counts > 0, sums.argmax(-1), fallback[:, None, :, :, None, None, None])
+    return table.astype(np.uint8).ravel()
+
+def build(samples, workers=None, seed=0, tasks_per_worker=2):
+    workers = workers or os.cpu_count()
+    n = max(1, workers * tasks_per_worker)
+    per_task = [samples // n + (i < samples % n) for i in range(n)]
+    sums = np.zeros((CELLS, len(ACTIONS)))
+    counts = np.zeros(CELLS, np.int64)
+    with ProcessPoolExecutor(workers) as pool:
+        for s, c in pool.map(sample, [seed * 1000 + i for i in range(n)], per_task):
+            sums += s
+            counts += c
+    return best_actions(sums, counts), counts
+
+def save(path, table, info):
+    header = json.dumps({**policy_header(), **info}).encode()
+    tmp = path + ".tmp"
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(tmp, "wb") as f:
+        f.write(POLICY_MAGIC + struct.pack("<HI", POLICY_VERSION, len(header)) + header)
+        f.write(table.tobytes())
+    os.replace(tmp, path)
+
+# -------------- Evaluation --------------
+def decision_cost(path, frames=20000):
+    # Microseconds per decision for TableBot and a scripted bot
+    out = {}
+    match = Match()
+    match.start()
+    for name, bot in (("table", TableBot(0, path=path)), ("rush-v3", make_bot("rush-v3"))):
+        t0 = time.perf_counter()
+        for _ in range(frames):
+            bot.decide(match.p1, match.p2)
+        out[name] = (time.perf_counter() - t0) / frames * 1e6
+    return out
+
+def evaluate(path, matches, opponents=OPPONENTS):
+    # Table bot's score (1 win, 0.5 draw) against each opponent, on either
+    # side in turn
+    from ladder import play_match
+    BOTS["table-eval"] = lambda seed: TableBot(seed, path=path)
+    return {opp: sum(play_match("table-eval", opp, 2 * i, bool(i & 1))[0] for i in range(matches)) / matches
+            for opp in opponents}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the lookup-table CPU policy with headless rollouts")
+    parser.add_argument("--samples", type=int, default=20000, help="decision points to score")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=POLICY_PATH)
+    parser.add_argument("--eval", type=int, default=20, metavar="MATCHES", help="matches per opponent afterwards")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    table, counts = build(args.samples, args.workers, args.seed)
+    secs = time.perf_counter() - t0
+    save(args.out, table, {"samples": args.samples, "seed": args.seed, "hold": HOLD, "horizon": HORIZON})
+    print(f"{args.samples} samples in {secs:.0f}s ({args.samples / secs:.0f}/s); {np.count_nonzero(counts)} of "
+          f"{CELLS} cells sampled; wrote {args.out} ({os.path.getsize(args.out)} bytes)")
+    used = np.bincount(table, minlength=len(ACTIONS))
+    print("actions:", ", ".join(f"{a[0]} {n}" for a, n in zip(ACTIONS, used) if n))
+    cost = decision_cost(args.out)
+    print(f"decision cost: table {cost['table']:.2f} us, rush-v3 {cost['rush-v3']:.2f} us")
+    if args.eval:
+        for opp, score in evaluate(args.out, args.eval).items():
+            print(f"  vs {opp:10} {score:.2f}")
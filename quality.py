@@ -0,0 +1,49 @@
+from collections import deque
+
+# -------------- Quality governor --------------
+# Watches the rolling mean of per-frame work time (excluding the frame-cap
+# sleep) and moves one quality tier at a time. Stepping down happens once a
+# full window runs over the high-water mark; stepping up needs a full window
+# under the low-water mark and a cooldown since the last change, so the
+# tier does not flap between two neighbours.
+
+class QualityGovernor:
+    def __init__(self, num_tiers, budget_ms, tier=0, window=60, high=0.9, low=0.55, cooldown=180):
+        self.num_tiers = num_tiers
+        self.budget_ms = budget_ms
+        self.tier = tier
+        self.samples = deque(maxlen=window)
+        self.total = 0.0
+        self.high = high
+        self.low = low
+        self.cooldown = cooldown
+        self.since_change = 0
+
+    @property
+    def mean_ms(self):
+        return self.total / len(self.samples) if self.samples else 0.0
+
+    def update(self, frame_ms):
+        # Returns the new tier index when it changes, else None
+        if len(self.samples) == self.samples.maxlen:
+            self.total -= self.samples[0]
+        self.samples.append(frame_ms)
+        self.total += frame_ms
+        self.since_change += 1
+        if len(self.samples) < self.samples.maxlen:
+            return None
+
+        mean = self.mean_ms
+        if mean > self.high * self.budget_ms and self.tier < self.num_tiers - 1:
+            return self._set(self.tier + 1)
+        if (mean < self.low * self.budget_ms and self.tier > 0
+                and self.since_change >= self.cooldown):
+            return self._set(self.tier - 1)
+        return None
+
+    def _set(self, tier):
+        self.tier = tier
+        self.samples.clear()
+        self.total = 0.0
+        self.since_change = 0
+        return tier
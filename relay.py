@@ -0,0 +1,364 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import socket
+import struct
+import time
+from array import array
+
+# -------------- Netplay relay and lobby --------------
+# One UDP socket, one process. Players send HELLO with a room key (0 = quick
+# match); the first two players with the same key are paired into a session
+# and each gets a seat number (session * 2 + side). From then on a packet
+# whose second to fifth bytes are the sender's seat is forwarded byte for
+# byte to seat ^ 1, so the relay never parses or rebuilds game packets.
+#
+# Packets: type byte, then
+#   HELLO    uint64 room key                 client -> relay
+#   WAITING  (nothing)                       relay -> client
+#   MATCHED  uint32 seat                     relay -> client
+#   INPUT    uint32 seat, game payload       client -> relay -> peer
+#   PING     uint32 seat, uint64 relay ns    relay -> client, echoed back as PONG
+#   PONG     uint32 seat, uint64 relay ns
+#   BYE      uint32 seat                     either way; ends the session
+#   STATS    (nothing) / JSON                operator query and reply
+
+MSG_HELLO, MSG_WAITING, MSG_MATCHED, MSG_INPUT, MSG_PING, MSG_PONG, MSG_BYE, MSG_STATS = range(1, 9)
+HELLO = struct.Struct("<BQ")
+SEAT = struct.Struct("<BI")
+PING = struct.Struct("<BIQ")
+
+DEFAULT_PORT = 7302
+MAX_PACKET = 1500
+MAX_SESSIONS = 16384
+SWEEP_INTERVAL = 1.0      # seconds between pings and idle checks
+IDLE_SWEEPS = 10          # sweeps without traffic before a seat is dropped
+RTT_SMOOTHING = 0.2
+
+class Relay:
+    def __init__(self, max_sessions=MAX_SESSIONS, idle_sweeps=IDLE_SWEEPS):
+        # Everything per seat lives in flat preallocated arrays, indexed by seat
+        seats = max_sessions * 2
+        self.peers = [None] * seats              # address that owns the seat
+        self.idle = bytearray(seats)             # sweeps since the seat was last heard
+        self.rtt = array("d", bytes(8 * seats))  # smoothed round trip, ms
+        self.by_addr = {}                        # address -> seat, for HELLO retransmits
+        self.waiting = {}                        # room key -> (address, sweeps waited)
+        self.free = list(range(max_sessions - 1, -1, -1))
+        self.active = set()                      # sessions in use
+        self.idle_sweeps = idle_sweeps
+        self.buf = bytearray(MAX_PACKET)
+        self.view = memoryview(self.buf)
+        self.ping = bytearray(PING.size)
+        self.stats = {"relayed": 0, "rejected": 0, "sessions_opened": 0, "sessions_closed": 0}
+
+    # ---- socket ----
+    def open(self, host="0.0.0.0", port=DEFAULT_PORT):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+        self.port = self.sock.getsockname()[1]
+        return self
+
+    def on_readable(self):
+        # Drain the socket into the one preallocated buffer
+        sock, buf, view, peers, idle = self.sock, self.buf, self.view, self.peers, self.idle
+        recv, send, unpack_seat = sock.recvfrom_into, sock.sendto, SEAT.unpack_from
+        relayed = 0
+        while True:
+            try:
+                n, addr = recv(buf)
+            except BlockingIOError:
+                break
+            except OSError:
+                continue
+            if buf[0] == MSG_INPUT and n >= SEAT.size:
+                seat = unpack_seat(buf)[1]
+                if seat < len(peers) and peers[seat] == addr:
+                    idle[seat] = 0
+                    try:
+                        send(view[:n], peers[seat ^ 1])
+                        relayed += 1
+                    except OSError:
+                        pass
+                    continue
+                self.stats["rejected"] += 1
+            else:
+                self.control(n, addr)
+        self.stats["relayed"] += relayed
+
+    def control(self, n, addr):
+        kind, buf = self.buf[0], self.buf
+        if kind == MSG_HELLO and n >= HELLO.size:
+            self.hello(HELLO.unpack_from(buf)[1], addr)
+        elif kind == MSG_PONG and n >= PING.size:
+            _, seat, sent_ns = PING.unpack_from(buf)
+            if seat < len(self.peers) and self.peers[seat] == addr:
+                ms = (time.monotonic_ns() - sent_ns) / 1e6
+                self.rtt[seat] = ms if self.rtt[seat] == 0 else self.rtt[seat] + RTT_SMOOTHING * (ms - self.rtt[seat])
+                self.idle[seat] = 0
+        elif kind == MSG_BYE and n >= SEAT.size:
+            seat = SEAT.unpack_from(buf)[1]
+            if seat < len(self.peers) and self.peers[seat] == addr:
+                self.close(seat // 2, notify=seat ^ 1)
+        elif kind == MSG_STATS:
+            self.sock.sendto(bytes([MSG_STATS]) + json.dumps(self.summary()).encode(), addr)
+        else:
+            self.stats["rejected"] += 1
+
+    # ---- lobby ----
+    def hello(self, room, addr):
+        seat = self.by_addr.get(addr)
+        if seat is not None:
+            # Our MATCHED was lost; say it again
+            self.sock.sendto(SEAT.pack(MSG_MATCHED, seat), addr)
+            return
+        other = self.waiting.get(room)
+        if other is None or other[0] == addr:
+            self.waiting[room] = (addr, 0)
+            self.sock.sendto(bytes([MSG_WAITING]), addr)
+            return
+        if not self.free:
+            self.sock.sendto(bytes([MSG_WAITING]), addr)
+            return
+        del self.waiting[room]
+        session = self.free.pop()
+        self.active.add(session)
+        self.stats["sessions_opened"] += 1
+        for seat, who in ((session * 2, other[0]), (session * 2 + 1, addr)):
+            self.peers[seat] = who
+            self.idle[seat] = 0
+            self.rtt[seat] = 0.0
+            self.by_addr[who] = seat
+            self.sock.sendto(SEAT.pack(MSG_MATCHED, seat), who)
+
+    def close(self, session, notify=None):
+        for seat in (session * 2, session * 2 + 1):
+            addr = self.peers[seat]
+            if seat == notify and addr is not None:
+                self.sock.sendto(SEAT.pack(MSG_BYE, seat), addr)
+            self.by_addr.pop(addr, None)
+            self.peers[seat] = None
+        self.active.discard(session)
+        self.free.append(session)
+        self.stats["sessions_closed"] += 1
+
+    def sweep(self):
+        # Ping every seated player and drop sessions that went quiet
+        now = time.monotonic_ns()
+        for session in list(self.active):
+            for seat in (session * 2, session * 2 + 1):
+                if self.idle[seat] >= self.idle_sweeps:
+                    self.close(session, notify=seat ^ 1)
+                    break
+                self.idle[seat] += 1
+                PING.pack_into(self.ping, 0, MSG_PING, seat, now)
+                try:
+                    self.sock.sendto(self.ping, self.peers[seat])
+                except OSError:
+                    pass
+        for room, (addr, waited) in list(self.waiting.items()):
+            if waited >= self.idle_sweeps:
+                del self.waiting[room]
+            else:
+                self.waiting[room] = (addr, waited + 1)
+
+    def summary(self):
+        rtts = [self.rtt[s] for session in self.active for s in (session * 2, session * 2 + 1) if self.rtt[s]]
+        rtts.sort()
+        return {**self.stats, "sessions": len(self.active), "waiting": len(self.waiting),
+                "cpu_s": round(time.process_time(), 3),
+                "rtt_ms_p50": rtts[len(rtts) // 2] if rtts else None,
+                "rtt_ms_p99": rtts[len(rtts) * 99 // 100] if rtts else None}
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        loop.add_reader(self.sock.fileno(), self.on_readable)
+        try:
+            while True:
+                await asyncio.sleep(SWEEP_INTERVAL)
+                self.sweep()
+        finally:
+            loop.remove_reader(self.sock.fileno())
+
+def run_relay(host="0.0.0.0", port=DEFAULT_PORT, max_sessions=MAX_SESSIONS, ready=None):
+    relay = Relay(max_sessions).open(host, port)
+    if ready is not None:
+        ready.put(relay.port)
+    asyncio.run(relay.serve())
+
+# -------------- Client --------------
+class RelayClient:
+    # Non-blocking; drain poll() once per frame. Peer INPUT payloads come
+    # back as memoryviews into the receive buffer, valid until the next one.
+    def __init__(self, host, port=DEFAULT_PORT, room=0, sock=None):
+        self.addr = (host, port)
+        self.room = room
+        self.sock = sock or socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.seat = None
+        self.closed = False
+        self.buf = bytearray(MAX_PACKET)
+        self.view = memoryview(self.buf)
+        self.out = bytearray(MAX_PACKET)
+        self.out_view = memoryview(self.out)
+
+    def hello(self):
+        self.sock.sendto(HELLO.pack(MSG_HELLO, self.room), self.addr)
+
+    def send_input(self, payload):
+        SEAT.pack_into(self.out, 0, MSG_INPUT, self.seat)
+        end = SEAT.size + len(payload)
+        self.out[SEAT.size:end] = payload
+        self.sock.sendto(self.out_view[:end], self.addr)
+
+    def bye(self):
+        if self.seat is not None:
+            self.sock.sendto(SEAT.pack(MSG_BYE, self.seat), self.addr)
+        self.closed = True
+
+    def poll(self):
+        # Yields each peer INPUT payload; handles everything else in place
+        buf, view = self.buf, self.view
+        while True:
+            try:
+                n = self.sock.recv_into(buf)
+            except BlockingIOError:
+                return
+            except OSError:
+                continue
+            kind = buf[0]
+            if kind == MSG_INPUT:
+                yield view[SEAT.size:n]
+            elif kind == MSG_PING:
+                buf[0] = MSG_PONG
+                self.sock.sendto(view[:PING.size], self.addr)
+            elif kind == MSG_MATCHED:
+                self.seat = SEAT.unpack_from(buf)[1]
+            elif kind == MSG_BYE:
+                self.closed = True
+
+def query_stats(host, port=DEFAULT_PORT, timeout=2.0):
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        sock.sendto(bytes([MSG_STATS]), (host, port))
+        data = sock.recv(65536)
+    return json.loads(data[1:])
+
+# -------------- Load generator --------------
+STAMP = struct.Struct("<IQ")   # frame, sender perf_counter_ns
+
+async def load(host, port, sessions, rate, seconds, direct=False):
+    # 2 * sessions clients in this process, each on its own socket, sending
+    # INPUT at `rate` Hz stamped with the send time; receivers record the
+    # one-way delay. direct=True skips the relay (each client sends straight
+    # to its peer) to measure the floor the relay adds to.
+    loop = asyncio.get_running_loop()
+    clients = [RelayClient(host, port, room=i // 2 + 1) for i in range(2 * sessions)]
+    if direct:
+        for c in clients:
+            c.sock.bind(("127.0.0.1", 0))
+        for i, c in enumerate(clients):
+            c.seat = i
+            c.addr = clients[i ^ 1].sock.getsockname()
+    else:
+        deadline = time.monotonic() + 10
+        while any(c.seat is None for c in clients):
+            if time.monotonic() > deadline:
+                raise RuntimeError("relay did not pair every client")
+            for c in clients:
+                if c.seat is None:
+                    c.hello()
+            await asyncio.sleep(0.05)
+            for c in clients:
+                for _ in c.poll():
+                    pass
+
+    delays = array("q")
+    received = [0]
+    def on_readable(c):
+        for payload in c.poll():
+            if len(payload) >= STAMP.size:
+                delays.append(time.perf_counter_ns() - STAMP.unpack_from(payload)[1])
+                received[0] += 1
+    for c in clients:
+        loop.add_reader(c.sock.fileno(), on_readable, c)
+
+    payload = bytearray(STAMP.size + 4)   # stamp plus room for two masks and padding
+    sent = 0
+    start = time.perf_counter()
+    frame = 0
+    while time.perf_counter() - start < seconds:
+        t = start + frame / rate
+        await asyncio.sleep(max(0.0, t - time.perf_counter()))
+        for c in clients:
+            STAMP.pack_into(payload, 0, frame, time.perf_counter_ns())
+            try:
+                c.send_input(payload)
+                sent += 1
+            except BlockingIOError:
+                pass
+        frame += 1
+    await asyncio.sleep(0.2)
+    elapsed = time.perf_counter() - start
+    relay = None if direct else query_stats(host, port)
+
+    for c in clients:
+        loop.remove_reader(c.sock.fileno())
+        if not direct:
+            c.bye()
+        c.sock.close()
+    delays = sorted(delays)
+    pct = lambda p: delays[min(len(delays) - 1, len(delays) * p // 100)] / 1e6 if delays else float("nan")
+    return {"sent": sent, "received": received[0], "pps": received[0] / elapsed,
+            "p50_ms": pct(50), "p99_ms": pct(99), "max_ms": pct(100), "relay": relay}
+
+def bench(sessions, rate, seconds, baseline=False):
+    ready = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=run_relay, args=("127.0.0.1", 0, max(sessions, 1)), kwargs={"ready": ready},
+                                   daemon=True)
+    proc.start()
+    port = ready.get()
+    try:
+        result = asyncio.run(load("127.0.0.1", port, sessions, rate, seconds))
+        if baseline:
+            result["direct"] = asyncio.run(load("127.0.0.1", port, sessions, rate, seconds, direct=True))
+    finally:
+        proc.terminate()
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UDP netplay relay and lobby")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("serve", help="run the relay")
+    p.add_argument("--host", default="0.0.0.0")
+    p.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    p = sub.add_parser("stats", help="ask a running relay for its counters")
+    p.add_argument("host")
+    p.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p = sub.add_parser("bench", help="relay in a child process, simulated clients in this one")
+    p.add_argument("--sessions", type=int, default=1000)
+    p.add_argument("--rate", type=int, default=60, help="packets per second per client")
+    p.add_argument("--seconds", type=float, default=10)
+    p.add_argument("--baseline", action="store_true", help="also run the same load peer to peer, without the relay")
+    args = parser.parse_args()
+
+    if args.cmd == "serve":
+        run_relay(args.host, args.port, args.max_sessions)
+    elif args.cmd == "stats":
+        print(json.dumps(query_stats(args.host, args.port), indent=2))
+    else:
+        r = bench(args.sessions, args.rate, args.seconds, args.baseline)
+        print(f"{args.sessions} sessions x 2 clients at {args.rate} Hz for {args.seconds:g}s")
+        print(f"relayed: {r['received']}/{r['sent']} packets delivered, {r['pps']:.0f} pkt/s, "
+              f"one-way p50 {r['p50_ms']:.3f} ms, p99 {r['p99_ms']:.3f} ms, max {r['max_ms']:.3f} ms")
+        print(f"relay counters: {r['relay']}")
+        print(f"relay cost: {r['relay']['cpu_s'] * 1e6 / max(1, r['relay']['relayed']):.2f} us of CPU per relayed packet")
+        if "direct" in r:
+            d = r["direct"]
+            print(f"direct:  {d['received']}/{d['sent']} packets delivered, "
+                  f"one-way p50 {d['p50_ms']:.3f} ms, p99 {d['p99_ms']:.3f} ms")
+            print(f"added by relay: p50 {r['p50_ms'] - d['p50_ms']:+.3f} ms, p99 {r['p99_ms'] - d['p99_ms']:+.3f} ms")
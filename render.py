@@ -0,0 +1,170 @@
+import pygame
+
+from main import CMD_WORDS, OP_BLIT, OP_RECT, RenderList
+
+# -------------- Render backends --------------
+# A backend owns two RenderLists: begin() hands out a cleared one for this
+# frame's draw calls, run() executes it and keeps it as the previous frame
+# for the next one. Every backend counts the commands emitted and actually
+# drawn in the last frame (shown by the F3 overlay).
+#
+# PygameBackend compares the list against the previous one. An identical
+# frame draws nothing; otherwise it takes the bounding box of the commands
+# that differ (old and new), clips to it and redraws only the commands that
+# overlap it, in order. The first commands are the opaque sky and ground,
+# so the box is fully repainted. Blits and plain filled rects come out the
+# same under any clip, outlines and rounded rects don't, so the box first
+# grows until every such shape it touches lies inside it. Large changes (a
+# moving camera) just redraw everything.
+
+FULL_REDRAW_FRACTION = 0.5   # dirty box above this share of the target: redraw all
+
+def command_bounds(ops, o):
+    return ops[o + 1], ops[o + 2], ops[o + 3], ops[o + 4]
+
+def clip_safe(ops, o):
+    # Whether drawing under a clip gives the same pixels as drawing whole
+    op = ops[o]
+    return op == OP_BLIT or (op == OP_RECT and not ops[o + 5] and not ops[o + 6])
+
+def same_command(a, b, i):
+    ao, bo = a.ops, b.ops
+    o = i * CMD_WORDS
+    for k in range(o, o + CMD_WORDS):
+        if ao[k] != bo[k]:
+            return False
+    ra, rb = a.refs[i], b.refs[i]
+    return ra is rb or ra == rb
+
+def execute(surf, cmds, i):
+    ops = cmds.ops
+    o = i * CMD_WORDS
+    op, x, y, w, h = ops[o], ops[o + 1], ops[o + 2], ops[o + 3], ops[o + 4]
+    ref = cmds.refs[i]
+    if op == OP_BLIT:
+        surf.blit(ref, (x, y))
+    elif op == OP_RECT:
+        pygame.draw.rect(surf, ref, (x, y, w, h), ops[o + 5], ops[o + 6])
+
+class Backend:
+    def __init__(self):
+        self.current = RenderList()
+        self.previous = RenderList()
+        self.emitted = 0
+        self.drawn = 0
+
+    def begin(self):
+        self.current, self.previous = self.previous, self.current
+        self.current.clear()
+        return self.current
+
+    def invalidate(self):
+        pass
+
+    def run(self, surf):
+        # Returns whether anything on surf changed
+        self.emitted = self.current.count
+        self.drawn = 0
+        return False
+
+class NullBackend(Backend):
+    # Counts commands and draws nothing; for headless profiling
+    pass
+
+class PygameBackend(Backend):
+    def __init__(self, diff=True):
+        super().__init__()
+        self.diff = diff
+        self.target = None
+        self.target_size = None
+        self.dirty = pygame.Rect(0, 0, 0, 0)
+
+    def invalidate(self):
+        # Next run() redraws everything (window exposed, fullscreen toggled)
+        self.target = None
+
+    def run(self, surf):
+        cur, prev = self.current, self.previous
+        self.emitted = count = cur.count
+        size = surf.get_size()
+        if not self.diff or surf is not self.target or size != self.target_size:
+            self.target, self.target_size = surf, size
+            for i in range(count):
+                execute(surf, cur, i)
+            self.drawn = count
+            return True
+        dirty = self.dirty_box(cur, prev)
+        if dirty is None:
+            self.drawn = 0
+            return False
+        dirty = self.cover_shapes(cur, dirty)
+        if dirty.w * dirty.h > FULL_REDRAW_FRACTION * size[0] * size[1]:
+            for i in range(count):
+                execute(surf, cur, i)
+            self.drawn = count
+            return True
+        surf.set_clip(dirty)
+        drawn = 0
+        ops = cur.ops
+        for i in range(count):
+            x, y, w, h = command_bounds(ops, i * CMD_WORDS)
+            if x < dirty.right and y < dirty.bottom and x + w > dirty.x and y + h > dirty.y:
+                execute(surf, cur, i)
+                drawn += 1
+        surf.set_clip(None)
+        self.drawn = drawn
+        return True
+
+    def dirty_box(self, cur, prev):
+        # Union of the bounds of every command that differs, old and new,
+        # clipped to the target; None when nothing visible changed
+        box = None
+        common = min(cur.count, prev.count)
+        for i in range(max(cur.count, prev.count)):
+            if i < common and same_command(cur, prev, i):
+                continue
+            if i < cur.count:
+                box = self.grow(box, cur.ops, i)
+            if i < prev.count:
+                box = self.grow(box, prev.ops, i)
+        if box is None:
+            return None
+        box = box.clip(self.target.get_rect())
+        return box if box.w and box.h else None
+
+    def cover_shapes(self, cmds, box):
+        # Grows box until every shape it overlaps that isn't clip_safe lies
+        # inside it (a shape may pull the box onto another one), then clips
+        # it to the target
+        ops = cmds.ops
+        grown = True
+        while grown:
+            grown = False
+            for i in range(cmds.count):
+                o = i * CMD_WORDS
+                if clip_safe(ops, o):
+                    continue
+                x, y, w, h = command_bounds(ops, o)
+                if x < box.right and y < box.bottom and x + w > box.x and y + h > box.y and not (
+                        x >= box.x and y >= box.y and x + w <= box.right and y + h <= box.bottom):
+                    box.union_ip((x, y, w, h))
+                    grown = True
+        return box.clip(self.target.get_rect())
+
+    def grow(self, box, ops, i):
+        x, y, w, h = command_bounds(ops, i * CMD_WORDS)
+        if box is None:
+            box = self.dirty
+            box.update(x, y, w, h)
+        else:
+            box.union_ip((x, y, w, h))
+        return box
+
+BACKENDS = {
+    "pygame": lambda: PygameBackend(),
+    "full": lambda: PygameBackend(diff=False),
+    "null": NullBackend,
+}
+
+def make_backend(name):
+    return BACKENDS[name]()
@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from replay import Replay, simulate
+
+# -------------- Offline replay renderer --------------
+# Re-simulates a replay and draws every frame with draw_match. Long replays
+# are cut into segments rendered in parallel; each worker fast-forwards the
+# simulation (no drawing) to its segment start, then renders its range into
+# a shared memory-mapped raw RGB file or a PNG sequence.
+
+def count_frames(replay):
+    # Replays may contain frames after the match was decided; only the
+    # simulated ones are rendered
+    n = 0
+    for i, _ in simulate(replay):
+        n = i + 1
+    return n
+
+def render_segment(replay_path, out_path, fmt, start, stop, hud, first=0):
+    # first: the replay frame stored at index 0 of a raw file
+    import pygame
+    from main import WIDTH, HEIGHT, draw_match
+
+    replay = Replay.load(replay_path)
+    surf = pygame.Surface((WIDTH, HEIGHT), 0, 32)
+    frames = None
+    if fmt == "raw":
+        frames = np.memmap(out_path, dtype=np.uint8, mode="r+")
+        frames = frames.reshape(-1, HEIGHT, WIDTH, 3)
+
+    for i, match in simulate(replay, start, stop):
+        draw_match(surf, match, hud=hud)
+        if frames is not None:
+            view = pygame.surfarray.pixels3d(surf)
+            frames[i - first] = view.transpose(1, 0, 2)
+            del view
+        else:
+            pygame.image.save(surf, os.path.join(out_path, f"frame_{i:06d}.png"))
+
+    if frames is not None:
+        frames.flush()
+    return stop - start
+
+def render(replay_path, out_path, fmt="raw", workers=None, segment_frames=600, hud=True, start=0, stop=None):
+    # Renders replay frames [start, stop), e.g. around a frame found with replaydb.py
+    from main import WIDTH, HEIGHT, FPS
+
+    replay = Replay.load(replay_path)
+    total = count_frames(replay)
+    stop = total if stop is None else min(stop, total)
+    start = min(max(0, start), stop)
+    if fmt == "raw":
+        # Preallocate the whole file so workers can write their ranges in place
+        np.memmap(out_path, dtype=np.uint8, mode="w+", shape=(max(stop - start, 1), HEIGHT, WIDTH, 3)).flush()
+        with open(out_path + ".json", "w") as f:
+            json.dump({"width": WIDTH, "height": HEIGHT, "fps": FPS, "frames": stop - start, "first_frame": start,
+                       "pix_fmt": "rgb24"}, f)
+    else:
+        os.makedirs(out_path, exist_ok=True)
+
+    segments = [(s, min(s + segment_frames, stop)) for s in range(start, stop, segment_frames)]
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = [pool.submit(render_segment, replay_path, out_path, fmt, s, e, hud, start) for s, e in segments]
+        rendered = sum(j.result() for j in jobs)
+    elapsed = time.perf_counter() - t0
+    return rendered, elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render a replay to raw RGB frames or PNGs")
+    parser.add_argument("replay")
+    parser.add_argument("out", help="raw RGB file, or a directory with --format png")
+    parser.add_argument("--format", choices=("raw", "png"), default="raw")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--segment-frames", type=int, default=600)
+    parser.add_argument("--no-hud", action="store_true")
+    parser.add_argument("--start", type=int, default=0, help="first replay frame to render")
+    parser.add_argument("--stop", type=int, default=None, help="render up to this replay frame (exclusive)")
+    args = parser.parse_args()
+
+    from main import WIDTH, HEIGHT, FPS
+    frames, secs = render(args.replay, args.out, args.format, args.workers, args.segment_frames, not args.no_hud,
+                          args.start, args.stop)
+    print(f"{frames} frames in {secs:.2f}s ({frames / max(secs, 1e-9):.0f} fps, "
+          f"{frames / FPS / max(secs, 1e-9):.1f}x real time)")
+    if args.format == "raw":
+        print(f"ffmpeg -f rawvideo -pix_fmt rgb24 -s {WIDTH}x{HEIGHT} -r {FPS} -i {args.out} out.mp4")
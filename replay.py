@@ -0,0 +1,98 @@
+import struct
+
+# -------------- Replay format --------------
+# Header: magic, version, frame count, reset count
+# Then one uint32 per reset (frame index where the round was restarted from
+# the pause menu) and two bytes per frame (P1 mask, P2 mask)
+MAGIC = b"FGRP"
+VERSION = 1
+HEADER = struct.Struct("<4sHII")
+
+class Replay:
+    def __init__(self, frames=None, resets=None):
+        self.frames = bytearray(frames or b"")
+        self.resets = list(resets or [])
+
+    def __len__(self):
+        return len(self.frames) // 2
+
+    def record(self, m1, m2):
+        self.frames.append(m1)
+        self.frames.append(m2)
+
+    def mark_reset(self):
+        self.resets.append(len(self))
+
+    def masks(self, i):
+        return self.frames[2 * i], self.frames[2 * i + 1]
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(self), len(self.resets)))
+            f.write(struct.pack(f"<{len(self.resets)}I", *self.resets))
+            f.write(self.frames)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, n_frames, n_resets = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a version {VERSION} replay")
+        off = HEADER.size
+        resets = struct.unpack_from(f"<{n_resets}I", data, off)
+        off += 4 * n_resets
+        frames = data[off:off + 2 * n_frames]
+        if len(frames) != 2 * n_frames:
+            raise ValueError(f"{path}: truncated replay")
+        return cls(frames, resets)
+
+class Simulator:
+    # Steps a match one recorded frame at a time, advancing rounds the way
+    # the game does. A finished round stays visible until the next step.
+    def __init__(self, match=None):
+        from main import Match
+        self.match = match or Match()
+        self.match.start()
+        self.frame = 0
+        self.round_ended = False
+        self.over = False
+
+    def reset_round(self):
+        self.match.next_round()
+        self.round_ended = False
+
+    def step(self, m1, m2):
+        if self.round_ended:
+            self.reset_round()
+        rw = self.match.step_masks(m1, m2)
+        self.frame += 1
+        if rw != 0:
+            if self.match.match_over():
+                self.over = True
+            else:
+                self.round_ended = True
+        return rw
+
+    def snapshot(self):
+        return (self.frame, self.round_ended, self.over, self.match.snapshot())
+
+    def restore(self, snap):
+        self.frame, self.round_ended, self.over, match = snap
+        self.match.restore(match)
+
+def simulate(replay, start=0, stop=None, match=None):
+    # Re-run a replay headlessly, yielding (frame, match) for frames in
+    # [start, stop). Earlier frames are simulated without yielding, so a
+    # segment can begin anywhere. Rounds advance as soon as they end.
+    sim = Simulator(match)
+    stop = len(replay) if stop is None else min(stop, len(replay))
+    resets = set(replay.resets)
+    for i in range(stop):
+        if i in resets:
+            sim.reset_round()
+        sim.step(*replay.masks(i))
+        if i >= start:
+            yield i, sim.match
+        if sim.over:
+            return
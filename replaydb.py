@@ -0,0 +1,244 @@
+import argparse
+import glob
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import main
+from replay import Replay, Simulator
+
+# -------------- Replay database --------------
+# Indexes replays into an SQLite file once, at ingest, so questions like
+# "every timeout" or "every blocked heavy that got punished" are answered
+# by a query instead of re-simulating every replay. Each replay is
+# simulated headlessly with an EventLog standing in for main.telemetry
+# (the same hooks telemetry.py uses) and stored as:
+#   replays  one row per file (path, mtime and size to skip unchanged files)
+#   rounds   start/end frame, result, whether the timer ran out, end health
+#   events   move / dash / hit / block, with the replay frame it happened on
+#   moves    per round and player: uses, hits, blocks, damage
+# Frames are replay frame indices, the ones render_replay.py --start takes.
+# Ingest simulates in a process pool; only this process writes the file.
+
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS replays (
+    id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, mtime REAL NOT NULL, size INTEGER NOT NULL,
+    frames INTEGER NOT NULL, p1_rounds INTEGER NOT NULL, p2_rounds INTEGER NOT NULL, winner INTEGER);
+CREATE TABLE IF NOT EXISTS rounds (
+    replay_id INTEGER NOT NULL REFERENCES replays(id) ON DELETE CASCADE, round INTEGER NOT NULL,
+    start_frame INTEGER NOT NULL, end_frame INTEGER, result INTEGER, timeout INTEGER NOT NULL,
+    p1_health INTEGER, p2_health INTEGER, PRIMARY KEY (replay_id, round));
+CREATE TABLE IF NOT EXISTS events (
+    replay_id INTEGER NOT NULL REFERENCES replays(id) ON DELETE CASCADE, round INTEGER NOT NULL,
+    frame INTEGER NOT NULL, kind TEXT NOT NULL, player INTEGER NOT NULL, move TEXT, value INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS moves (
+    replay_id INTEGER NOT NULL REFERENCES replays(id) ON DELETE CASCADE, round INTEGER NOT NULL,
+    player INTEGER NOT NULL, move TEXT NOT NULL, uses INTEGER NOT NULL, hits INTEGER NOT NULL,
+    blocks INTEGER NOT NULL, damage INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS events_kind ON events (kind, move);
+CREATE INDEX IF NOT EXISTS events_frame ON events (replay_id, kind, frame);
+CREATE INDEX IF NOT EXISTS rounds_result ON rounds (result, timeout);
+CREATE INDEX IF NOT EXISTS moves_move ON moves (move, player);
+"""
+PUNISH_WINDOW = 40       # frames after a block in which a hit by the blocker counts as a punish
+
+# -------------- Indexing (worker side) --------------
+class EventLog:
+    # Installed as main.telemetry while a replay is simulated; frame is
+    # written by Match too, so the replay frame index is kept in index
+    def __init__(self, match):
+        self.match = match
+        self.players = {match.p1: 1, match.p2: 2}
+        self.index = 0
+        self.frame = 0
+        self.rounds = []
+        self.events = []
+        self.moves = {}
+
+    def round_start(self):
+        if self.rounds and self.rounds[-1][1] is None:
+            # Restarted from the pause menu before it ended
+            self.rounds[-1][1] = self.index
+        self.rounds.append([self.index, None, None, 0, None, None])
+
+    def round_end(self, result, timer_frames):
+        r = self.rounds[-1]
+        r[1], r[2], r[3] = self.index, result, int(timer_frames == 0)
+        r[4], r[5] = self.match.p1.health, self.match.p2.health
+
+    def move(self, fighter, name):
+        self._event("move", fighter, name, 0)
+        self._tally(fighter, name, 0)
+
+    def dash(self, fighter):
+        self._event("dash", fighter, None, 0)
+
+    def contact(self, attacker, blocked, damage):
+        self._event("block" if blocked else "hit", attacker, attacker.attack_name, damage)
+        self._tally(attacker, attacker.attack_name, 2 if blocked else 1, damage)
+
+    def damage(self, victim, amount, blocked, airborne):
+        pass
+
+    def _event(self, kind, fighter, move, value):
+        self.events.append((len(self.rounds) - 1, self.index, kind, self.players[fighter], move, value))
+
+    def _tally(self, fighter, move, column, damage=0):
+        key = (len(self.rounds) - 1, self.players[fighter], move)
+        row = self.moves.get(key)
+        if row is None:
+            row = self.moves[key] = [0, 0, 0, 0]
+        row[column] += 1
+        row[3] += damage
+
+def index_replay(path):
+    # Simulates one replay; returns everything ingest stores for it
+    replay = Replay.load(path)
+    saved = main.telemetry
+    try:
+        match = main.Match()
+        log = main.telemetry = EventLog(match)
+        sim = Simulator(match)
+        resets = set(replay.resets)
+        frames = 0
+        for i in range(len(replay)):
+            log.index = i
+            if i in resets:
+                sim.reset_round()
+            sim.step(*replay.masks(i))
+            frames = i + 1
+            if sim.over:
+                break
+    finally:
+        main.telemetry = saved
+    p1, p2 = match.p1.round_won, match.p2.round_won
+    winner = 1 if p1 > p2 else 2 if p2 > p1 else None
+    st = os.stat(path)
+    return {"path": os.path.abspath(path), "mtime": st.st_mtime, "size": st.st_size, "frames": frames,
+            "p1_rounds": p1, "p2_rounds": p2, "winner": winner, "rounds": log.rounds, "events": log.events,
+            "moves": [k + tuple(v) for k, v in log.moves.items()]}
+
+# -------------- Database --------------
+def connect(db_path):
+    db = sqlite3.connect(db_path)
+    db.execute("PRAGMA foreign_keys = ON")
+    version = db.execute("PRAGMA user_version").fetchone()[0]
+    if version not in (0, SCHEMA_VERSION):
+        raise ValueError(f"{db_path}: replay database version {version}, expected {SCHEMA_VERSION}")
+    db.executescript(SCHEMA)
+    db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return db
+
+def store(db, r):
+    with db:
+        db.execute("DELETE FROM replays WHERE path = ?", (r["path"],))
+        rid = db.execute("INSERT INTO replays (path, mtime, size, frames, p1_rounds, p2_rounds, winner) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (r["path"], r["mtime"], r["size"], r["frames"], r["p1_rounds"], r["p2_rounds"],
+                          r["winner"])).lastrowid
+        db.executemany("INSERT INTO rounds VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                       [(rid, i, *row) for i, row in enumerate(r["rounds"])])
+        db.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?)", [(rid, *e) for e in r["events"]])
+        db.executemany("INSERT INTO moves VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [(rid, *m) for m in r["moves"]])
+
+def stale(db, paths):
+    # Paths that are new or changed since they were indexed
+    known = {p: (m, s) for p, m, s in db.execute("SELECT path, mtime, size FROM replays")}
+    out = []
+    for path in paths:
+        st = os.stat(path)
+        if known.get(os.path.abspath(path)) != (st.st_mtime, st.st_size):
+            out.append(path)
+    return out
+
+def ingest(db, paths, workers=None):
+    todo = stale(db, paths)
+    if not todo:
+        return 0, len(paths)
+    if workers == 1:
+        for r in map(index_replay, todo):
+            store(db, r)
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            for r in pool.map(index_replay, todo, chunksize=4):
+                store(db, r)
+    return len(todo), len(paths) - len(todo)
+
+# -------------- Queries --------------
+# Event and round queries return path, round and the frame to seek to first
+QUERIES = {
+    "timeouts": ("Rounds decided by the timer",
+                 "SELECT p.path, r.round, r.end_frame AS frame, r.result, r.p1_health, r.p2_health "
+                 "FROM rounds r JOIN replays p ON p.id = r.replay_id WHERE r.timeout ORDER BY p.path, r.round"),
+    "draws": ("Drawn rounds",
+              "SELECT p.path, r.round, r.end_frame AS frame, r.timeout FROM rounds r "
+              "JOIN replays p ON p.id = r.replay_id WHERE r.result = -1 ORDER BY p.path, r.round"),
+    "punished": ("Blocked MOVE answered by a hit from the blocker within WINDOW frames",
+                 "SELECT p.path, b.round, b.frame, b.player AS attacker, h.frame - b.frame AS delay, "
+                 "h.move AS punish, h.value AS damage "
+                 "FROM events b JOIN replays p ON p.id = b.replay_id "
+                 "JOIN events h ON h.rowid = (SELECT x.rowid FROM events x WHERE x.replay_id = b.replay_id "
+                 "AND x.kind = 'hit' AND x.frame > b.frame AND x.frame <= b.frame + :window "
+                 "AND x.player != b.player ORDER BY x.frame LIMIT 1) "
+                 "WHERE b.kind = 'block' AND b.move = :move ORDER BY p.path, b.frame"),
+    "hits": ("Every hit landed with MOVE",
+             "SELECT p.path, e.round, e.frame, e.player, e.value AS damage FROM events e "
+             "JOIN replays p ON p.id = e.replay_id WHERE e.kind = 'hit' AND e.move = :move "
+             "ORDER BY p.path, e.frame"),
+    "usage": ("Move usage over all indexed replays",
+              "SELECT move, sum(uses) AS uses, sum(hits) AS hits, sum(blocks) AS blocks, sum(damage) AS damage "
+              "FROM moves GROUP BY move ORDER BY uses DESC"),
+}
+
+def query(db, name, **params):
+    cur = db.execute(QUERIES[name][1], params)
+    return [d[0] for d in cur.description], cur.fetchall()
+
+def print_rows(columns, rows, limit):
+    print("  ".join(columns))
+    for row in rows[:limit]:
+        print("  ".join(str(v) for v in row))
+    if len(rows) > limit:
+        print(f"... {len(rows) - limit} more")
+
+def replay_paths(args):
+    paths = []
+    for p in args:
+        paths += sorted(glob.glob(os.path.join(p, "*.rep"))) if os.path.isdir(p) else [p]
+    return paths
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index replays into a database and query them")
+    parser.add_argument("--db", default="replays.db")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("ingest", help="index new or changed replays")
+    p.add_argument("paths", nargs="+", help="replay files or directories of .rep files")
+    p.add_argument("--workers", type=int, default=None)
+    p = sub.add_parser("query", help="run a named query: " + ", ".join(QUERIES))
+    p.add_argument("name", choices=sorted(QUERIES))
+    p.add_argument("--move", default="heavy")
+    p.add_argument("--window", type=int, default=PUNISH_WINDOW)
+    p.add_argument("--limit", type=int, default=50)
+    p = sub.add_parser("sql", help="run any SELECT against the tables")
+    p.add_argument("statement")
+    p.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    db = connect(args.db)
+    if args.cmd == "ingest":
+        t0 = time.perf_counter()
+        added, skipped = ingest(db, replay_paths(args.paths), args.workers)
+        print(f"indexed {added} replays in {time.perf_counter() - t0:.1f}s, {skipped} unchanged")
+    else:
+        t0 = time.perf_counter()
+        if args.cmd == "query":
+            columns, rows = query(db, args.name, move=args.move, window=args.window)
+        else:
+            cur = db.execute(args.statement)
+            columns, rows = [d[0] for d in cur.description or ()], cur.fetchall()
+        ms = (time.perf_counter() - t0) * 1000
+        print_rows(columns, rows, args.limit)
+        print(f"{len(rows)} rows in {ms:.1f} ms")
+    db.close()
@@ -0,0 +1,260 @@
+import argparse
+import multiprocessing
+import struct
+import time
+from multiprocessing import shared_memory
+
+from main import FPS, MOVES, Match, State, play_sound
+
+# -------------- Simulation process --------------
+# With --sim-process the match runs in a child process at a fixed FPS, so
+# a slow draw in the game process no longer delays the simulation (and the
+# other way round). The game process keeps a Match of its own that is only
+# drawn from: each frame it writes the button masks into shared memory and
+# loads the latest published frame into that Match.
+#
+# Shared memory: LATEST (last published sequence number), INPUT (P1 mask,
+# P2 mask, active) and two frame buffers. Frame n goes to buffer n % 2 as
+# [n][STATE][n]; a reader takes the buffer LATEST points at and accepts it
+# when both copies of n match, so it never sees a half-written frame and
+# the writer never waits for it. Rare commands (start, next round, quit)
+# go over a pipe. The child steps only while active is set and the round
+# isn't over; each start/next_round bumps a generation so the game process
+# ignores frames published before its command was applied.
+
+LATEST = struct.Struct("<Q")
+INPUT = struct.Struct("<BBB")
+SEQ = struct.Struct("<Q")
+FIGHTER_FMT = "iibBBHIhfB??iiHH"
+SOUNDS = ("hit", "block", "ko")
+STATE = struct.Struct("<IIib" + FIGHTER_FMT * 2 + "I" * len(SOUNDS))
+FIGHTER_FIELDS = len(FIGHTER_FMT)
+
+INPUT_OFFSET = LATEST.size
+BUFFER_SIZE = SEQ.size + STATE.size + SEQ.size
+BUFFER_OFFSETS = (INPUT_OFFSET + 8, INPUT_OFFSET + 8 + BUFFER_SIZE)
+SHM_SIZE = BUFFER_OFFSETS[1] + BUFFER_SIZE
+
+MOVE_NAMES = list(MOVES)
+MOVE_IDS = {name: i for i, name in enumerate(MOVE_NAMES)}
+NO_MOVE = 255
+MAX_LAG_FRAMES = 15      # further behind than this, the child stops catching up
+
+def fighter_values(f):
+    hb = f.hitbox
+    return (f.rect.x, f.rect.y, f.facing, f.state, MOVE_IDS.get(f.attack_name, NO_MOVE), f.frame_counter,
+            f.anim_tick, f.health, f.stamina, f.round_won, f.on_ground, hb is not None,
+            hb.x if hb else 0, hb.y if hb else 0, hb.w if hb else 0, hb.h if hb else 0)
+
+def load_fighter(f, v):
+    f.rect.x, f.rect.y = v[0], v[1]
+    f.facing = v[2]
+    f.state = State(v[3])
+    f.attack_name = None if v[4] == NO_MOVE else MOVE_NAMES[v[4]]
+    f.frame_counter, f.anim_tick, f.health, f.stamina, f.round_won, f.on_ground = v[5:11]
+    if v[11]:
+        f.hitbox_rect.update(v[12], v[13], v[14], v[15])
+        f.hitbox = f.hitbox_rect
+    else:
+        f.hitbox = None
+
+# -------------- Child process --------------
+class SoundCounter:
+    # Stands in for main.voices in the child; the game process plays the sounds
+    def __init__(self):
+        self.counts = dict.fromkeys(SOUNDS, 0)
+
+    def play(self, name):
+        if name in self.counts:
+            self.counts[name] += 1
+
+def run_simulation(shm_name, conn, cpu=None):
+    import main
+    # Attaching registers the block with the resource tracker this process
+    # shares with the game process, which unlinks it in SimClient.close()
+    shm = shared_memory.SharedMemory(shm_name)
+    buf = shm.buf
+    main.voices = sounds = SoundCounter()
+    match = Match()
+    match.start()
+    from bots import make_bot
+    bot = make_bot(cpu, 1) if cpu else None
+    seq = generation = result = 0
+
+    def publish():
+        nonlocal seq
+        seq += 1
+        off = BUFFER_OFFSETS[seq & 1]
+        SEQ.pack_into(buf, off, seq)
+        STATE.pack_into(buf, off + SEQ.size, match.frame, generation, match.round_timer, result,
+                        *fighter_values(match.p1), *fighter_values(match.p2),
+                        *(sounds.counts[s] for s in SOUNDS))
+        SEQ.pack_into(buf, off + SEQ.size + STATE.size, seq)
+        LATEST.pack_into(buf, 0, seq)
+
+    publish()
+    tick = 1 / FPS
+    next_tick = time.perf_counter()
+    try:
+        while True:
+            while conn.poll():
+                cmd = conn.recv()
+                if cmd == "quit":
+                    return
+                if isinstance(cmd, tuple):
+                    # ("cpu", bot name or None): Player 2 from the next frame
+                    bot = make_bot(cmd[1], 1) if cmd[1] else None
+                    continue
+                getattr(match, cmd)()
+                generation += 1
+                result = 0
+                publish()
+            m1, m2, active = INPUT.unpack_from(buf, INPUT_OFFSET)
+            if active and result == 0:
+                if bot:
+                    m2 = bot.act(match.p2, match.p1)
+                result = match.step_masks(m1, m2)
+                publish()
+            next_tick += tick
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                conn.poll(delay)   # sleeps, but wakes early for a command
+            elif delay < -MAX_LAG_FRAMES * tick:
+                next_tick = time.perf_counter()
+    finally:
+        # close() releases shm.buf, which buf is; publish() can't run after it
+        shm.close()
+
+# -------------- Game process --------------
+class SimClient:
+    def __init__(self, cpu=None):
+        self.shm = shared_memory.SharedMemory(create=True, size=SHM_SIZE)
+        self.shm.buf[:SHM_SIZE] = bytes(SHM_SIZE)
+        self.conn, child = multiprocessing.Pipe()
+        # spawn: the game process has SDL state a forked child shouldn't inherit
+        ctx = multiprocessing.get_context("spawn")
+        self.proc = ctx.Process(target=run_simulation, args=(self.shm.name, child, cpu), daemon=True,
+                                name="simulation")
+        self.proc.start()
+        self.generation = 0
+        self.sounds = [0] * len(SOUNDS)
+        self.frame = -1          # frame and generation last loaded into the Match
+        self.loaded_generation = -1
+
+    def wait_ready(self, timeout=10.0):
+        # Blocks until the child publishes a frame for the current generation
+        end = time.perf_counter() + timeout
+        while time.perf_counter() < end:
+            values = self.read()
+            if values is not None and values[1] == self.generation:
+                return True
+            time.sleep(0.005)
+        return False
+
+    def command(self, name):
+        # "start" or "next_round"; frames from before it are ignored
+        self.conn.send(name)
+        self.generation += 1
+
+    def set_cpu(self, name):
+        # Bot to play Player 2, or None for the game's own input
+        self.conn.send(("cpu", name))
+
+    def set_active(self, active):
+        self.shm.buf[INPUT_OFFSET + 2] = 1 if active else 0
+
+    def step(self, m1, m2, match):
+        # Hands over this frame's input and loads the newest frame into
+        # match; returns its round result (0 while the round goes on)
+        INPUT.pack_into(self.shm.buf, INPUT_OFFSET, m1, m2, 1)
+        values = self.read()
+        if values is None or values[1] != self.generation:
+            return 0
+        if values[0] != self.frame or values[1] != self.loaded_generation:
+            self.frame, self.loaded_generation = values[0], values[1]
+            self.apply(values, match)
+        return values[3]
+
+    def read(self):
+        buf = self.shm.buf
+        for _ in range(3):
+            seq = LATEST.unpack_from(buf, 0)[0]
+            if seq == 0:
+                return None
+            off = BUFFER_OFFSETS[seq & 1]
+            end = SEQ.unpack_from(buf, off + SEQ.size + STATE.size)[0]
+            values = STATE.unpack_from(buf, off + SEQ.size)
+            if SEQ.unpack_from(buf, off)[0] == end:
+                return values
+        return None
+
+    def apply(self, values, match):
+        match.frame, _, match.round_timer, _ = values[:4]
+        load_fighter(match.p1, values[4:4 + FIGHTER_FIELDS])
+        load_fighter(match.p2, values[4 + FIGHTER_FIELDS:4 + 2 * FIGHTER_FIELDS])
+        for i, name in enumerate(SOUNDS):
+            count = values[4 + 2 * FIGHTER_FIELDS + i]
+            if count != self.sounds[i]:
+                self.sounds[i] = count
+                play_sound(name)
+
+    def close(self):
+        if self.proc.is_alive():
+            self.conn.send("quit")
+            self.proc.join(1)
+        if self.proc.is_alive():
+            self.proc.terminate()
+        self.shm.close()
+        self.shm.unlink()
+
+# -------------- Benchmark --------------
+def bench(seconds=5.0, hitch_ms=50, hitch_every=30):
+    # Draws at FPS with a stall every hitch_every frames and reports how many
+    # frames the simulation advanced per second, in process and not
+    import main
+    from bots import make_bot
+    main.init_display()
+    results = {}
+    for mode in ("in-process", "sim-process"):
+        match = Match()
+        match.start()
+        sim = None
+        if mode == "sim-process":
+            sim = SimClient("rush-v2")
+            sim.wait_ready()
+        p1_bot, p2_bot = make_bot("turtle-v2", 0), make_bot("rush-v2", 1)
+        clock = main.pygame.time.Clock()
+        frames = drawn = 0
+        t0 = time.perf_counter()
+        while time.perf_counter() - t0 < seconds:
+            clock.tick(FPS)
+            before = match.frame
+            m1 = p1_bot.act(match.p1, match.p2)
+            if sim:
+                rw = sim.step(m1, 0, match)
+            else:
+                rw = match.step_masks(m1, p2_bot.act(match.p2, match.p1))
+            frames += max(0, match.frame - before)
+            if rw and sim:
+                sim.command("next_round")
+            elif rw:
+                match.next_round()
+            main.draw_match(main.canvas, match)
+            main.present()
+            drawn += 1
+            if drawn % hitch_every == 0:
+                time.sleep(hitch_ms / 1000)
+        elapsed = time.perf_counter() - t0
+        results[mode] = (drawn / elapsed, frames / elapsed)
+        if sim:
+            sim.close()
+    for mode, (fps, sim_fps) in results.items():
+        print(f"{mode:12} drawn {fps:5.1f} fps, simulated {sim_fps:5.1f} frames/s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare in-process and separate-process simulation")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--hitch-ms", type=int, default=50, help="render stall every --hitch-every frames")
+    parser.add_argument("--hitch-every", type=int, default=30)
+    args = parser.parse_args()
+    bench(args.seconds, args.hitch_ms, args.hitch_every)
@@ -0,0 +1,400 @@
+import argparse
+import asyncio
+import bisect
+import json
+import queue
+import random
+import socket
+import struct
+import threading
+import time
+
+from replay import Simulator
+
+# -------------- Spectator broadcast --------------
+# The playing machine streams its per-frame input masks to a server, which
+# fans them out to spectators; each spectator re-simulates the match
+# locally. Spectators see the stream DELAY_FRAMES behind the player.
+#
+# Wire format, both directions: a 5-byte header (type, payload length)
+# followed by the payload. Clients open with a one-line role: b"SRC\n" for
+# the playing machine, b"SPEC\n" for spectators.
+#   FRAMES    uint32 first frame, then two mask bytes per frame
+#   RESET     uint32 frame; the round restarts before that frame
+#   NEW_MATCH uint32 frame; a new match starts before that frame
+#   SNAPSHOT  JSON of Simulator.snapshot(), valid before the frame it names
+#
+# The server keeps masks only from the oldest frame a spectator can still
+# be sent: the earliest next frame of a synced spectator, but no further
+# back than RESYNC_FRAMES behind the released frame (older than that gets a
+# snapshot instead).
+
+MSG_FRAMES, MSG_RESET, MSG_NEW_MATCH, MSG_SNAPSHOT = 1, 2, 3, 4
+HEADER = struct.Struct("<BI")
+FRAME_NO = struct.Struct("<I")
+
+DEFAULT_PORT = 7301
+DELAY_FRAMES = 180
+TICK = 1 / 60
+HIGH_WATER = 8 * 1024     # bytes queued for one spectator before it counts as stalled
+RESYNC_FRAMES = 600       # a recovered spectator this far behind gets a snapshot instead
+DROP_AFTER = 5.0          # seconds stalled before a spectator is dropped
+
+def message(kind, payload):
+    return HEADER.pack(kind, len(payload)) + payload
+
+async def read_message(reader):
+    kind, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+    return kind, await reader.readexactly(length)
+
+def apply_message(sim, kind, payload):
+    # Spectator side: bring a local Simulator up to date
+    if kind == MSG_FRAMES:
+        masks = payload[FRAME_NO.size:]
+        for i in range(0, len(masks), 2):
+            if not sim.over:
+                sim.step(masks[i], masks[i + 1])
+    elif kind == MSG_RESET:
+        sim.reset_round()
+    elif kind == MSG_NEW_MATCH:
+        sim.__init__(sim.match)
+    elif kind == MSG_SNAPSHOT:
+        sim.restore(json.loads(payload))
+
+class Spectator:
+    def __init__(self, writer):
+        self.writer = writer
+        self.sent = None          # next frame to send; None until synced
+        self.stalled_since = None
+
+class BroadcastServer:
+    def __init__(self, delay=DELAY_FRAMES, high_water=HIGH_WATER, resync_frames=RESYNC_FRAMES,
+                 drop_after=DROP_AFTER, sndbuf=None):
+        self.delay = delay
+        self.high_water = high_water
+        self.resync_frames = resync_frames
+        self.drop_after = drop_after
+        self.sndbuf = sndbuf
+        self.frames = bytearray()  # two mask bytes per frame, from frame base on
+        self.base = 0
+        self.markers = []         # (frame, MSG_RESET | MSG_NEW_MATCH), in order, from base on
+        self.released = 0         # frames visible to spectators
+        self.sim = Simulator()    # state at self.released, for snapshots
+        self._marker_i = 0
+        self.spectators = set()
+        self.source_done = asyncio.Event()
+        self.stats = {"frames_in": 0, "bytes_out": 0, "writes": 0, "resyncs": 0, "dropped": 0}
+
+    # ---- connections ----
+    async def handle(self, reader, writer):
+        role = await reader.readline()
+        if role == b"SRC\n":
+            await self._source(reader)
+            writer.close()
+        elif role == b"SPEC\n":
+            sock = writer.get_extra_info("socket")
+            if self.sndbuf and sock is not None:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.sndbuf)
+            self.spectators.add(Spectator(writer))
+        else:
+            writer.close()
+
+    async def _source(self, reader):
+        try:
+            while True:
+                kind, payload = await read_message(reader)
+                if kind == MSG_FRAMES:
+                    self.frames += payload[FRAME_NO.size:]
+                    self.stats["frames_in"] += (len(payload) - FRAME_NO.size) // 2
+                elif kind in (MSG_RESET, MSG_NEW_MATCH):
+                    self.markers.append((self.base + len(self.frames) // 2, kind))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.source_done.set()
+
+    # ---- fan-out ----
+    def _advance(self, upto):
+        # Simulate released frames so snapshots are always at self.released
+        while self.released < upto:
+            while self._marker_i < len(self.markers) and self.markers[self._marker_i][0] == self.released:
+                apply_message(self.sim, self.markers[self._marker_i][1], b"")
+                self._marker_i += 1
+            i = 2 * (self.released - self.base)
+            if not self.sim.over:
+                self.sim.step(self.frames[i], self.frames[i + 1])
+            self.released += 1
+
+    def _batch(self, start, stop):
+        # Frames [start, stop) with their markers, as one buffer
+        parts = []
+        base, markers = self.base, self.markers
+        for j in range(bisect.bisect_left(markers, (start,)), len(markers)):
+            frame, kind = markers[j]
+            if frame >= stop:
+                break
+            if frame > start:
+                parts.append(message(MSG_FRAMES, FRAME_NO.pack(start)
+                                     + self.frames[2 * (start - base):2 * (frame - base)]))
+                start = frame
+            parts.append(message(kind, FRAME_NO.pack(frame)))
+        if stop > start:
+            parts.append(message(MSG_FRAMES, FRAME_NO.pack(start)
+                                 + self.frames[2 * (start - base):2 * (stop - base)]))
+        return b"".join(parts)
+
+    def _trim(self):
+        # Drops frames and markers before any spectator still needs them
+        floor = self.released
+        for spec in self.spectators:
+            if spec.sent is not None and spec.sent < floor:
+                floor = spec.sent
+        floor = max(floor, self.released - self.resync_frames)
+        if floor <= self.base:
+            return
+        del self.frames[:2 * (floor - self.base)]
+        self.base = floor
+        k = bisect.bisect_left(self.markers, (floor,))
+        if k:
+            # All applied already: they are before self.released
+            del self.markers[:k]
+            self._marker_i -= k
+
+    def _snapshot(self):
+        return message(MSG_SNAPSHOT, json.dumps(self.sim.snapshot()).encode())
+
+    def tick(self, now, flush=False):
+        head = self.base + len(self.frames) // 2
+        self._advance(head if flush else max(0, head - self.delay))
+        for spec in list(self.spectators):
+            transport = spec.writer.transport
+            if transport.is_closing():
+                self.spectators.discard(spec)
+                continue
+            if transport.get_write_buffer_size() > self.high_water:
+                # Slow reader: stop feeding it, drop it if it never recovers
+                if spec.stalled_since is None:
+                    spec.stalled_since = now
+                elif now - spec.stalled_since > self.drop_after:
+                    transport.abort()
+                    self.spectators.discard(spec)
+                    self.stats["dropped"] += 1
+                continue
+            spec.stalled_since = None
+            if spec.sent is None or self.released - spec.sent > self.resync_frames:
+                data = self._snapshot()
+                if spec.sent is not None:
+                    self.stats["resyncs"] += 1
+                spec.sent = self.released
+            elif spec.sent < self.released:
+                data = self._batch(spec.sent, self.released)
+                spec.sent = self.released
+            else:
+                continue
+            spec.writer.write(data)
+            self.stats["writes"] += 1
+            self.stats["bytes_out"] += len(data)
+        self._trim()
+
+    async def run(self, host="127.0.0.1", port=DEFAULT_PORT, until_source_done=False):
+        server = await asyncio.start_server(self.handle, host, port)
+        self.port = server.sockets[0].getsockname()[1]
+        loop = asyncio.get_running_loop()
+        async with server:
+            while not (until_source_done and self.source_done.is_set()):
+                self.tick(loop.time())
+                await asyncio.sleep(TICK)
+            self.tick(loop.time(), flush=True)
+            for spec in self.spectators:
+                spec.writer.close()
+
+# -------------- Playing machine side --------------
+class BroadcastSource:
+    # Used by main.py --broadcast: a plain non-blocking socket, flushed once
+    # per frame so the game loop never waits on the network. If the server
+    # goes away the broadcast just stops; the game carries on.
+    def __init__(self, host, port=DEFAULT_PORT):
+        self.sock = socket.create_connection((host, port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.sendall(b"SRC\n")
+        self.sock.setblocking(False)
+        self.pending = bytearray()
+        self.frame = 0
+        self.closed = False
+
+    def send_frame(self, m1, m2):
+        if self.closed:
+            return
+        self.pending += message(MSG_FRAMES, FRAME_NO.pack(self.frame) + bytes((m1, m2)))
+        self.frame += 1
+        self.flush()
+
+    def send_marker(self, kind):
+        if not self.closed:
+            self.pending += message(kind, FRAME_NO.pack(self.frame))
+
+    def flush(self):
+        if self.closed:
+            return
+        try:
+            sent = self.sock.send(self.pending)
+            del self.pending[:sent]
+        except BlockingIOError:
+            pass
+        except OSError:
+            # Broken pipe, connection reset: stop broadcasting
+            self.stop()
+
+    def stop(self):
+        self.closed = True
+        self.pending.clear()
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self.sock.setblocking(True)
+            self.sock.sendall(self.pending)
+        except OSError:
+            pass
+        self.stop()
+
+# -------------- Spectator side --------------
+async def spectate(host, port, on_message, pause=None, rcvbuf=None):
+    if rcvbuf:
+        # The receive window is fixed at connect time, so size it first
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, (host, port))
+        reader, writer = await asyncio.open_connection(sock=sock, limit=rcvbuf)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b"SPEC\n")
+    try:
+        while True:
+            kind, payload = await read_message(reader)
+            on_message(kind, payload)
+            if pause:
+                await pause()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+def watch(host, port):
+    # Local viewer: network on a thread, simulation and drawing on the main thread
+    import pygame
+    import main
+
+    inbox = queue.Queue()
+    threading.Thread(target=lambda: asyncio.run(spectate(host, port, lambda k, p: inbox.put((k, p)))),
+                     daemon=True).start()
+    main.init_display()
+    sim = Simulator()
+    running = True
+    while running:
+        main.clock.tick(main.FPS)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+        while not inbox.empty():
+            apply_message(sim, *inbox.get())
+        main.draw_match(main.canvas, sim.match)
+        main.present()
+    pygame.quit()
+
+# -------------- Localhost benchmark / self-check --------------
+def stall_once(after, seconds):
+    # A spectate() pause hook that sleeps once, after `after` messages
+    seen = 0
+
+    async def pause():
+        nonlocal seen
+        seen += 1
+        if seen == after:
+            await asyncio.sleep(seconds)
+    return pause
+
+async def bench(spectators=200, frames=36000, rate=3600, verify=16, slow=4, delay=DELAY_FRAMES,
+                sndbuf=4096, high_water=HIGH_WATER):
+    # One source and many spectators in this process. The first `verify`
+    # spectators re-simulate and are checked against the server at the end
+    # (the rest only read, so hundreds fit on one core); the first `slow` of
+    # those stall once mid-stream, odd ones long enough to be dropped and
+    # even ones long enough to need a resync.
+    server = BroadcastServer(delay=delay, sndbuf=sndbuf, high_water=high_water)
+    server_task = asyncio.create_task(server.run(port=0, until_source_done=True))
+    while not hasattr(server, "port"):
+        await asyncio.sleep(0.01)
+
+    sims = [Simulator() for _ in range(min(verify, spectators))]
+    tasks = []
+    for i in range(spectators):
+        on_message = (lambda k, p, s=sims[i]: apply_message(s, k, p)) if i < len(sims) else (lambda k, p: None)
+        pause = stall_once(60, DROP_AFTER * 4 if i % 2 else DROP_AFTER * 1.5) if i < slow else None
+        rcvbuf = 4096 if i < slow else None
+        tasks.append(asyncio.create_task(spectate("127.0.0.1", server.port, on_message, pause, rcvbuf)))
+
+    rnd = random.Random(0)
+    _, writer = await asyncio.open_connection("127.0.0.1", server.port)
+    writer.write(b"SRC\n")
+    t0 = time.perf_counter()
+    m1 = m2 = 0
+    batch = max(1, rate // 60)
+    for f in range(0, frames, batch):
+        masks = bytearray()
+        for _ in range(min(batch, frames - f)):
+            if rnd.random() < 0.2:
+                m1 = rnd.randrange(256) & 0x73
+            if rnd.random() < 0.2:
+                m2 = rnd.randrange(256) & 0x73
+            masks += bytes((m1, m2))
+        writer.write(message(MSG_FRAMES, FRAME_NO.pack(f) + masks))
+        await writer.drain()
+        await asyncio.sleep(TICK)
+    writer.close()
+    await server_task
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - t0
+
+    expected = json.dumps(server.sim.snapshot())
+    in_sync = sum(json.dumps(s.snapshot()) == expected for s in sims)
+    return server.stats, in_sync, len(sims), elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Live spectator broadcast")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("serve", help="run the broadcast server")
+    p.add_argument("--host", default="0.0.0.0")
+    p.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p.add_argument("--delay", type=int, default=DELAY_FRAMES, help="frames spectators lag behind the player")
+    p = sub.add_parser("watch", help="watch a broadcast")
+    p.add_argument("host")
+    p.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p = sub.add_parser("bench", help="server, source and spectators over localhost")
+    p.add_argument("--spectators", type=int, default=200)
+    p.add_argument("--frames", type=int, default=36000)
+    p.add_argument("--rate", type=int, default=3600, help="source frames per second")
+    p.add_argument("--verify", type=int, default=16, help="spectators that re-simulate and are checked")
+    p.add_argument("--slow", type=int, default=4, help="checked spectators that stall once mid-stream")
+    p.add_argument("--sndbuf", type=int, default=4096, help="server socket send buffer per spectator")
+    p.add_argument("--high-water", type=int, default=HIGH_WATER, help="queued bytes before a spectator is stalled")
+    args = parser.parse_args()
+
+    if args.cmd == "serve":
+        asyncio.run(BroadcastServer(delay=args.delay).run(args.host, args.port))
+    elif args.cmd == "watch":
+        watch(args.host, args.port)
+    else:
+        stats, in_sync, checked, secs = asyncio.run(bench(args.spectators, args.frames, args.rate, args.verify,
+                                                          args.slow, sndbuf=args.sndbuf, high_water=args.high_water))
+        print(f"{args.spectators} spectators, {stats['frames_in']} frames in {secs:.2f}s")
+        print(f"writes {stats['writes']}, {stats['bytes_out']} bytes out, "
+              f"resyncs {stats['resyncs']}, dropped {stats['dropped']}")
+        print(f"{in_sync}/{checked} checked spectators match the server's final state "
+              f"(dropped ones can't)")
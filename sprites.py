@@ -0,0 +1,100 @@
+import json
+import os
+
+import pygame
+
+from main import MOVE_PHASES, PHASE_NAMES, State
+
+# -------------- Sprite atlas --------------
+# An atlas is one image plus a JSON manifest:
+# {
+#   "image": "fighter.png",
+#   "frame_size": [64, 96],
+#   "anchor": [32, 96],                  # pixel placed on rect.midbottom
+#   "animations": {
+#     "IDLE": {"frames": [[0, 0], [64, 0]], "fps": 8},
+#     "ATTACK": {"frames": [[0, 96]]},
+#     "ATTACK:heavy": {...},
+#     "ATTACK:heavy:active": {...}
+#   }
+# }
+# Frames face right; left-facing copies are made once at load time.
+# Lookups fall back from "STATE:move:phase" to "STATE:move", "STATE", "IDLE".
+
+ATLAS_PATH = os.path.join("assets", "fighter.json")
+
+class Animation:
+    def __init__(self, frames, fps=10):
+        self.right = frames
+        self.left = [pygame.transform.flip(f, True, False) for f in frames]
+        self.frame_time = max(1, round(60 / fps))
+        # render scale -> (right, left), built once per internal resolution
+        self.scaled = {1.0: (self.right, self.left)}
+
+    def frames(self, scale):
+        pair = self.scaled.get(scale)
+        if pair is None:
+            pair = tuple([pygame.transform.smoothscale(f, (int(f.get_width() * scale), int(f.get_height() * scale)))
+                          for f in frames] for frames in (self.right, self.left))
+            self.scaled[scale] = pair
+        return pair
+
+    def frame(self, tick, facing, scale=1.0):
+        right, left = self.frames(scale)
+        frames = right if facing == 1 else left
+        return frames[(tick // self.frame_time) % len(frames)]
+
+def move_phase(fighter):
+    phases = MOVE_PHASES[fighter.attack_name]
+    return PHASE_NAMES[phases[min(fighter.frame_counter, len(phases) - 1)]]
+
+class SpriteSet:
+    def __init__(self, animations, anchor):
+        self.animations = animations
+        self.anchor = anchor
+        # (state, move, phase) -> Animation, resolved on first use
+        self._lookup = {}
+
+    def animation(self, state, move=None, phase=None):
+        key = (state, move, phase)
+        anim = self._lookup.get(key)
+        if anim is None:
+            names = [state.name]
+            if move:
+                names.insert(0, f"{state.name}:{move}")
+                if phase:
+                    names.insert(0, f"{state.name}:{move}:{phase}")
+            names.append("IDLE")
+            anim = next(self.animations[n] for n in names if n in self.animations)
+            self._lookup[key] = anim
+        return anim
+
+    def frame(self, fighter, scale=1.0):
+        if fighter.state == State.ATTACK and fighter.attack_name:
+            anim = self.animation(State.ATTACK, fighter.attack_name, move_phase(fighter))
+            tick = fighter.frame_counter
+        else:
+            anim = self.animation(fighter.state)
+            tick = fighter.anim_tick
+        return anim.frame(tick, fighter.facing, scale)
+
+    @classmethod
+    def load(cls, manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        image_path = os.path.join(os.path.dirname(manifest_path), manifest["image"])
+        # Convert once to the display format; frames are subsurfaces of it
+        atlas = pygame.image.load(image_path).convert_alpha()
+        fw, fh = manifest["frame_size"]
+        animations = {}
+        for name, spec in manifest["animations"].items():
+            frames = [atlas.subsurface((x, y, fw, fh)) for x, y in spec["frames"]]
+            animations[name] = Animation(frames, spec.get("fps", 10))
+        anchor = tuple(manifest.get("anchor", (fw // 2, fh)))
+        return cls(animations, anchor)
+
+def load_fighter_sprites(path=ATLAS_PATH):
+    # None without an atlas: Fighter.draw then uses its cached rectangle bodies
+    if os.path.exists(path):
+        return SpriteSet.load(path)
+    return None
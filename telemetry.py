@@ -0,0 +1,250 @@
+import argparse
+import collections
+import glob
+import json
+import os
+import queue
+import struct
+import threading
+
+import numpy as np
+
+from main import MOVES
+
+# -------------- Match telemetry --------------
+# The game calls the Telemetry methods (via main.telemetry) from start_attack,
+# the dash branch of input_mask, resolve_hits, take_hit, next_round and the
+# round result. Each call packs one fixed-size record into the current block,
+# a preallocated bytearray. Full blocks go on a bounded queue to a writer
+# thread; if the queue is full or no block is free, records are counted as
+# dropped and the game never waits. The last block of a match, which also
+# closes its file, is the exception: end_match waits up to FINAL_TIMEOUT
+# for room on the queue.
+#
+# File: MAGIC, version, JSON header (move names), then chunks of
+# uint32 count followed by each column for those records in RECORD order.
+
+RECORD = struct.Struct("<IBBBBh")
+DTYPE = np.dtype([("frame", "<u4"), ("kind", "u1"), ("player", "u1"), ("move", "u1"), ("flags", "u1"),
+                  ("value", "<i2")])
+assert DTYPE.itemsize == RECORD.size
+
+EV_ROUND_START, EV_ROUND_END, EV_MOVE, EV_DASH, EV_CONTACT, EV_DAMAGE = range(6)
+FLAG_BLOCKED, FLAG_AIR, FLAG_KO = 1, 2, 4
+NO_MOVE = 255
+NO_PLAYER = 255
+
+MAGIC = b"FGTM"
+VERSION = 1
+COUNT = struct.Struct("<I")
+BLOCK_RECORDS = 4096
+NUM_BLOCKS = 8
+MAX_PENDING = 6
+FINAL_TIMEOUT = 2.0      # seconds end_match may wait for room for the closing block
+
+class Telemetry:
+    def __init__(self, block_records=BLOCK_RECORDS, num_blocks=NUM_BLOCKS, max_pending=MAX_PENDING):
+        self.move_names = list(MOVES)
+        self.move_ids = {name: i for i, name in enumerate(self.move_names)}
+        self.block_bytes = block_records * RECORD.size
+        self.free = collections.deque(bytearray(self.block_bytes) for _ in range(num_blocks))
+        self.pending = queue.Queue(max_pending)
+        self.block = self.free.popleft()
+        self.offset = 0
+        self.path = None
+        self.players = {}
+        self.frame = 0
+        self.dropped = 0
+        self.written = 0
+        self.thread = threading.Thread(target=self._writer, daemon=True)
+        self.thread.start()
+
+    # ---- match lifetime (called outside the frame loop) ----
+    def begin_match(self, path, p1, p2):
+        if self.path is not None:
+            self.end_match()
+        self.path = path
+        self.players = {p1: 0, p2: 1}
+
+    def end_match(self):
+        self.submit(final=True)
+        self.path = None
+
+    def close(self):
+        self.end_match()
+        self.pending.put(None)
+        self.thread.join()
+
+    # ---- hooks (called from the game) ----
+    def round_start(self):
+        self._emit(EV_ROUND_START, NO_PLAYER, NO_MOVE, 0, 0)
+
+    def round_end(self, result, timer_frames):
+        # result as from round_over_check: 1, 2, or -1 for a draw
+        self._emit(EV_ROUND_END, NO_PLAYER, NO_MOVE, result & 0xFF, timer_frames)
+
+    def move(self, fighter, name):
+        self._emit(EV_MOVE, self.players.get(fighter, NO_PLAYER), self.move_ids[name], 0, 0)
+
+    def dash(self, fighter):
+        self._emit(EV_DASH, self.players.get(fighter, NO_PLAYER), NO_MOVE, 0, 0)
+
+    def contact(self, attacker, blocked, damage):
+        self._emit(EV_CONTACT, self.players.get(attacker, NO_PLAYER), self.move_ids[attacker.attack_name],
+                   FLAG_BLOCKED if blocked else 0, damage)
+
+    def damage(self, victim, amount, blocked, airborne):
+        flags = (FLAG_BLOCKED if blocked else 0) | (FLAG_AIR if airborne else 0) | (FLAG_KO if victim.health == 0 else 0)
+        self._emit(EV_DAMAGE, self.players.get(victim, NO_PLAYER), NO_MOVE, flags, amount)
+
+    def _emit(self, kind, player, move, flags, value):
+        if self.path is None:
+            return
+        if self.block is None:
+            if not self.free:
+                self.dropped += 1
+                return
+            self.block = self.free.popleft()
+        RECORD.pack_into(self.block, self.offset, self.frame, kind, player, move, flags, value)
+        self.offset += RECORD.size
+        if self.offset == self.block_bytes:
+            self.submit()
+
+    def submit(self, final=False):
+        # Hand the current block to the writer, or drop it if the queue is full
+        if self.offset == 0 and not final:
+            return
+        if self.path is not None:
+            item = (self.path, self.block, self.offset // RECORD.size, final)
+            try:
+                if final:
+                    self.pending.put(item, timeout=FINAL_TIMEOUT)
+                else:
+                    self.pending.put_nowait(item)
+                self.block = None
+            except queue.Full:
+                self.dropped += self.offset // RECORD.size
+        self.offset = 0
+
+    # ---- writer thread ----
+    def _writer(self):
+        files = {}
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            path, block, n, final = item
+            f = files.get(path)
+            if f is None:
+                f = files[path] = open_match_file(path, self.move_names)
+            if n:
+                # Rows to columns, then one write per chunk
+                rows = np.frombuffer(block, DTYPE, n)
+                f.write(COUNT.pack(n) + b"".join(rows[name].tobytes() for name in DTYPE.names))
+                self.written += n
+            if block is not None:
+                self.free.append(block)
+            if final:
+                files.pop(path).close()
+        for f in files.values():
+            f.close()
+
+def open_match_file(path, move_names):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    f = open(path, "wb")
+    header = json.dumps({"moves": move_names}).encode()
+    f.write(MAGIC + struct.pack("<HI", VERSION, len(header)) + header)
+    return f
+
+# -------------- Reading and aggregation --------------
+def read_match(path):
+    # Returns (header, structured array of records)
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:4] != MAGIC:
+        raise ValueError(f"{path}: not a telemetry file")
+    version, hlen = struct.unpack_from("<HI", data, 4)
+    if version != VERSION:
+        raise ValueError(f"{path}: unsupported telemetry version {version}")
+    pos = 10 + hlen
+    header = json.loads(data[10:pos])
+    chunks = []
+    while pos + COUNT.size <= len(data):
+        n = COUNT.unpack_from(data, pos)[0]
+        pos += COUNT.size
+        if pos + n * DTYPE.itemsize > len(data):
+            break   # torn final chunk
+        chunk = np.empty(n, DTYPE)
+        for name in DTYPE.names:
+            size = n * DTYPE[name].itemsize
+            chunk[name] = np.frombuffer(data, DTYPE[name], n, pos)
+            pos += size
+        chunks.append(chunk)
+    return header, np.concatenate(chunks) if chunks else np.empty(0, DTYPE)
+
+def summarize(paths):
+    moves = None
+    used = hits = blocks = damage = None
+    durations = []
+    dashes = np.zeros(2, np.int64)
+    rounds = 0
+    outcomes = collections.Counter()
+    total = 0
+    for path in paths:
+        header, rec = read_match(path)
+        names = header["moves"]
+        if moves is None:
+            moves = names
+            used, hits, blocks, damage = (np.zeros(len(moves), np.int64) for _ in range(4))
+        elif names != moves:
+            raise ValueError(f"{path}: move list differs from {paths[0]}")
+        total += len(rec)
+        kind, move, flags = rec["kind"], rec["move"], rec["flags"]
+        n = len(moves)
+        used += np.bincount(move[kind == EV_MOVE], minlength=n)[:n]
+        contact = kind == EV_CONTACT
+        blocked = (flags & FLAG_BLOCKED) != 0
+        hits += np.bincount(move[contact & ~blocked], minlength=n)[:n]
+        blocks += np.bincount(move[contact & blocked], minlength=n)[:n]
+        damage += np.bincount(move[contact], weights=rec["value"][contact], minlength=n)[:n].astype(np.int64)
+        dash = rec["player"][kind == EV_DASH]
+        dashes += np.bincount(dash[dash < 2], minlength=2)
+        # Round durations: each end paired with the last start before it (a
+        # round that ends on frame F and the next round can both start at F)
+        starts = rec["frame"][kind == EV_ROUND_START]
+        ends = rec[kind == EV_ROUND_END]
+        idx = np.searchsorted(starts, ends["frame"], side="left") - 1
+        ok = idx >= 0
+        durations.append(ends["frame"][ok].astype(np.int64) - starts[idx[ok]])
+        rounds += len(ends)
+        outcomes.update({1: "P1", 2: "P2", 255: "draw"}.get(int(v), "?") for v in ends["flags"])
+    durations = np.concatenate(durations) if durations else np.empty(0, np.int64)
+    return {
+        "files": len(paths), "records": total, "rounds": rounds, "round_results": dict(outcomes),
+        "round_frames": {"mean": float(durations.mean()), "p50": float(np.median(durations)),
+                         "max": int(durations.max())} if len(durations) else None,
+        "dashes": {"P1": int(dashes[0]), "P2": int(dashes[1])},
+        "moves": {name: {"used": int(used[i]), "hits": int(hits[i]), "blocked": int(blocks[i]),
+                         "damage": int(damage[i])} for i, name in enumerate(moves or [])},
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize match telemetry files")
+    parser.add_argument("paths", nargs="+", help="telemetry files or directories")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args()
+    paths = []
+    for p in args.paths:
+        paths += sorted(glob.glob(os.path.join(p, "*.fgt"))) if os.path.isdir(p) else [p]
+    s = summarize(paths)
+    if args.json:
+        print(json.dumps(s, indent=2))
+    else:
+        print(f"{s['files']} matches, {s['records']} events, {s['rounds']} rounds {s['round_results']}")
+        if s["round_frames"]:
+            r = s["round_frames"]
+            print(f"round length: mean {r['mean'] / 60:.1f}s, median {r['p50'] / 60:.1f}s, max {r['max'] / 60:.1f}s")
+        print(f"dashes: {s['dashes']}")
+        print(f"{'move':9} {'used':>7} {'hits':>7} {'blocked':>7} {'damage':>8}")
+        for name, m in s["moves"].items():
+            print(f"{name:9} {m['used']:7} {m['hits']:7} {m['blocked']:7} {m['damage']:8}")
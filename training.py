@@ -0,0 +1,110 @@
+import time
+
+import pygame
+
+import main
+from main import GREY, HEIGHT, State, WHITE, YELLOW, center_text, px
+
+# -------------- Training mode --------------
+# F5-F8 save the whole match into a slot, 1-4 restore it. P toggles frame
+# stepping (N advances one frame), M cycles slow motion. Rounds restart on
+# KO or timeout. Hitboxes and hurtboxes are always drawn, and after every
+# exchange the attacker's frame advantage is shown.
+
+NUM_SLOTS = 4
+SAVE_KEYS = (pygame.K_F5, pygame.K_F6, pygame.K_F7, pygame.K_F8)
+LOAD_KEYS = (pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4)
+SPEEDS = (1, 2, 4)   # simulate one frame every N displayed frames
+
+# States a fighter can't act out of
+BUSY = [s in (State.ATTACK, State.HITSTUN, State.KODOWN) for s in State]
+
+def actionable(f):
+    return not BUSY[f.state] and f.hitstop == 0 and f.guard_stun == 0 and f.hitstun == 0
+
+class AdvantageTracker:
+    # Watches for contact (both fighters entering hitstop) and reports
+    # defender-ready minus attacker-ready frames once both can act again
+    def __init__(self):
+        self.exchange = None   # (attacker, defender, blocked, start frame)
+        self.ready = {}
+        self.last = None       # (attacker name, advantage, "hit"/"block")
+
+    def update(self, match, prev_hitstop):
+        p1, p2 = match.p1, match.p2
+        if prev_hitstop == (0, 0) and p1.hitstop > 0 and p2.hitstop > 0:
+            # The victim is the one whose guard or hit stun just started
+            if p2.hitstun > 0 or p2.guard_stun > 0 or p2.state == State.KODOWN:
+                attacker, defender = p1, p2
+            else:
+                attacker, defender = p2, p1
+            self.exchange = (attacker, defender, defender.guard_stun > 0, match.frame)
+            self.ready = {}
+            return
+        if self.exchange is None:
+            return
+        attacker, defender, blocked, _ = self.exchange
+        for f in (attacker, defender):
+            if f not in self.ready and actionable(f):
+                self.ready[f] = match.frame
+        if len(self.ready) == 2:
+            self.last = (attacker.name, self.ready[defender] - self.ready[attacker], "block" if blocked else "hit")
+            self.exchange = None
+
+class TrainingMode:
+    def __init__(self, match):
+        self.match = match
+        self.slots = [None] * NUM_SLOTS
+        self.speed = 0
+        self.stepping = False
+        self.step_requested = False
+        self.tick = 0
+        self.advantage = AdvantageTracker()
+        self.message = ""
+
+    def handle_key(self, key):
+        if key in SAVE_KEYS:
+            i = SAVE_KEYS.index(key)
+            self.slots[i] = self.match.snapshot()
+            self.message = f"Saved slot {i + 1}"
+        elif key in LOAD_KEYS:
+            i = LOAD_KEYS.index(key)
+            if self.slots[i] is not None:
+                t0 = time.perf_counter()
+                self.match.restore(self.slots[i])
+                us = (time.perf_counter() - t0) * 1e6
+                self.advantage.exchange = None
+                self.message = f"Loaded slot {i + 1} ({us:.0f} us)"
+        elif key == pygame.K_p:
+            self.stepping = not self.stepping
+        elif key == pygame.K_n:
+            self.step_requested = True
+        elif key == pygame.K_m:
+            self.speed = (self.speed + 1) % len(SPEEDS)
+
+    def update(self, keys):
+        self.tick += 1
+        if self.stepping:
+            if not self.step_requested:
+                return
+            self.step_requested = False
+        elif self.tick % SPEEDS[self.speed]:
+            return
+
+        match = self.match
+        prev_hitstop = (match.p1.hitstop, match.p2.hitstop)
+        if match.step(keys) != 0:
+            match.next_round()
+        self.advantage.update(match, prev_hitstop)
+
+    def draw(self, surf):
+        font = main.font_small
+        mode = "STEP (N: next frame)" if self.stepping else f"speed 1/{SPEEDS[self.speed]}"
+        center_text(surf, f"TRAINING  {mode}", font, YELLOW, 90, outline=False)
+        slots = "  ".join(f"{i + 1}:{'saved' if s else '-'}" for i, s in enumerate(self.slots))
+        center_text(surf, f"F5-F8 save  1-4 load  P step  M slow-mo  Esc exit   [{slots}]", font, GREY, 116, outline=False)
+        if self.advantage.last:
+            name, adv, kind = self.advantage.last
+            center_text(surf, f"{name} {adv:+d} on {kind}", font, WHITE, 142, outline=False)
+        if self.message:
+            main.draw_image(surf, main.render_text(self.message, font, GREY), px(8), px(HEIGHT - 56))
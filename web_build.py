@@ -0,0 +1,205 @@
+import argparse
+import ast
+import json
+import os
+import py_compile
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+from assets import KINDS, MANIFEST_PATH
+from bots import POLICY_PATH
+from main import BUNDLED_FONT, WEB_EXTRAS
+from sprites import ATLAS_PATH
+
+# -------------- Web bundle --------------
+# Builds build/web for the browser instead of letting pygbag pack the
+# whole folder (tools, duplicate copies and all). The main archive holds
+# the modules main.py can reach, the manifest and the assets the title
+# screen needs; everything else goes into WEB_EXTRAS, which the game mounts
+# after its first frame (see AssetManager.mount_pack). Modules are shipped
+# as bytecode when this Python matches the browser's, and entries are
+# deflated unless the format is already compressed.
+#
+# The page itself is the pygbag template in index.html, which mounts
+# APK_NAME and runs main.py from it.
+
+ENTRY = "main.py"
+TEMPLATE = "index.html"
+SITE_FILES = ("favicon.png",)
+OUT_DIR = os.path.join("build", "web")
+APK_NAME = "fight_game.apk"
+APK_ROOT = "assets"             # pygbag runs the game from <apk>/assets
+TARGET_PYTHON = (3, 12)         # data-python in index.html
+# Only imported behind desktop flags (--broadcast, --telemetry, --record, --sim-process)
+DESKTOP_ONLY = {"spectate", "telemetry", "replay", "simproc"}
+# Assets that must be there for the first frame
+CORE_STATES = {"TITLE"}
+STORED = {".png", ".jpg", ".jpeg", ".ogg", ".mp3", ".zip", ".apk"}
+SKIP_DIRS = {"build", ".git", "__pycache__"}
+FIRST_FRAME_TIMEOUT = 30
+
+# -------------- Contents --------------
+def local_imports(path):
+    # Root-level modules imported anywhere in path, including lazy imports
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [a.name for a in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            top = name.split(".")[0]
+            if os.path.exists(top + ".py"):
+                yield top
+
+def find_modules(entry=ENTRY):
+    found = set()
+    todo = [os.path.splitext(entry)[0]]
+    while todo:
+        name = todo.pop()
+        if name in found or name in DESKTOP_ONLY:
+            continue
+        found.add(name)
+        todo.extend(local_imports(name + ".py"))
+    return sorted(found)
+
+def split_assets(manifest_path=MANIFEST_PATH):
+    # Returns (core, extras) lists of existing asset files, and the missing ones
+    core, extras = [manifest_path], []
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    base = os.path.dirname(manifest_path)
+    for kind in KINDS:
+        for spec in manifest.get(kind, {}).values():
+            path = os.path.join(base, spec["path"])
+            needed = kind == "fonts" or CORE_STATES.intersection(spec.get("states", ()))
+            (core if needed else extras).append(path)
+    # Drawn on the title screen too
+    core.append(BUNDLED_FONT)
+    if os.path.exists(ATLAS_PATH):
+        with open(ATLAS_PATH) as f:
+            atlas = json.load(f)
+        core += [ATLAS_PATH, os.path.join(os.path.dirname(ATLAS_PATH), atlas["image"])]
+    # CPU policy table (policy.py): small once deflated, and bots.py looks
+    # for it at import, before any extras are mounted
+    if os.path.exists(POLICY_PATH):
+        core.append(POLICY_PATH)
+    missing = [p for p in core[1:] + extras if not os.path.exists(p)]
+    keep = lambda paths: list(dict.fromkeys(p for p in paths if os.path.exists(p)))
+    return keep(core), keep(extras), missing
+
+def folder_size(root="."):
+    # What packing the whole folder would cost, for comparison
+    total = 0
+    for d, dirs, files in os.walk(root):
+        dirs[:] = [x for x in dirs if x not in SKIP_DIRS and not x.startswith(".")]
+        total += sum(os.path.getsize(os.path.join(d, f)) for f in files)
+    return total
+
+# -------------- Packing --------------
+def compile_module(name, tmp):
+    # Sourceless .pyc next to the others; imports find it without the .py
+    cfile = os.path.join(tmp, name + ".pyc")
+    py_compile.compile(name + ".py", cfile, dfile=name + ".py", doraise=True,
+                       invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+    return cfile
+
+def write_apk(path, files):
+    # files: [(archive name, source path)]; returns [(name, raw, packed)]
+    sizes = []
+    with zipfile.ZipFile(path, "w") as z:
+        for arcname, src in files:
+            ext = os.path.splitext(src)[1].lower()
+            method = zipfile.ZIP_STORED if ext in STORED else zipfile.ZIP_DEFLATED
+            z.write(src, f"{APK_ROOT}/{arcname}", method, 9 if method == zipfile.ZIP_DEFLATED else None)
+            info = z.getinfo(f"{APK_ROOT}/{arcname}")
+            sizes.append((arcname, info.file_size, info.compress_size))
+    return sizes
+
+def build(out_dir=OUT_DIR, bytecode=None):
+    if bytecode is None:
+        bytecode = sys.version_info[:2] == TARGET_PYTHON
+    modules = find_modules()
+    core, extras, missing = split_assets()
+    os.makedirs(out_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for name in modules:
+            if bytecode and name + ".py" != ENTRY:
+                files.append((name + ".pyc", compile_module(name, tmp)))
+            else:
+                files.append((name + ".py", name + ".py"))
+        files += [(p, p) for p in core]
+        apk = write_apk(os.path.join(out_dir, APK_NAME), files)
+    extra = write_apk(os.path.join(out_dir, WEB_EXTRAS), [(p, p) for p in extras])
+    for name in (TEMPLATE,) + SITE_FILES:
+        with open(name, "rb") as src, open(os.path.join(out_dir, os.path.basename(name)), "wb") as dst:
+            dst.write(src.read())
+    return {"modules": modules, "bytecode": bytecode, "apk": apk, "extras": extra, "missing": missing}
+
+# -------------- Time to first frame --------------
+def first_frame(out_dir=OUT_DIR):
+    # Unpack the main archive alone (extras arrive later in the browser too)
+    # and run it headless until main.py reports its first title frame.
+    # Returns (ms from process start, ms from main.py import) or None.
+    with tempfile.TemporaryDirectory() as tmp:
+        with zipfile.ZipFile(os.path.join(out_dir, APK_NAME)) as z:
+            z.extractall(tmp)
+        env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYTHONDONTWRITEBYTECODE="1",
+                   PYTHONUNBUFFERED="1")
+        t0 = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, ENTRY, "--startup-report"], cwd=os.path.join(tmp, APK_ROOT),
+                                env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        try:
+            deadline = t0 + FIRST_FRAME_TIMEOUT
+            for line in proc.stdout:
+                if line.startswith("startup:"):
+                    wall = (time.perf_counter() - t0) * 1000
+                    return wall, float(line.split()[1])
+                if time.perf_counter() > deadline:
+                    break
+            return None
+        finally:
+            proc.kill()
+            proc.wait()
+
+def report(result):
+    def total(rows):
+        return sum(r[1] for r in rows), sum(r[2] for r in rows)
+
+    print(f"{'file':28} {'raw':>9} {'packed':>9}")
+    for label, rows in ((APK_NAME, result["apk"]), (WEB_EXTRAS, result["extras"])):
+        for name, raw, packed in sorted(rows, key=lambda r: -r[2]):
+            print(f"  {name:26} {raw:9} {packed:9}")
+        raw, packed = total(rows)
+        print(f"{label:28} {raw:9} {packed:9}")
+    print(f"\nmodules: {', '.join(result['modules'])} ({'bytecode' if result['bytecode'] else 'source'})")
+    if not result["bytecode"]:
+        print(f"  (bytecode needs Python {TARGET_PYTHON[0]}.{TARGET_PYTHON[1]} to match the browser; "
+              f"this is {sys.version_info[0]}.{sys.version_info[1]})")
+    if result["missing"]:
+        print(f"not found, the game falls back without them: {', '.join(result['missing'])}")
+    apk_packed = total(result["apk"])[1]
+    print(f"before first frame: {apk_packed} bytes; whole folder would be {folder_size()} bytes")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the browser bundle into build/web")
+    parser.add_argument("--out", default=OUT_DIR)
+    parser.add_argument("--source", action="store_true", help="ship .py sources instead of bytecode")
+    parser.add_argument("--no-timing", action="store_true", help="skip the time-to-first-frame run")
+    args = parser.parse_args()
+    result = build(args.out, False if args.source else None)
+    report(result)
+    if not args.no_timing:
+        timing = first_frame(args.out)
+        if timing:
+            print(f"time to first frame (headless, this machine): {timing[0]:.0f} ms from launch, "
+                  f"{timing[1]:.0f} ms from import")
+        else:
+            print("time to first frame: no first frame within the timeout")